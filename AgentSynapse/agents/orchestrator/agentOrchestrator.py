@@ -1,7 +1,10 @@
 import asyncio
-import json
-from typing import List, Dict, Any, Optional
+import re
+import orjson
+from collections import defaultdict, deque
+from typing import List, Dict, Any, Optional, Set
 from uuid import uuid4
+from pydantic import BaseModel
 from config.settings import settings
 from utils.logger import getLogger
 from schemas import (
@@ -17,13 +20,195 @@ from agents.registry.agentRegistry import agentRegistry
 
 logger = getLogger(__name__)
 
+AGENT_TYPE_MAP = {
+    **{agentType.value: agentType for agentType in AgentType},
+    **{agentType.name: agentType for agentType in AgentType}
+}
+
+SIMPLE_REQUEST_MAX_CHARS = 200
+
+MULTI_STEP_PATTERN = re.compile(r"\b(?:and then|then|after that|afterwards|followed by|also|plus)\b")
+
+AGENT_DOMAIN_KEYWORDS = {
+    AgentType.SQL_AGENT: ("sql", "query", "table", "lakehouse"),
+    AgentType.BI_AGENT: ("dashboard", "chart", "visuali", "dataset"),
+    AgentType.ETL_AGENT: ("pipeline", "etl", "transform", "job log"),
+    AgentType.ANALYTICS_AGENT: ("analy", "insight", "statistic", "trend")
+}
+
+class DecomposedTaskWire(BaseModel):
+    """Single task as emitted by the decomposition prompt"""
+    description: str
+    agentType: str
+    dependencies: List[str] = []
+    priority: int = 1
+    estimatedTokens: int = 1000
+
+
+class DecompositionEnvelope(BaseModel):
+    """Top-level decomposition response, validated straight from JSON"""
+    tasks: List[DecomposedTaskWire] = []
+
+
+DEFAULT_SYSTEM_PROMPTS = {
+    AgentType.ORCHESTRATOR: "You are an orchestrator agent coordinating multiple specialized agents.",
+    AgentType.SQL_AGENT: "You are a SQL expert helping with database queries and lakehouse operations.",
+    AgentType.BI_AGENT: "You are a BI specialist creating dashboards, datasets, and visualizations.",
+    AgentType.ETL_AGENT: "You are an ETL expert helping with pipelines, logs, and data transformation.",
+    AgentType.ANALYTICS_AGENT: "You are a data analyst providing insights and statistical analysis."
+}
+
+# Sent as a cached system block on every orchestrate() call. Bedrock only writes a cache
+# entry for prefixes of at least PROMPT_CACHE_MIN_TOKENS, so the stable agent catalog and
+# response schema live here rather than in the per-request message
+DECOMPOSITION_SYSTEM_PROMPT = """
+You are a task decomposition expert for multi-agent systems.
+
+Analyze the user's request and determine if it requires multiple specialized agents.
+Each subtask you emit is executed by exactly one specialized agent, and independent
+subtasks run in parallel. Results are then synthesized into a single answer for the
+user, so only split a request when the parts genuinely need different specialists.
+
+Available agent types:
+- SQL_AGENT: Handles database queries, data retrieval from lakehouse
+- BI_AGENT: Creates dashboards, datasets, filters, visualizations
+- ETL_AGENT: Pipeline debugging, log analysis, data transformation
+- ANALYTICS_AGENT: Data analysis, insights, statistical operations
+
+Agent catalog:
+
+SQL_AGENT
+  Use for: writing, explaining, optimizing and running SQL against the lakehouse;
+  looking up table schemas, columns, partitions and row counts; retrieving the raw
+  records another step needs; checking data quality with counts, null checks and
+  duplicate detection.
+  Do not use for: building charts or dashboards, interpreting trends, or diagnosing
+  why a pipeline job failed.
+  Typical output: a query, its result set or a summary of it, and any caveats about
+  filters, joins or sampling that were applied.
+
+BI_AGENT
+  Use for: creating or editing dashboards, datasets, filters, drill-downs and
+  visualizations; choosing chart types for a metric; wiring a dataset to an existing
+  report; explaining what a dashboard tile shows.
+  Do not use for: ad hoc data retrieval that is not destined for a report, or
+  statistical analysis of the numbers themselves.
+  Typical output: the dashboard or dataset definition that was created or changed,
+  and the fields, filters and aggregations it uses.
+
+ETL_AGENT
+  Use for: debugging failed or slow pipeline runs, reading job logs, tracing where a
+  column or table is produced, designing or changing transformations, scheduling and
+  dependency issues between jobs, and backfills.
+  Do not use for: answering business questions from the data, or building reports.
+  Typical output: the root cause of a failure with the relevant log lines, or the
+  transformation logic that was proposed or changed.
+
+ANALYTICS_AGENT
+  Use for: interpreting data, finding trends, seasonality, outliers and correlations,
+  comparing segments or periods, forecasting, significance testing, and turning
+  numbers into recommendations.
+  Do not use for: fetching data it has not been given when a SQL_AGENT step can
+  retrieve it first, or building dashboards.
+  Typical output: findings with the supporting figures, the method used, and the
+  confidence or limitations of the conclusion.
+
+Decomposition rules:
+1. If the request can be handled by a single agent, return an empty task list. The
+   orchestrator then routes the request to that agent directly.
+2. Otherwise create one task per distinct piece of work, each assigned to the single
+   agent type best suited to it. Do not create more than one task for the same agent
+   unless the steps depend on each other.
+3. Write each description as a self-contained instruction. The assigned agent sees
+   only its own description, not the original request or the other tasks, so include
+   every table name, metric, time range and filter the step needs.
+4. List a task in another task's dependencies only when it needs that task's output,
+   for example an ANALYTICS_AGENT step that analyzes rows a SQL_AGENT step retrieves.
+   Tasks without dependencies run in parallel, so do not add ordering that is not
+   required. Never create circular dependencies.
+5. Use priority 1 for work on the critical path and larger numbers for optional or
+   supporting work.
+6. Set estimatedTokens to a rough budget for the step: about 500 for a lookup, 1000
+   for a typical query or explanation, and 2000 to 4000 for multi-step analysis or
+   log investigation.
+7. Use only the agent types listed above, spelled exactly as shown.
+
+Response format:
+Return a single JSON object and nothing else: no prose before or after it and no
+Markdown code fences. The object must match this schema:
+
+{
+  "type": "object",
+  "properties": {
+    "tasks": {
+      "type": "array",
+      "items": {
+        "type": "object",
+        "properties": {
+          "description": {"type": "string"},
+          "agentType": {"enum": ["SQL_AGENT", "BI_AGENT", "ETL_AGENT", "ANALYTICS_AGENT"]},
+          "dependencies": {"type": "array", "items": {"type": "string"}},
+          "priority": {"type": "integer", "minimum": 1},
+          "estimatedTokens": {"type": "integer", "minimum": 1}
+        },
+        "required": ["description", "agentType"]
+      }
+    }
+  },
+  "required": ["tasks"]
+}
+
+Examples:
+
+Request: "How many orders did we ship last week?"
+Response: {"tasks": []}
+
+Request: "Pull last quarter's revenue by region from the sales tables, then tell me
+which regions are trending down and build a dashboard for the regional team."
+Response:
+{
+  "tasks": [
+    {
+      "description": "Query the sales tables for total revenue per region per week for last quarter",
+      "agentType": "SQL_AGENT",
+      "dependencies": [],
+      "priority": 1,
+      "estimatedTokens": 1000
+    },
+    {
+      "description": "Identify regions whose weekly revenue trended down over last quarter and quantify the decline",
+      "agentType": "ANALYTICS_AGENT",
+      "dependencies": ["taskId1"],
+      "priority": 1,
+      "estimatedTokens": 2000
+    },
+    {
+      "description": "Build a dashboard of weekly revenue per region for last quarter with a region filter",
+      "agentType": "BI_AGENT",
+      "dependencies": [],
+      "priority": 2,
+      "estimatedTokens": 1500
+    }
+  ]
+}
+"""
+
+SYNTHESIS_SYSTEM_PROMPT = """
+You are an orchestrator agent coordinating multiple specialized agents.
+
+You will receive the original user request and the JSON results returned by the
+specialized agents. Synthesize these results into a cohesive response for the user.
+"""
+
 
 class AgentOrchestrator:
     def __init__(self):
         self.engine = agentEngine
         self.bedrock = bedrockClient
         self.agentRegistry = agentRegistry
-        self._messageQueue = asyncio.Queue()
+        # (tenantId, agentType) -> [lock, holders and waiters]; dropped once unused so
+        # the map only holds in-flight creations
+        self._defaultAgentLocks = {}
 
     async def orchestrate(
         self,
@@ -34,7 +219,10 @@ class AgentOrchestrator:
     ) -> Dict[str, Any]:
         orchestratorAgent = await self._getOrCreateOrchestrator(tenantContext)
 
-        tasks = await self._decomposeTask(userRequest, tenantContext)
+        if self._isSimpleRequest(userRequest):
+            tasks = []
+        else:
+            tasks = await self._decomposeTask(userRequest, tenantContext)
 
         if not tasks:
             return await self._executeSingleAgent(
@@ -46,6 +234,11 @@ class AgentOrchestrator:
 
         executionPlan = self._buildExecutionPlan(tasks)
 
+        await self._ensureDefaultAgents(
+            {task.assignedAgentType for task in tasks},
+            tenantContext
+        )
+
         results = await self._executeParallelTasks(
             executionPlan,
             sessionId,
@@ -68,72 +261,65 @@ class AgentOrchestrator:
             "executionPlan": executionPlan
         }
 
-    async def _decomposeTask(
-        self,
-        userRequest: str,
-        tenantContext: TenantContext
-    ) -> List[TaskDecomposition]:
-        decompositionPrompt = f"""
-Analyze this user request and determine if it requires multiple specialized agents:
+    def _isSimpleRequest(self, userRequest: str) -> bool:
+        """Cheap check for requests one agent can handle without LLM decomposition"""
+        if len(userRequest) >= SIMPLE_REQUEST_MAX_CHARS:
+            return False
 
-Request: {userRequest}
+        lowered = userRequest.lower()
 
-Available agent types:
-- SQL_AGENT: Handles database queries, data retrieval from lakehouse
-- BI_AGENT: Creates dashboards, datasets, filters, visualizations
-- ETL_AGENT: Pipeline debugging, log analysis, data transformation
-- ANALYTICS_AGENT: Data analysis, insights, statistical operations
+        if MULTI_STEP_PATTERN.search(lowered):
+            return False
 
-If the task is simple, return an empty list.
-If it's complex, break it down into subtasks and assign to appropriate agents.
+        domainCount = sum(
+            1 for keywords in AGENT_DOMAIN_KEYWORDS.values()
+            if any(keyword in lowered for keyword in keywords)
+        )
 
-Return JSON format:
-{{
-  "tasks": [
-    {{
-      "description": "task description",
-      "agentType": "agent_type",
-      "dependencies": ["taskId1", "taskId2"],
-      "priority": 1,
-      "estimatedTokens": 1000
-    }}
-  ]
-}}
-"""
+        return domainCount <= 1
 
-        messages = self.bedrock.formatMessages(decompositionPrompt)
-        response = self.bedrock.invokeModel(
+    async def _decomposeTask(
+        self,
+        userRequest: str,
+        tenantContext: TenantContext
+    ) -> List[TaskDecomposition]:
+        messages = self.bedrock.formatMessages(userRequest)
+        response = await self.bedrock.invokeModelAsync(
             messages=messages,
-            systemPrompt="You are a task decomposition expert for multi-agent systems.",
+            systemPrompt=DECOMPOSITION_SYSTEM_PROMPT,
             temperature=0.3,
-            maxTokens=2000
+            maxTokens=2000,
+            cacheSystemPrompt=True
         )
 
         responseText = self.bedrock.extractTextResponse(response)
 
-        try:
-            data = json.loads(responseText)
-            tasksList = data.get("tasks", [])
+        jsonStart = responseText.find("{")
+        jsonEnd = responseText.rfind("}")
 
-            if not tasksList:
-                return []
+        if jsonStart == -1 or jsonEnd < jsonStart:
+            return []
 
-            tasks = []
-            for taskData in tasksList:
-                task = TaskDecomposition(
+        try:
+            envelope = DecompositionEnvelope.model_validate_json(responseText[jsonStart:jsonEnd + 1])
+
+            tasks = [
+                TaskDecomposition.model_construct(
                     taskId=str(uuid4()),
-                    description=taskData["description"],
-                    assignedAgentType=AgentType(taskData["agentType"]),
-                    dependencies=taskData.get("dependencies", []),
-                    priority=taskData.get("priority", 1),
-                    estimatedTokens=taskData.get("estimatedTokens", 1000)
+                    description=taskData.description,
+                    assignedAgentType=AGENT_TYPE_MAP[taskData.agentType],
+                    dependencies=taskData.dependencies,
+                    priority=taskData.priority,
+                    estimatedTokens=taskData.estimatedTokens
                 )
-                tasks.append(task)
+                for taskData in envelope.tasks
+            ]
 
-            logger.info("task_decomposition_completed", taskCount=len(tasks))
+            if tasks:
+                logger.info("task_decomposition_completed", taskCount=len(tasks))
             return tasks
 
-        except (json.JSONDecodeError, ValueError, KeyError) as e:
+        except (ValueError, KeyError) as e:
             logger.error("task_decomposition_error", error=str(e), response=responseText)
             return []
 
@@ -146,26 +332,35 @@ Return JSON format:
             "parallel": []
         }
 
-        taskMap = {task.taskId: task for task in tasks}
-        completed = set()
-        remaining = set(task.taskId for task in tasks)
+        indegree = {}
+        position = {}
+        dependents = defaultdict(list)
 
-        waves = []
-        while remaining:
-            currentWave = []
+        for index, task in enumerate(tasks):
+            indegree[task.taskId] = len(task.dependencies)
+            position[task.taskId] = index
+            for dep in task.dependencies:
+                dependents[dep].append(task)
 
-            for taskId in list(remaining):
-                task = taskMap[taskId]
-                if all(dep in completed for dep in task.dependencies):
-                    currentWave.append(task)
-                    remaining.remove(taskId)
+        ready = deque(task for task in tasks if indegree[task.taskId] == 0)
+        placed = 0
 
-            if not currentWave:
-                logger.warning("circular_dependency_detected")
-                break
+        waves = []
+        while ready:
+            currentWave = sorted(ready, key=lambda task: position[task.taskId])
+            ready.clear()
+
+            for task in currentWave:
+                for dependent in dependents.get(task.taskId, ()):
+                    indegree[dependent.taskId] -= 1
+                    if indegree[dependent.taskId] == 0:
+                        ready.append(dependent)
 
             waves.append(currentWave)
-            completed.update(task.taskId for task in currentWave)
+            placed += len(currentWave)
+
+        if placed < len(tasks):
+            logger.warning("circular_dependency_detected")
 
         for wave in waves:
             if len(wave) > 1:
@@ -182,40 +377,43 @@ Return JSON format:
         tenantContext: TenantContext,
         authToken: Optional[str] = None
     ) -> Dict[str, Any]:
+        tasks = executionPlan.get("sequential", []) + executionPlan.get("parallel", [])
         results = {}
 
-        for task in executionPlan.get("sequential", []):
-            result = await self._executeTask(task, sessionId, tenantContext, authToken)
-            results[task.taskId] = result
-            task.result = result
-            task.status = AgentStatus.COMPLETED
-
-        parallelTasks = executionPlan.get("parallel", [])
+        if not tasks:
+            return results
 
-        if parallelTasks:
-            parallelLimit = min(len(parallelTasks), settings.agent.maxParallelAgents)
+        indegree = {task.taskId: len(task.dependencies) for task in tasks}
+        dependents = defaultdict(list)
+        for task in tasks:
+            for dep in task.dependencies:
+                dependents[dep].append(task)
 
-            semaphore = asyncio.Semaphore(parallelLimit)
+        semaphore = asyncio.Semaphore(min(len(tasks), settings.agent.maxParallelAgents))
 
-            async def executeWithSemaphore(task):
+        async with asyncio.TaskGroup() as taskGroup:
+            async def runTask(task: TaskDecomposition):
                 async with semaphore:
-                    return await self._executeTask(task, sessionId, tenantContext, authToken)
-
-            parallelResults = await asyncio.gather(
-                *[executeWithSemaphore(task) for task in parallelTasks],
-                return_exceptions=True
-            )
-
-            for task, result in zip(parallelTasks, parallelResults):
-                if isinstance(result, Exception):
-                    results[task.taskId] = {"error": str(result)}
-                    task.status = AgentStatus.FAILED
-                else:
-                    results[task.taskId] = result
-                    task.result = result
-                    task.status = AgentStatus.COMPLETED
-
-        return results
+                    try:
+                        result = await self._executeTask(task, sessionId, tenantContext, authToken)
+                    except Exception as e:
+                        results[task.taskId] = {"error": str(e)}
+                        task.status = AgentStatus.FAILED
+                    else:
+                        results[task.taskId] = result
+                        task.result = result
+                        task.status = AgentStatus.COMPLETED
+
+                for dependent in dependents.get(task.taskId, ()):
+                    indegree[dependent.taskId] -= 1
+                    if indegree[dependent.taskId] == 0:
+                        taskGroup.create_task(runTask(dependent))
+
+            for task in tasks:
+                if indegree[task.taskId] == 0:
+                    taskGroup.create_task(runTask(task))
+
+        return {task.taskId: results[task.taskId] for task in tasks if task.taskId in results}
 
     async def _executeTask(
         self,
@@ -244,11 +442,14 @@ Return JSON format:
             status=execution.status
         )
 
-        return {
+        result = {
             "response": execution.agentResponse,
             "toolCalls": execution.toolCalls,
             "status": execution.status.value
         }
+        if execution.status == AgentStatus.FAILED:
+            result["error"] = execution.errorMessage or f"{task.assignedAgentType.value} task failed"
+        return result
 
     async def _synthesizeResults(
         self,
@@ -258,17 +459,39 @@ Return JSON format:
         sessionId: str,
         authToken: Optional[str] = None
     ) -> str:
-        synthesisPrompt = f"""
-Original user request: {originalRequest}
+        successful = [
+            result for result in results.values()
+            if "error" not in result and result.get("status") != AgentStatus.FAILED.value
+        ]
+
+        if not successful:
+            errors = [result.get("error") or "task failed" for result in results.values()]
+            if not errors:
+                return "Unable to synthesize results"
+            return "All tasks failed: " + "; ".join(errors)
+
+        # Sibling failures still go through synthesis so the user sees them
+        if len(results) == 1:
+            return successful[0].get("response") or "Unable to synthesize results"
+
+        summarizedResults = {
+            taskId: {**result, "toolCalls": self._summarizeToolCalls(result.get("toolCalls", []))}
+            if "toolCalls" in result else result
+            for taskId, result in results.items()
+        }
 
-Results from specialized agents:
-{json.dumps(results, indent=2)}
+        synthesisPrompt = (
+            f"Original user request: {originalRequest}\n\n"
+            f"Results from specialized agents:\n"
+            f"{orjson.dumps(summarizedResults, option=orjson.OPT_INDENT_2).decode()}"
+        )
 
-Synthesize these results into a cohesive response for the user.
-"""
+        synthesisAgent = orchestratorAgent.model_copy(
+            update={"systemPrompt": SYNTHESIS_SYSTEM_PROMPT}
+        )
 
         execution = await self.engine.execute(
-            orchestratorAgent,
+            synthesisAgent,
             synthesisPrompt,
             sessionId,
             authToken,
@@ -277,6 +500,19 @@ Synthesize these results into a cohesive response for the user.
 
         return execution.agentResponse or "Unable to synthesize results"
 
+    @staticmethod
+    def _summarizeToolCalls(toolCalls: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Reduce tool calls to name and outcome so synthesis prompts skip raw tool I/O"""
+        summaries = []
+        for toolCall in toolCalls:
+            result = toolCall.get("result")
+            failed = isinstance(result, dict) and ("error" in result or result.get("success") is False)
+            summaries.append({
+                "name": toolCall.get("name"),
+                "status": "error" if failed else "success"
+            })
+        return summaries
+
     async def _executeSingleAgent(
         self,
         agent: AgentConfig,
@@ -314,27 +550,68 @@ Synthesize these results into a cohesive response for the user.
         agentType: AgentType,
         tenantContext: TenantContext
     ) -> AgentConfig:
-        systemPrompts = {
-            AgentType.ORCHESTRATOR: "You are an orchestrator agent coordinating multiple specialized agents.",
-            AgentType.SQL_AGENT: "You are a SQL expert helping with database queries and lakehouse operations.",
-            AgentType.BI_AGENT: "You are a BI specialist creating dashboards, datasets, and visualizations.",
-            AgentType.ETL_AGENT: "You are an ETL expert helping with pipelines, logs, and data transformation.",
-            AgentType.ANALYTICS_AGENT: "You are a data analyst providing insights and statistical analysis."
-        }
+        lockKey = (tenantContext.tenantId, agentType.value)
+        lockEntry = self._defaultAgentLocks.setdefault(lockKey, [asyncio.Lock(), 0])
+        lockEntry[1] += 1
 
-        agent = AgentConfig(
+        try:
+            async with lockEntry[0]:
+                # Another request may have created the default while this one waited
+                agent = await self.agentRegistry.getByType(agentType, tenantContext)
+                if agent:
+                    return agent
+
+                agent = self._buildDefaultAgent(agentType, tenantContext)
+                return await self.agentRegistry.registerIfAbsent(agent)
+        finally:
+            lockEntry[1] -= 1
+            if lockEntry[1] == 0:
+                del self._defaultAgentLocks[lockKey]
+
+    async def _ensureDefaultAgents(
+        self,
+        agentTypes: Set[AgentType],
+        tenantContext: TenantContext
+    ):
+        agentTypes = list(agentTypes)
+        existing = await asyncio.gather(*[
+            self.agentRegistry.getByType(agentType, tenantContext)
+            for agentType in agentTypes
+        ])
+
+        missing = [agentType for agentType, agent in zip(agentTypes, existing) if not agent]
+
+        if not missing:
+            return
+
+        # A lookup can miss on a transient error or index lag, so creation goes through the
+        # per-type lock and conditional put rather than overwriting a customized default
+        created = await asyncio.gather(*[
+            self._createDefaultAgent(agentType, tenantContext)
+            for agentType in missing
+        ], return_exceptions=True)
+
+        failed = [agentType.value for agentType, result in zip(missing, created) if isinstance(result, Exception)]
+        if failed:
+            # Each task falls back to _createDefaultAgent when it resolves its agent
+            logger.warning("default_agents_create_skipped", agentTypes=failed)
+
+    def _buildDefaultAgent(
+        self,
+        agentType: AgentType,
+        tenantContext: TenantContext
+    ) -> AgentConfig:
+        return AgentConfig(
+            id=f"default-{agentType.value}",
             name=f"Default {agentType.value}",
             type=agentType,
             description=f"Auto-created {agentType.value}",
-            systemPrompt=systemPrompts.get(agentType, "You are a helpful AI assistant."),
+            systemPrompt=DEFAULT_SYSTEM_PROMPTS.get(agentType, "You are a helpful AI assistant."),
             tenantContext=tenantContext,
             temperature=0.7,
             maxTokens=4096,
             toolIds=[]
         )
 
-        await self.agentRegistry.register(agent)
-        return agent
-
 
 agentOrchestrator = AgentOrchestrator()
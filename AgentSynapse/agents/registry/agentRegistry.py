@@ -1,52 +1,98 @@
-import boto3
+import numbers
+from collections import deque
 from boto3.dynamodb.conditions import Key, Attr
-from typing import List, Optional
+from botocore.exceptions import ClientError
+from typing import AsyncIterator, List, Optional
 from datetime import datetime
 from decimal import Decimal
 from config.settings import settings
+from utils.awsClients import getAsyncTable
 from utils.logger import getLogger
 from utils.exceptions import AgentNotFound
+from utils.cache import LRUCache
 from schemas import AgentConfig, AgentType, TenantContext
 
 logger = getLogger(__name__)
 
+AGENT_CACHE_MAX_SIZE = 10_000
+AGENT_CACHE_TTL_SECONDS = 300
+# GSI on the agent config table: partition key gsi1pk (S, "TENANT#<tenantId>#TYPE#<type>"),
+# sort key gsi1sk (S, agent id), projection ALL since _itemToAgentConfig reads every attribute
+AGENT_TYPE_INDEX = "AgentTypeIndex"
+
+_DECIMAL_CONVERTERS = {
+    float: lambda value: Decimal(str(value)),
+    int: Decimal
+}
+
 
 class AgentRegistry:
     def __init__(self):
-        self._dynamodb = None
-        self._table = None
-        self._cache = {}
-
-    def _getTable(self):
-        if not self._table:
-            resourceArgs = {
-                "region_name": settings.aws.region,
-                "aws_access_key_id": settings.aws.accessKeyId,
-                "aws_secret_access_key": settings.aws.secretAccessKey
-            }
-            if settings.dynamodb.endpointUrl:
-                resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
-
-            self._dynamodb = boto3.resource("dynamodb", **resourceArgs)
-            self._table = self._dynamodb.Table(settings.dynamodb.tableAgentConfig)
-        return self._table
+        self._cache = LRUCache(AGENT_CACHE_MAX_SIZE, AGENT_CACHE_TTL_SECONDS)
+        self._typeCache = LRUCache(AGENT_CACHE_MAX_SIZE, AGENT_CACHE_TTL_SECONDS)
+        self._typeIndexBackfilled = LRUCache(AGENT_CACHE_MAX_SIZE)
 
-    def _convertToDecimal(self, obj):
-        """Convert float and int values to Decimal for DynamoDB"""
-        if isinstance(obj, float):
-            return Decimal(str(obj))
-        elif isinstance(obj, int):
-            return Decimal(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convertToDecimal(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convertToDecimal(item) for item in obj]
-        return obj
+    async def _getTable(self):
+        return await getAsyncTable(settings.dynamodb.tableAgentConfig)
 
-    async def register(self, agent: AgentConfig) -> str:
-        table = self._getTable()
+    def _typeIndexKey(self, tenantId: str, agentType: AgentType) -> str:
+        return f"TENANT#{tenantId}#TYPE#{agentType.value}"
 
-        item = {
+    def _convertToDecimal(self, obj):
+        """Convert float and int values to Decimal for DynamoDB
+
+        Exact built-in types take a dict lookup; subclasses such as OrderedDict,
+        IntEnum or numpy scalars fall back to isinstance checks.
+        """
+        scalarConverters = _DECIMAL_CONVERTERS
+        stack = deque()
+
+        def convert(value):
+            valueType = value.__class__
+            if valueType is str:
+                return value
+
+            converter = scalarConverters.get(valueType)
+            if converter:
+                return converter(value)
+
+            if valueType is dict:
+                container = {}
+            elif valueType is list:
+                container = []
+            elif isinstance(value, bool):
+                return value
+            elif isinstance(value, numbers.Integral):
+                # IntEnum members, numpy integers
+                return Decimal(int(value))
+            elif isinstance(value, numbers.Real):
+                # numpy floats and other float subclasses
+                return Decimal(str(float(value)))
+            elif isinstance(value, dict):
+                container = {}
+            elif isinstance(value, (list, tuple)):
+                container = []
+            else:
+                return value
+
+            stack.append((value, container))
+            return container
+
+        result = convert(obj)
+
+        while stack:
+            source, target = stack.pop()
+            if target.__class__ is dict:
+                for key, value in source.items():
+                    target[key] = convert(value)
+            else:
+                for value in source:
+                    target.append(convert(value))
+
+        return result
+
+    def _toItem(self, agent: AgentConfig) -> dict:
+        return {
             "pk": f"TENANT#{agent.tenantContext.tenantId}",
             "sk": f"AGENT#{agent.id}",
             "id": agent.id,
@@ -58,17 +104,25 @@ class AgentRegistry:
             "maxTokens": Decimal(agent.maxTokens),
             "toolIds": agent.toolIds,
             "isAsync": agent.isAsync,
+            "parallelToolExecution": agent.parallelToolExecution,
             "timeoutSeconds": Decimal(agent.timeoutSeconds),
             "customSettings": self._convertToDecimal(agent.customSettings),
             "tenantId": agent.tenantContext.tenantId,
             "userId": agent.tenantContext.userId,
+            "gsi1pk": self._typeIndexKey(agent.tenantContext.tenantId, agent.type),
+            "gsi1sk": agent.id,
             "createdAt": agent.createdAt.isoformat(),
             "updatedAt": agent.updatedAt.isoformat()
         }
 
+    async def register(self, agent: AgentConfig) -> str:
+        table = await self._getTable()
+        item = self._toItem(agent)
+
         try:
-            table.put_item(Item=item)
-            self._cache[f"{agent.tenantContext.tenantId}:{agent.id}"] = agent
+            await table.put_item(Item=item)
+            self._cache.set((agent.tenantContext.tenantId, agent.id), agent)
+            self._cacheByType(agent)
             logger.info("agent_registered", agentId=agent.id, agentType=agent.type.value)
             return agent.id
 
@@ -76,68 +130,152 @@ class AgentRegistry:
             logger.error("agent_registration_error", error=str(e), agentId=agent.id)
             raise
 
+    async def registerIfAbsent(self, agent: AgentConfig) -> AgentConfig:
+        """Register the agent unless its id already exists; returns the stored agent"""
+        table = await self._getTable()
+        item = self._toItem(agent)
+
+        try:
+            await table.put_item(
+                Item=item,
+                ConditionExpression="attribute_not_exists(sk)"
+            )
+            self._cache.set((agent.tenantContext.tenantId, agent.id), agent)
+            self._cacheByType(agent)
+            logger.info("agent_registered", agentId=agent.id, agentType=agent.type.value)
+            return agent
+
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                logger.error("agent_registration_error", error=str(e), agentId=agent.id)
+                raise
+
+            logger.info("agent_already_registered", agentId=agent.id)
+            return await self.get(agent.id, agent.tenantContext)
+
     async def get(self, agentId: str, tenantContext: TenantContext) -> AgentConfig:
-        cacheKey = f"{tenantContext.tenantId}:{agentId}"
+        agent = await self.tryGet(agentId, tenantContext)
+        if agent is None:
+            raise AgentNotFound(agentId)
+        return agent
+
+    async def tryGet(self, agentId: str, tenantContext: TenantContext) -> Optional[AgentConfig]:
+        """Like get, but returns None for a missing agent instead of raising"""
+        cacheKey = (tenantContext.tenantId, agentId)
 
-        if cacheKey in self._cache:
-            return self._cache[cacheKey]
+        cached = self._cache.get(cacheKey)
+        if cached:
+            return cached
 
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
-            response = table.get_item(
+            response = await table.get_item(
                 Key={
                     "pk": f"TENANT#{tenantContext.tenantId}",
                     "sk": f"AGENT#{agentId}"
                 }
             )
 
-            if "Item" not in response:
-                logger.warning("agent_not_found", agentId=agentId, tenantId=tenantContext.tenantId)
-                raise AgentNotFound(agentId)
-
-            item = response["Item"]
-            agent = self._itemToAgentConfig(item, tenantContext)
-            self._cache[cacheKey] = agent
-            return agent
-
         except Exception as e:
             logger.error("agent_get_error", error=str(e), agentId=agentId)
-            if isinstance(e, AgentNotFound):
-                raise
-            raise AgentNotFound(agentId)
+            return None
+
+        item = response.get("Item")
+        if item is None:
+            logger.warning("agent_not_found", agentId=agentId, tenantId=tenantContext.tenantId)
+            return None
+
+        agent = self._itemToAgentConfig(item, tenantContext)
+        self._cache.set(cacheKey, agent)
+        self._cacheByType(agent)
+        return agent
 
     async def getByType(
         self,
         agentType: AgentType,
         tenantContext: TenantContext
     ) -> Optional[AgentConfig]:
-        table = self._getTable()
+        cached = self._typeCache.get((tenantContext.tenantId, agentType.value))
+        if cached:
+            return cached
+
+        table = await self._getTable()
 
         try:
-            response = table.query(
-                KeyConditionExpression=Key("pk").eq(f"TENANT#{tenantContext.tenantId}"),
-                FilterExpression=Attr("type").eq(agentType.value),
+            response = await table.query(
+                IndexName=AGENT_TYPE_INDEX,
+                KeyConditionExpression=Key("gsi1pk").eq(
+                    self._typeIndexKey(tenantContext.tenantId, agentType)
+                ),
                 Limit=1
             )
 
             items = response.get("Items", [])
 
+            if not items and tenantContext.tenantId not in self._typeIndexBackfilled:
+                legacyItems = await self._backfillTypeIndex(table, tenantContext)
+                items = [item for item in legacyItems if item["type"] == agentType.value]
+
             if not items:
                 return None
 
-            return self._itemToAgentConfig(items[0], tenantContext)
+            agent = self._itemToAgentConfig(items[0], tenantContext)
+            self._cacheByType(agent, replace=True)
+            return agent
 
         except Exception as e:
             logger.error("agent_get_by_type_error", error=str(e), agentType=agentType.value)
             return None
 
+    async def _backfillTypeIndex(self, table, tenantContext: TenantContext) -> List[dict]:
+        """Index a tenant's agents registered before the type index existed; returns them
+
+        Runs once per tenant per process, so later type-index misses (the usual "no agent
+        of this type yet" case) skip the full-partition read.
+        """
+        queryParams = {
+            "KeyConditionExpression": Key("pk").eq(f"TENANT#{tenantContext.tenantId}") &
+            Key("sk").begins_with("AGENT#"),
+            "FilterExpression": Attr("gsi1pk").not_exists()
+        }
+        legacyItems = []
+
+        while True:
+            response = await table.query(**queryParams)
+            legacyItems.extend(response.get("Items", []))
+
+            lastKey = response.get("LastEvaluatedKey")
+            if not lastKey:
+                break
+            queryParams["ExclusiveStartKey"] = lastKey
+
+        for item in legacyItems:
+            await table.update_item(
+                Key={"pk": item["pk"], "sk": item["sk"]},
+                UpdateExpression="SET gsi1pk = :gsi1pk, gsi1sk = :gsi1sk",
+                ConditionExpression="attribute_exists(sk)",
+                ExpressionAttributeValues={
+                    ":gsi1pk": self._typeIndexKey(tenantContext.tenantId, AgentType(item["type"])),
+                    ":gsi1sk": item["id"]
+                }
+            )
+
+        self._typeIndexBackfilled.set(tenantContext.tenantId, True)
+        if legacyItems:
+            logger.info(
+                "agent_type_index_backfilled",
+                tenantId=tenantContext.tenantId,
+                count=len(legacyItems)
+            )
+        return legacyItems
+
     async def list(
         self,
         tenantContext: TenantContext,
         agentType: Optional[AgentType] = None
     ) -> List[AgentConfig]:
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
             queryParams = {
@@ -147,7 +285,7 @@ class AgentRegistry:
             if agentType:
                 queryParams["FilterExpression"] = Attr("type").eq(agentType.value)
 
-            response = table.query(**queryParams)
+            response = await table.query(**queryParams)
             items = response.get("Items", [])
 
             return [self._itemToAgentConfig(item, tenantContext) for item in items]
@@ -156,8 +294,38 @@ class AgentRegistry:
             logger.error("agent_list_error", error=str(e), tenantId=tenantContext.tenantId)
             return []
 
+    async def listStream(
+        self,
+        tenantContext: TenantContext,
+        agentType: Optional[AgentType] = None
+    ) -> AsyncIterator[AgentConfig]:
+        """Yield agents page by page, following LastEvaluatedKey"""
+        table = await self._getTable()
+
+        queryParams = {
+            "KeyConditionExpression": Key("pk").eq(f"TENANT#{tenantContext.tenantId}")
+        }
+
+        if agentType:
+            queryParams["FilterExpression"] = Attr("type").eq(agentType.value)
+
+        try:
+            while True:
+                response = await table.query(**queryParams)
+
+                for item in response.get("Items", []):
+                    yield self._itemToAgentConfig(item, tenantContext)
+
+                lastKey = response.get("LastEvaluatedKey")
+                if not lastKey:
+                    return
+                queryParams["ExclusiveStartKey"] = lastKey
+
+        except Exception as e:
+            logger.error("agent_list_error", error=str(e), tenantId=tenantContext.tenantId)
+
     async def update(self, agentId: str, updates: dict, tenantContext: TenantContext) -> bool:
-        table = self._getTable()
+        table = await self._getTable()
 
         updateExpr = "SET "
         exprAttrValues = {}
@@ -173,41 +341,49 @@ class AgentRegistry:
         exprAttrValues[":updatedAt"] = datetime.utcnow().isoformat()
 
         try:
-            table.update_item(
+            response = await table.update_item(
                 Key={
                     "pk": f"TENANT#{tenantContext.tenantId}",
                     "sk": f"AGENT#{agentId}"
                 },
                 UpdateExpression=updateExpr,
+                ConditionExpression="attribute_exists(sk)",
                 ExpressionAttributeNames=exprAttrNames,
-                ExpressionAttributeValues=exprAttrValues
+                ExpressionAttributeValues=exprAttrValues,
+                ReturnValues="ALL_NEW"
             )
 
-            cacheKey = f"{tenantContext.tenantId}:{agentId}"
-            if cacheKey in self._cache:
-                del self._cache[cacheKey]
+            self._refresh(self._itemToAgentConfig(response["Attributes"], tenantContext))
 
             logger.info("agent_updated", agentId=agentId)
             return True
 
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                logger.error("agent_update_error", error=str(e), agentId=agentId)
+                return False
+
+            # Without the condition update_item would upsert a partial agent item
+            self._invalidate(tenantContext.tenantId, agentId)
+            logger.info("agent_update_missing", agentId=agentId)
+            return False
+
         except Exception as e:
             logger.error("agent_update_error", error=str(e), agentId=agentId)
             return False
 
     async def delete(self, agentId: str, tenantContext: TenantContext) -> bool:
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
-            table.delete_item(
+            await table.delete_item(
                 Key={
                     "pk": f"TENANT#{tenantContext.tenantId}",
                     "sk": f"AGENT#{agentId}"
                 }
             )
 
-            cacheKey = f"{tenantContext.tenantId}:{agentId}"
-            if cacheKey in self._cache:
-                del self._cache[cacheKey]
+            self._invalidate(tenantContext.tenantId, agentId)
 
             logger.info("agent_deleted", agentId=agentId)
             return True
@@ -229,14 +405,40 @@ class AgentRegistry:
             toolIds=item.get("toolIds", []),
             tenantContext=tenantContext,
             isAsync=item.get("isAsync", False),
+            parallelToolExecution=item.get("parallelToolExecution", True),
             timeoutSeconds=int(item.get("timeoutSeconds", 300)),
             customSettings=item.get("customSettings", {}),
             createdAt=datetime.fromisoformat(item["createdAt"]),
             updatedAt=datetime.fromisoformat(item["updatedAt"])
         )
 
+    def _cacheByType(self, agent: AgentConfig, replace: bool = False):
+        typeKey = (agent.tenantContext.tenantId, agent.type.value)
+        if replace or typeKey not in self._typeCache:
+            self._typeCache.set(typeKey, agent)
+
+    def _refresh(self, agent: AgentConfig):
+        tenantId = agent.tenantContext.tenantId
+        self._cache.set((tenantId, agent.id), agent)
+
+        for typeKey, cached in self._typeCache.items():
+            if typeKey[0] == tenantId and cached.id == agent.id:
+                self._typeCache.pop(typeKey)
+        self._cacheByType(agent)
+
+    def _invalidate(self, tenantId: str, agentId: str):
+        self._cache.pop((tenantId, agentId))
+
+        staleKeys = [
+            typeKey for typeKey, agent in self._typeCache.items()
+            if typeKey[0] == tenantId and agent.id == agentId
+        ]
+        for typeKey in staleKeys:
+            self._typeCache.pop(typeKey)
+
     def clearCache(self):
         self._cache.clear()
+        self._typeCache.clear()
         logger.info("agent_registry_cache_cleared")
 
 
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -5,6 +6,11 @@ from contextlib import asynccontextmanager
 from config.settings import settings
 from utils.logger import setupLogger, getLogger
 from utils.exceptions import ACEException
+from utils.awsClients import asyncDynamoTables
+from core.bedrockClient import bedrockClient
+from core.asyncAgentExecutor import asyncAgentExecutor
+from memory.semanticMemory.vectorStore import vectorStore
+from memory.memoryManager import memoryManager
 from api.routes import agentRoutes, toolRoutes, memoryRoutes
 
 setupLogger()
@@ -14,7 +20,17 @@ logger = getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("ace_framework_starting", version=settings.app.version)
+    await asyncio.gather(
+        bedrockClient.warmup(),
+        asyncAgentExecutor.warmup(),
+        vectorStore.warmup(),
+        memoryManager.warmup()
+    )
     yield
+    await asyncAgentExecutor.close()
+    await bedrockClient.close()
+    await memoryManager.close()
+    await asyncDynamoTables.close()
     logger.info("ace_framework_shutdown")
 
 
@@ -27,10 +43,11 @@ app = FastAPI(
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.cors.originList,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=settings.cors.maxAge,
 )
 
 app.include_router(agentRoutes.router, prefix="/api/v1")
@@ -85,10 +102,13 @@ async def root():
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
     uvicorn.run(
         "api.main:app",
         host="0.0.0.0",
         port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         reload=settings.app.environment == "development"
     )
@@ -1,3 +1,5 @@
+import hashlib
+import re
 import traceback
 from typing import Callable, Dict, Any, List
 
@@ -5,15 +7,28 @@ import jwt
 from fastapi import Request, HTTPException, status
 
 from schemas import TenantContext
+from utils.cache import LRUCache
 from utils.logger import getLogger
 
 logger = getLogger(__name__)
 
+TENANT_CONTEXT_CACHE_MAX_SIZE = 10_000
+TENANT_CONTEXT_CACHE_TTL_SECONDS = 300
+
+# (token digest, subdomain) -> (TenantContext, userInfo)
+_tenantContextCache = LRUCache(TENANT_CONTEXT_CACHE_MAX_SIZE, TENANT_CONTEXT_CACHE_TTL_SECONDS)
+
+SUBDOMAIN_PATTERN = re.compile(r"^(?:https?://)?([^/.]*)\.[^/.]*\.[^/.]*\.[^/.]*(?:/|$)")
+
 
 async def getUserAndRole(request: Request) -> Dict[str, Any]:
     """
     Decode the incoming Cognito JWT and derive the primary role and all groups.
     """
+    cached = getattr(request.state, "userInfo", None)
+    if cached is not None:
+        return cached
+
     try:
         token = request.headers.get("Authorization")
         if not token:
@@ -40,11 +55,13 @@ async def getUserAndRole(request: Request) -> Dict[str, Any]:
         elif "Readonly" in groups:
             group = "READONLY"
 
-        return {
+        userInfo = {
             "user": username,
             "group": group,
             "allGroups": groups
         }
+        request.state.userInfo = userInfo
+        return userInfo
     except HTTPException:
         raise
     except Exception as exc:
@@ -60,6 +77,10 @@ def getSubdomain(request: Request) -> str:
     Extract the tenant subdomain from Origin/Referer headers or gz-site fallback.
     """
     methodName = "middleware.getSubdomain"
+    cached = getattr(request.state, "subdomain", None)
+    if cached is not None:
+        return cached
+
     try:
         origin = request.headers.get("origin")
         if origin is None:
@@ -67,16 +88,15 @@ def getSubdomain(request: Request) -> str:
             if referer:
                 origin = referer
             else:
-                return request.headers.get("gz-site", "")
-
-        origin = origin.replace("http://", "").replace("https://", "")
-        origin = origin.split("/")[0]
-        parts = origin.split(".")
+                subdomain = request.headers.get("gz-site", "")
+                request.state.subdomain = subdomain
+                return subdomain
 
-        if len(parts) == 4:
-            return parts[0]
+        match = SUBDOMAIN_PATTERN.match(origin)
+        subdomain = match.group(1) if match else ""
 
-        return ""
+        request.state.subdomain = subdomain
+        return subdomain
     except Exception as exc:
         stack = traceback.format_exc()
         logger.error(
@@ -92,25 +112,35 @@ def getSubdomain(request: Request) -> str:
 
 
 async def extractTenantContext(request: Request) -> TenantContext:
-    user_info = await getUserAndRole(request)
+    token = request.headers.get("Authorization")
     subdomain = getSubdomain(request)
 
-    if not subdomain:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Unable to determine tenant subdomain"
-        )
+    cacheKey = (hashlib.sha256(token.encode()).hexdigest(), subdomain) if token and subdomain else None
+    cached = _tenantContextCache.get(cacheKey) if cacheKey else None
+
+    if cached:
+        tenantContext, user_info = cached
+        request.state.userInfo = user_info
+    else:
+        user_info = await getUserAndRole(request)
+
+        if not subdomain:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unable to determine tenant subdomain"
+            )
 
-    roles = user_info["allGroups"]
-    permissions: List[str] = []
+        roles = user_info["allGroups"]
+        permissions: List[str] = []
 
-    tenantContext = TenantContext(
-        tenantId=subdomain,
-        userId=user_info["user"],
-        orgId=None,
-        roles=[role for role in roles if role],
-        permissions=permissions
-    )
+        tenantContext = TenantContext(
+            tenantId=subdomain,
+            userId=user_info["user"],
+            orgId=None,
+            roles=[role for role in roles if role],
+            permissions=permissions
+        )
+        _tenantContextCache.set(cacheKey, (tenantContext, user_info))
 
     request.state.subdomain = subdomain
     request.state.username = user_info["user"]
@@ -1,16 +1,21 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from schemas import AgentType, ToolPermission
 
 
-class ExecuteAgentRequest(BaseModel):
+class RequestModel(BaseModel):
+    """Base for API request bodies; validated once by FastAPI and never mutated"""
+    model_config = ConfigDict(frozen=True)
+
+
+class ExecuteAgentRequest(RequestModel):
     agentId: str
     userMessage: str
     sessionId: str
     stream: bool = False
 
 
-class CreateAgentRequest(BaseModel):
+class CreateAgentRequest(RequestModel):
     name: str
     type: AgentType
     description: str
@@ -19,22 +24,24 @@ class CreateAgentRequest(BaseModel):
     maxTokens: int = Field(default=4096, gt=0)
     toolIds: List[str] = Field(default_factory=list)
     isAsync: bool = False
+    parallelToolExecution: bool = True
     timeoutSeconds: int = 300
     customSettings: Dict[str, Any] = Field(default_factory=dict)
 
 
-class UpdateAgentRequest(BaseModel):
+class UpdateAgentRequest(RequestModel):
     name: Optional[str] = None
     description: Optional[str] = None
     systemPrompt: Optional[str] = None
     temperature: Optional[float] = None
     maxTokens: Optional[int] = None
     toolIds: Optional[List[str]] = None
+    parallelToolExecution: Optional[bool] = None
     timeoutSeconds: Optional[int] = None
     customSettings: Optional[Dict[str, Any]] = None
 
 
-class RegisterToolRequest(BaseModel):
+class RegisterToolRequest(RequestModel):
     name: str
     version: str = "1.0.0"
     description: str
@@ -46,19 +53,19 @@ class RegisterToolRequest(BaseModel):
     requiresAuth: bool = True
 
 
-class OrchestrateRequest(BaseModel):
+class OrchestrateRequest(RequestModel):
     userRequest: str
     sessionId: str
 
 
-class AsyncTaskRequest(BaseModel):
+class AsyncTaskRequest(RequestModel):
     agentId: str
     userMessage: str
     sessionId: str
     callbackUrl: Optional[str] = None
 
 
-class StoreFactRequest(BaseModel):
+class StoreFactRequest(RequestModel):
     fact: str
     sessionId: str
     importance: float = 0.7
@@ -66,7 +73,7 @@ class StoreFactRequest(BaseModel):
     relatedEntities: Optional[List[str]] = None
 
 
-class SearchMemoryRequest(BaseModel):
+class SearchMemoryRequest(RequestModel):
     query: str
     sessionId: Optional[str] = None
     limit: int = 10
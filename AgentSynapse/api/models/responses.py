@@ -0,0 +1,68 @@
+from operator import attrgetter
+from typing import Any, AsyncIterator, Callable, Tuple
+import orjson
+from fastapi.responses import ORJSONResponse
+from utils.serialization import orjsonDefault
+
+
+class FastJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also serializes Decimal values read back from DynamoDB
+
+    Returning this directly from a route skips FastAPI's jsonable_encoder pass;
+    datetimes and enums are handled natively by orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=orjsonDefault,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+async def streamJsonArray(key: str, items: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """Encode {key: [...]} incrementally so only one item is buffered at a time"""
+    yield b"{" + orjson.dumps(key) + b":["
+
+    first = True
+    async for item in items:
+        if not first:
+            yield b","
+        yield orjson.dumps(item, default=orjsonDefault)
+        first = False
+
+    yield b"]}"
+
+
+# Per-model projections shared by list and detail routes. Each one is built
+# once from a field tuple so a row costs one attrgetter call and a zip, and
+# values stay native (datetime, enum) for orjson to encode in one pass.
+
+def buildProjector(fields: Tuple[str, ...]) -> Callable[[Any], dict]:
+    getter = attrgetter(*fields)
+
+    def project(obj: Any) -> dict:
+        return dict(zip(fields, getter(obj)))
+
+    return project
+
+
+AGENT_SUMMARY_FIELDS = ("id", "name", "type", "description", "isAsync", "createdAt")
+AGENT_DETAIL_FIELDS = (
+    "id", "name", "type", "description", "systemPrompt", "temperature", "maxTokens",
+    "toolIds", "isAsync", "parallelToolExecution", "timeoutSeconds", "customSettings", "createdAt", "updatedAt"
+)
+TOOL_SUMMARY_FIELDS = ("id", "name", "version", "description", "permission", "isActive", "createdAt")
+TOOL_DETAIL_FIELDS = (
+    "id", "name", "version", "description", "inputSchema", "outputSchema", "permission",
+    "isActive", "requiresAuth", "createdAt", "updatedAt"
+)
+SEMANTIC_MEMORY_SUMMARY_FIELDS = ("id", "content", "importance", "confidenceScore", "tags", "createdAt")
+EPISODIC_MEMORY_SUMMARY_FIELDS = ("id", "content", "outcome", "toolsUsed", "importance", "createdAt")
+
+agentSummary = buildProjector(AGENT_SUMMARY_FIELDS)
+agentDetail = buildProjector(AGENT_DETAIL_FIELDS)
+toolSummary = buildProjector(TOOL_SUMMARY_FIELDS)
+toolDetail = buildProjector(TOOL_DETAIL_FIELDS)
+semanticMemorySummary = buildProjector(SEMANTIC_MEMORY_SUMMARY_FIELDS)
+episodicMemorySummary = buildProjector(EPISODIC_MEMORY_SUMMARY_FIELDS)
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import hashlib
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.responses import StreamingResponse
-import json
+import orjson
 from api.middleware.authMiddleware import extractTenantContext
+from api.models.responses import FastJSONResponse, streamJsonArray, agentSummary, agentDetail
 from api.models.requests import (
     ExecuteAgentRequest,
     CreateAgentRequest,
@@ -9,26 +14,76 @@ from api.models.requests import (
     OrchestrateRequest,
     AsyncTaskRequest
 )
-from schemas import TenantContext, AgentConfig, AgentType
+from schemas import TenantContext, AgentConfig, AgentType, AgentStatus
 from core.agentEngine import agentEngine
 from agents.registry.agentRegistry import agentRegistry
 from agents.orchestrator.agentOrchestrator import agentOrchestrator
 from core.asyncAgentExecutor import asyncAgentExecutor
-from utils.exceptions import AgentNotFound
+from config.settings import settings
+from memory.workingMemory.redisMemory import redisWorkingMemory
 from utils.logger import getLogger
 
 logger = getLogger(__name__)
-router = APIRouter(prefix="/agents", tags=["agents"])
+router = APIRouter(prefix="/agents", tags=["agents"], default_response_class=FastJSONResponse)
 
+SSE_KEEPALIVE_SECONDS = 15
+SSE_KEEPALIVE_FRAME = b": keepalive\n\n"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
 
-@router.post("/execute")
+
+@lru_cache(maxsize=64)
+def parseAgentType(agentType: Optional[str]) -> Optional[AgentType]:
+    return AgentType(agentType) if agentType else None
+
+
+def executionCacheKey(
+    tenantId: str,
+    userId: str,
+    agent: AgentConfig,
+    sessionId: str,
+    userMessage: str
+) -> str:
+    """Scope cached responses to the caller and to the agent revision that produced them"""
+    digest = hashlib.sha256(
+        f"{tenantId}|{userId}|{agent.id}|{agent.updatedAt.isoformat()}|{sessionId}|{userMessage.strip()}".encode()
+    ).hexdigest()
+    return f"ace:exec:{digest}"
+
+
+async def withKeepalive(frames: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Interleave SSE comment frames while the source is idle so proxies keep the stream open"""
+    iterator = frames.__aiter__()
+    pending = asyncio.ensure_future(iterator.__anext__())
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=SSE_KEEPALIVE_SECONDS)
+            if not done:
+                yield SSE_KEEPALIVE_FRAME
+                continue
+
+            try:
+                frame = pending.result()
+            except StopAsyncIteration:
+                return
+
+            yield frame
+            pending = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        pending.cancel()
+
+
+@router.post("/execute", response_model=None)
 async def executeAgent(
     request: ExecuteAgentRequest,
-    tenantContext: TenantContext = Depends(extractTenantContext)
+    tenantContext: TenantContext = Depends(extractTenantContext),
+    cacheBypass: bool = Header(default=False, alias="X-Cache-Bypass")
 ):
-    try:
-        agent = await agentRegistry.get(request.agentId, tenantContext)
-    except AgentNotFound:
+    agent = await agentRegistry.tryGet(request.agentId, tenantContext)
+    if agent is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Agent {request.agentId} not found"
@@ -37,25 +92,46 @@ async def executeAgent(
     authToken = None
 
     if request.stream:
-        async def generateStream():
+        async def generateStream() -> AsyncIterator[bytes]:
             async for chunk in agentEngine.executeStreaming(
                 agent,
                 request.userMessage,
                 request.sessionId,
                 authToken
             ):
-                yield f"data: {json.dumps(chunk)}\n\n"
+                yield b"data: " + orjson.dumps(chunk, option=orjson.OPT_NON_STR_KEYS) + b"\n\n"
+
+        return StreamingResponse(
+            withKeepalive(generateStream()),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+
+    cacheEnabled = settings.agent.executionCacheTtl > 0 and not cacheBypass
+    cacheKey = executionCacheKey(
+        tenantContext.tenantId,
+        tenantContext.userId,
+        agent,
+        request.sessionId,
+        request.userMessage
+    )
 
-        return StreamingResponse(generateStream(), media_type="text/event-stream")
+    if cacheEnabled:
+        cached = await redisWorkingMemory.getCachedResult(cacheKey)
+        if cached is not None:
+            logger.info("execution_cache_hit", agentId=request.agentId)
+            return FastJSONResponse(cached, headers={"X-Cache": "HIT"})
+        logger.info("execution_cache_miss", agentId=request.agentId)
 
     execution = await agentEngine.execute(
         agent,
         request.userMessage,
         request.sessionId,
-        authToken
+        authToken,
+        useCache=not cacheBypass
     )
 
-    return {
+    result = {
         "executionId": execution.id,
         "status": execution.status.value,
         "response": execution.agentResponse,
@@ -64,8 +140,17 @@ async def executeAgent(
         "executionTimeMs": execution.executionTimeMs
     }
 
+    if cacheEnabled and execution.status == AgentStatus.COMPLETED and not execution.toolCalls:
+        await redisWorkingMemory.setCachedResult(
+            cacheKey,
+            result,
+            settings.agent.executionCacheTtl
+        )
+
+    return FastJSONResponse(result, headers={"X-Cache": "MISS" if cacheEnabled else "BYPASS"})
 
-@router.post("/orchestrate")
+
+@router.post("/orchestrate", response_model=None)
 async def orchestrate(
     request: OrchestrateRequest,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -79,7 +164,7 @@ async def orchestrate(
     return result
 
 
-@router.post("/async/submit")
+@router.post("/async/submit", response_model=None)
 async def submitAsyncTask(
     request: AsyncTaskRequest,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -99,7 +184,7 @@ async def submitAsyncTask(
     }
 
 
-@router.get("/async/status/{taskId}")
+@router.get("/async/status/{taskId}", response_model=None)
 async def getAsyncTaskStatus(
     taskId: str,
     sessionId: str,
@@ -117,10 +202,10 @@ async def getAsyncTaskStatus(
             detail=f"Task {taskId} not found"
         )
 
-    return taskStatus
+    return FastJSONResponse(taskStatus)
 
 
-@router.post("/create")
+@router.post("/create", response_model=None)
 async def createAgent(
     request: CreateAgentRequest,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -135,6 +220,7 @@ async def createAgent(
         toolIds=request.toolIds,
         tenantContext=tenantContext,
         isAsync=request.isAsync,
+        parallelToolExecution=request.parallelToolExecution,
         timeoutSeconds=request.timeoutSeconds,
         customSettings=request.customSettings
     )
@@ -147,67 +233,43 @@ async def createAgent(
     }
 
 
-@router.get("/list")
+@router.get("/list", response_model=None)
 async def listAgents(
     agentType: str = None,
     tenantContext: TenantContext = Depends(extractTenantContext)
 ):
-    agentTypeEnum = AgentType(agentType) if agentType else None
+    agentTypeEnum = parseAgentType(agentType)
 
-    agents = await agentRegistry.list(tenantContext, agentTypeEnum)
+    agents = (
+        agentSummary(agent)
+        async for agent in agentRegistry.listStream(tenantContext, agentTypeEnum)
+    )
 
-    return {
-        "agents": [
-            {
-                "id": agent.id,
-                "name": agent.name,
-                "type": agent.type.value,
-                "description": agent.description,
-                "isAsync": agent.isAsync,
-                "createdAt": agent.createdAt.isoformat()
-            }
-            for agent in agents
-        ]
-    }
+    return StreamingResponse(streamJsonArray("agents", agents), media_type="application/json")
 
 
-@router.get("/{agentId}")
+@router.get("/{agentId}", response_model=None)
 async def getAgent(
     agentId: str,
     tenantContext: TenantContext = Depends(extractTenantContext)
 ):
-    try:
-        agent = await agentRegistry.get(agentId, tenantContext)
-    except AgentNotFound:
+    agent = await agentRegistry.tryGet(agentId, tenantContext)
+    if agent is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Agent {agentId} not found"
         )
 
-    return {
-        "id": agent.id,
-        "name": agent.name,
-        "type": agent.type.value,
-        "description": agent.description,
-        "systemPrompt": agent.systemPrompt,
-        "temperature": agent.temperature,
-        "maxTokens": agent.maxTokens,
-        "toolIds": agent.toolIds,
-        "isAsync": agent.isAsync,
-        "timeoutSeconds": agent.timeoutSeconds,
-        "customSettings": agent.customSettings,
-        "createdAt": agent.createdAt.isoformat(),
-        "updatedAt": agent.updatedAt.isoformat()
-    }
+    return FastJSONResponse(agentDetail(agent))
 
 
-@router.put("/{agentId}")
+@router.put("/{agentId}", response_model=None)
 async def updateAgent(
     agentId: str,
     request: UpdateAgentRequest,
     tenantContext: TenantContext = Depends(extractTenantContext)
 ):
-    updates = request.dict(exclude_unset=True)
+    updates = {field: getattr(request, field) for field in request.model_fields_set}
 
     success = await agentRegistry.update(agentId, updates, tenantContext)
 
@@ -223,7 +285,7 @@ async def updateAgent(
     }
 
 
-@router.delete("/{agentId}")
+@router.delete("/{agentId}", response_model=None)
 async def deleteAgent(
     agentId: str,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -1,15 +1,29 @@
+import hashlib
 from fastapi import APIRouter, Depends, HTTPException, status
 from api.middleware.authMiddleware import extractTenantContext
+from api.models.responses import FastJSONResponse, semanticMemorySummary, episodicMemorySummary
 from api.models.requests import StoreFactRequest, SearchMemoryRequest
 from schemas import TenantContext, MemorySource
 from memory.memoryManager import memoryManager
+from config.settings import settings
+from utils.cache import SemanticCache
 from utils.logger import getLogger
 
 logger = getLogger(__name__)
-router = APIRouter(prefix="/memory", tags=["memory"])
+router = APIRouter(prefix="/memory", tags=["memory"], default_response_class=FastJSONResponse)
 
+searchCache = SemanticCache(
+    threshold=settings.agent.semanticCacheThreshold,
+    ttlSeconds=settings.agent.semanticCacheTtl
+)
 
-@router.post("/fact/store")
+
+def invalidateSearchCache(tenantContext: TenantContext):
+    """Drop cached searches for every session and limit of the caller after a memory write"""
+    searchCache.invalidateScope((tenantContext.tenantId, tenantContext.userId))
+
+
+@router.post("/fact/store", response_model=None)
 async def storeFact(
     request: StoreFactRequest,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -23,6 +37,7 @@ async def storeFact(
         tags=request.tags,
         relatedEntities=request.relatedEntities
     )
+    invalidateSearchCache(tenantContext)
 
     return {
         "factId": factId,
@@ -30,7 +45,7 @@ async def storeFact(
     }
 
 
-@router.post("/search")
+@router.post("/search", response_model=None)
 async def searchMemory(
     request: SearchMemoryRequest,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -40,26 +55,34 @@ async def searchMemory(
         if request.sessionId:
             filters["sessionId"] = request.sessionId
 
+        queryEmbedding = None
+        cacheScope = (tenantContext.tenantId, tenantContext.userId, request.sessionId, request.limit)
+
+        if settings.agent.semanticCacheEnabled:
+            queryEmbedding = await memoryManager.semanticMemory.embed(request.query)
+            cached = searchCache.get(cacheScope, queryEmbedding)
+            if cached is not None:
+                return FastJSONResponse(cached, headers={"X-Cache": "HIT"})
+
         memories = await memoryManager.semanticMemory.search(
             tenantContext,
             request.query,
             limit=request.limit,
-            filters=filters
+            filters=filters,
+            queryEmbedding=queryEmbedding
         )
 
-        return {
-            "memories": [
-                {
-                    "id": mem.id,
-                    "content": mem.content,
-                    "importance": mem.importance,
-                    "confidenceScore": mem.confidenceScore,
-                    "tags": mem.tags,
-                    "createdAt": mem.createdAt.isoformat()
-                }
-                for mem in memories
-            ]
-        }
+        result = {"memories": [semanticMemorySummary(mem) for mem in memories]}
+
+        if queryEmbedding is not None:
+            searchCache.set(
+                cacheScope,
+                hashlib.sha256(request.query.encode()).hexdigest(),
+                queryEmbedding,
+                result
+            )
+
+        return FastJSONResponse(result)
 
     elif request.memoryType == "episodic":
         filters = {}
@@ -73,19 +96,7 @@ async def searchMemory(
             filters=filters
         )
 
-        return {
-            "memories": [
-                {
-                    "id": mem.id,
-                    "content": mem.content,
-                    "outcome": mem.outcome,
-                    "toolsUsed": mem.toolsUsed,
-                    "importance": mem.importance,
-                    "createdAt": mem.createdAt.isoformat()
-                }
-                for mem in memories
-            ]
-        }
+        return FastJSONResponse({"memories": [episodicMemorySummary(mem) for mem in memories]})
 
     else:
         raise HTTPException(
@@ -94,7 +105,7 @@ async def searchMemory(
         )
 
 
-@router.get("/context/{sessionId}")
+@router.get("/context/{sessionId}", response_model=None)
 async def getContext(
     sessionId: str,
     query: str = "",
@@ -108,13 +119,13 @@ async def getContext(
         maxTokens=maxTokens
     )
 
-    return {
+    return FastJSONResponse({
         "context": context,
         "totalTokens": context["totalTokens"]
-    }
+    })
 
 
-@router.post("/consolidate/{sessionId}")
+@router.post("/consolidate/{sessionId}", response_model=None)
 async def consolidateMemories(
     sessionId: str,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -123,6 +134,7 @@ async def consolidateMemories(
         tenantContext,
         sessionId
     )
+    invalidateSearchCache(tenantContext)
 
     return {
         "consolidated": result["consolidated"],
@@ -131,7 +143,7 @@ async def consolidateMemories(
     }
 
 
-@router.delete("/session/{sessionId}")
+@router.delete("/session/{sessionId}", response_model=None)
 async def clearSession(
     sessionId: str,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -140,6 +152,7 @@ async def clearSession(
         tenantContext,
         sessionId
     )
+    invalidateSearchCache(tenantContext)
 
     return {
         "sessionId": sessionId,
@@ -1,17 +1,24 @@
+from functools import lru_cache
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from api.middleware.authMiddleware import extractTenantContext
+from api.models.responses import FastJSONResponse, streamJsonArray, toolSummary, toolDetail
 from api.models.requests import RegisterToolRequest
 from schemas import TenantContext, ToolDefinition, ToolPermission
 from tools.registry.toolRegistry import toolRegistry
 from utils.logger import getLogger
-from utils.exceptions import ToolNotFound
 
 logger = getLogger(__name__)
-router = APIRouter(prefix="/tools", tags=["tools"])
+router = APIRouter(prefix="/tools", tags=["tools"], default_response_class=FastJSONResponse)
 
 
-@router.post("/register")
+@lru_cache(maxsize=64)
+def parseToolPermission(permission: Optional[str]) -> Optional[ToolPermission]:
+    return ToolPermission(permission) if permission else None
+
+
+@router.post("/register", response_model=None)
 async def registerTool(
     request: RegisterToolRequest,
     tenantContext: TenantContext = Depends(extractTenantContext)
@@ -39,61 +46,38 @@ async def registerTool(
     }
 
 
-@router.get("/list")
+@router.get("/list", response_model=None)
 async def listTools(
     permission: Optional[str] = None,
     tenantContext: TenantContext = Depends(extractTenantContext)
 ):
-    permissionEnum = ToolPermission(permission) if permission else None
+    permissionEnum = parseToolPermission(permission)
 
-    tools = await toolRegistry.list(tenantContext, permissionEnum)
+    tools = (
+        toolSummary(tool)
+        async for tool in toolRegistry.listStream(tenantContext, permissionEnum)
+    )
 
-    return {
-        "tools": [
-            {
-                "id": tool.id,
-                "name": tool.name,
-                "version": tool.version,
-                "description": tool.description,
-                "permission": tool.permission.value,
-                "isActive": tool.isActive,
-                "createdAt": tool.createdAt.isoformat()
-            }
-            for tool in tools
-        ]
-    }
+    return StreamingResponse(streamJsonArray("tools", tools), media_type="application/json")
 
 
-@router.get("/{toolName}")
+@router.get("/{toolName}", response_model=None)
 async def getTool(
     toolName: str,
     version: str = "1.0.0",
     tenantContext: TenantContext = Depends(extractTenantContext)
 ):
-    try:
-        tool = await toolRegistry.get(toolName, tenantContext, version)
-    except ToolNotFound:
+    tool = await toolRegistry.tryGet(toolName, tenantContext, version)
+    if tool is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Tool {toolName} (v{version}) not found"
         )
 
-    return {
-        "id": tool.id,
-        "name": tool.name,
-        "version": tool.version,
-        "description": tool.description,
-        "inputSchema": tool.inputSchema,
-        "outputSchema": tool.outputSchema,
-        "permission": tool.permission.value,
-        "isActive": tool.isActive,
-        "requiresAuth": tool.requiresAuth,
-        "createdAt": tool.createdAt.isoformat(),
-        "updatedAt": tool.updatedAt.isoformat()
-    }
+    return FastJSONResponse(toolDetail(tool))
 
 
-@router.post("/{toolName}/deactivate")
+@router.post("/{toolName}/deactivate", response_model=None)
 async def deactivateTool(
     toolName: str,
     version: str = "1.0.0",
@@ -114,7 +98,7 @@ async def deactivateTool(
     }
 
 
-@router.get("/{toolName}/versions")
+@router.get("/{toolName}/versions", response_model=None)
 async def getToolVersions(
     toolName: str,
     includePublic: bool = True,
@@ -131,7 +115,7 @@ async def getToolVersions(
     return history
 
 
-@router.get("/{toolName}/next-version")
+@router.get("/{toolName}/next-version", response_model=None)
 async def getNextToolVersion(
     toolName: str,
     releaseType: str = "patch",
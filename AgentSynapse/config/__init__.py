@@ -1,3 +1,9 @@
-from .settings import settings
+from .settings import Settings, getSettings
 
-__all__ = ["settings"]
+__all__ = ["settings", "Settings", "getSettings"]
+
+
+def __getattr__(name: str):
+    if name == "settings":
+        return getSettings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
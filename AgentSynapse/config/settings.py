@@ -3,10 +3,13 @@ ACE Framework Configuration Settings
 Centralized configuration management using Pydantic Settings
 """
 
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+ENV_SETTINGS_CONFIG = SettingsConfigDict(env_file=".env", extra="ignore")
+
 
 class AWSSettings(BaseSettings):
     """AWS Service Configuration"""
@@ -18,8 +21,9 @@ class AWSSettings(BaseSettings):
         default="arn:aws:bedrock:us-east-1::inference-profile/us.anthropic.claude-sonnet-4-5-20250929-v1:0",
         alias="AWS_BEDROCK_MODEL_ID"
     )
+    enablePromptCaching: bool = Field(default=True, alias="BEDROCK_ENABLE_PROMPT_CACHING")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class RedisSettings(BaseSettings):
@@ -30,7 +34,7 @@ class RedisSettings(BaseSettings):
     db: int = Field(default=0, alias="REDIS_DB")
     password: Optional[str] = Field(default=None, alias="REDIS_PASSWORD")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class DynamoDBSettings(BaseSettings):
@@ -42,7 +46,7 @@ class DynamoDBSettings(BaseSettings):
     tableSessions: str = Field(default="aceAgentSessions", alias="DYNAMODB_TABLE_SESSIONS")
     endpointUrl: Optional[str] = Field(default=None, alias="DYNAMODB_ENDPOINT_URL")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class OpenSearchSettings(BaseSettings):
@@ -51,7 +55,7 @@ class OpenSearchSettings(BaseSettings):
     endpoint: str = Field(alias="OPENSEARCH_ENDPOINT")
     indexSemantic: str = Field(default="ace-semantic-memory", alias="OPENSEARCH_INDEX_SEMANTIC")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class RDSSettings(BaseSettings):
@@ -63,7 +67,7 @@ class RDSSettings(BaseSettings):
     username: str = Field(alias="RDS_USERNAME")
     password: str = Field(alias="RDS_PASSWORD")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class S3Settings(BaseSettings):
@@ -72,7 +76,7 @@ class S3Settings(BaseSettings):
     bucketProcedural: str = Field(default="ace-procedural-memory", alias="S3_BUCKET_PROCEDURAL")
     bucketToolCode: str = Field(default="ace-tool-code", alias="S3_BUCKET_TOOL_CODE")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class AgentSettings(BaseSettings):
@@ -83,8 +87,12 @@ class AgentSettings(BaseSettings):
     timeoutSeconds: int = Field(default=300, alias="AGENT_TIMEOUT_SECONDS")
     maxTokenLimit: int = Field(default=100000, alias="MAX_TOKEN_LIMIT")
     defaultTemperature: float = Field(default=0.7, alias="DEFAULT_TEMPERATURE")
+    executionCacheTtl: int = Field(default=0, alias="EXECUTION_CACHE_TTL_SECONDS")
+    semanticCacheEnabled: bool = Field(default=False, alias="SEMANTIC_CACHE_ENABLED")
+    semanticCacheThreshold: float = Field(default=0.92, alias="SEMANTIC_CACHE_THRESHOLD")
+    semanticCacheTtl: int = Field(default=300, alias="SEMANTIC_CACHE_TTL_SECONDS")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class MemorySettings(BaseSettings):
@@ -95,8 +103,9 @@ class MemorySettings(BaseSettings):
     decayThresholdDays: int = Field(default=7, alias="MEMORY_DECAY_THRESHOLD_DAYS")
     maxContextTokens: int = Field(default=200000, alias="MAX_CONTEXT_TOKENS")
     topKSemanticRetrieval: int = Field(default=10, alias="TOP_K_SEMANTIC_RETRIEVAL")
+    maxConsolidationContentChars: int = Field(default=2000, alias="MAX_CONSOLIDATION_CONTENT_CHARS")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class MultiTenantSettings(BaseSettings):
@@ -106,7 +115,7 @@ class MultiTenantSettings(BaseSettings):
     defaultCostLimit: float = Field(default=100.0, alias="DEFAULT_COST_LIMIT_USD")
     enableAuditLogging: bool = Field(default=True, alias="ENABLE_AUDIT_LOGGING")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class AsyncAgentSettings(BaseSettings):
@@ -114,8 +123,9 @@ class AsyncAgentSettings(BaseSettings):
 
     sqsQueue: str = Field(default="ace-async-agents", alias="SQS_QUEUE_ASYNC_AGENTS")
     visibilityTimeout: int = Field(default=900, alias="SQS_VISIBILITY_TIMEOUT")
+    trackRunningState: bool = Field(default=True, alias="ASYNC_TRACK_RUNNING_STATE")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class AppSettings(BaseSettings):
@@ -126,7 +136,20 @@ class AppSettings(BaseSettings):
     environment: str = Field(default="development", alias="ENVIRONMENT")
     logLevel: str = Field(default="INFO", alias="LOG_LEVEL")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
+
+
+class CORSSettings(BaseSettings):
+    """CORS Configuration"""
+
+    allowedOrigins: str = Field(default="http://localhost:3000", alias="CORS_ALLOWED_ORIGINS")
+    maxAge: int = Field(default=86400, alias="CORS_MAX_AGE_SECONDS")
+
+    model_config = ENV_SETTINGS_CONFIG
+
+    @property
+    def originList(self) -> List[str]:
+        return [origin.strip() for origin in self.allowedOrigins.split(",") if origin.strip()]
 
 
 class MonitoringSettings(BaseSettings):
@@ -136,7 +159,7 @@ class MonitoringSettings(BaseSettings):
     enableCloudWatchMetrics: bool = Field(default=True, alias="ENABLE_CLOUDWATCH_METRICS")
     metricsNamespace: str = Field(default="ACE/Agents", alias="METRICS_NAMESPACE")
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = ENV_SETTINGS_CONFIG
 
 
 class Settings:
@@ -154,8 +177,19 @@ class Settings:
         self.memory = MemorySettings()
         self.multiTenant = MultiTenantSettings()
         self.asyncAgent = AsyncAgentSettings()
+        self.cors = CORSSettings()
         self.monitoring = MonitoringSettings()
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def getSettings() -> Settings:
+    """Build the process-wide Settings on first use"""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # `from config.settings import settings` resolves lazily, so importing this
+    # module no longer parses .env and validates every section up front
+    if name == "settings":
+        return getSettings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,11 @@
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Any, List, Optional, Set, Tuple
 from config.settings import settings
 from utils.logger import getLogger
+from utils.cache import SemanticCache
 from utils.exceptions import (
     AgentExecutionError,
     RecursionDepthExceeded,
@@ -19,6 +23,14 @@ from tools.executor.toolExecutor import toolExecutor
 
 logger = getLogger(__name__)
 
+RETRIEVAL_MIN_MESSAGE_CHARS = 12
+
+TRIVIAL_MESSAGES = frozenset({
+    "hi", "hello", "hey", "yo", "thanks", "thank you", "thx", "ty", "ok", "okay",
+    "cool", "great", "got it", "bye", "goodbye", "good morning", "good afternoon",
+    "good evening", "yes", "no", "sure"
+})
+
 
 class AgentEngine:
     def __init__(self):
@@ -26,7 +38,12 @@ class AgentEngine:
         self.memory = memoryManager
         self.toolRegistry = toolRegistry
         self.toolExecutor = toolExecutor
-        self._activeExecutions = {}
+        self._activeExecutions: Dict[str, AgentExecution] = {}
+        self._activeByTenant: Dict[str, Set[str]] = defaultdict(set)
+        self._responseCache = SemanticCache(
+            threshold=settings.agent.semanticCacheThreshold,
+            ttlSeconds=settings.agent.semanticCacheTtl
+        )
 
     async def execute(
         self,
@@ -35,7 +52,8 @@ class AgentEngine:
         sessionId: str,
         authToken: Optional[str] = None,
         parentExecutionId: Optional[str] = None,
-        depth: int = 0
+        depth: int = 0,
+        useCache: bool = True
     ) -> AgentExecution:
         if depth >= settings.agent.maxRecursionDepth:
             raise RecursionDepthExceeded(depth, settings.agent.maxRecursionDepth)
@@ -50,154 +68,43 @@ class AgentEngine:
             depth=depth
         )
 
-        self._activeExecutions[execution.id] = execution
-        startTime = datetime.utcnow()
+        self._trackExecution(execution)
+        startNs = time.perf_counter_ns()
 
         try:
-            tools = await self.toolRegistry.getToolsForAgent(
-                agentConfig.toolIds,
-                agentConfig.tenantContext
-            )
-
-            logger.info(
-                "tools_loaded_for_agent",
-                agentId=agentConfig.id,
-                toolCount=len(tools),
-                toolNames=[t.name for t in tools]
-            )
-
-            bedrockTools = [self.toolExecutor.formatForBedrock(t) for t in tools]
-
-            if bedrockTools:
-                logger.info(
-                    "tools_formatted_for_bedrock",
-                    toolCount=len(bedrockTools),
-                    toolNames=[t['name'] for t in bedrockTools]
-                )
-
-            context = await self.memory.retrieveContext(
-                agentConfig.tenantContext,
-                sessionId,
-                userMessage,
-                maxTokens=settings.memory.maxContextTokens
-            )
-
-            conversationHistory = await self.memory.getConversationHistory(
-                agentConfig.tenantContext,
-                sessionId
-            )
-
-            systemPrompt = self._buildSystemPrompt(agentConfig, context)
-
-            messages = conversationHistory + [{
-                "role": "user",
-                "content": userMessage
-            }]
-
-            totalTokens = 0
-            maxIterations = 10
-            iterations = 0
-
-            while iterations < maxIterations:
-                iterations += 1
-
-                response = self.bedrock.invokeModel(
-                    messages=messages,
-                    systemPrompt=systemPrompt,
-                    temperature=agentConfig.temperature,
-                    maxTokens=agentConfig.maxTokens,
-                    tools=bedrockTools if tools else None
+            cacheScope = None
+            cachedResponse = None
+
+            if settings.agent.semanticCacheEnabled and useCache and depth == 0:
+                try:
+                    messageEmbedding = await self.memory.semanticMemory.embed(userMessage)
+                    cacheScope = self._responseCacheScope(agentConfig)
+                    cachedResponse = self._responseCache.get(cacheScope, messageEmbedding)
+                except Exception as e:
+                    # The cache is an optimisation; a lookup failure must not fail the request
+                    logger.warning("agent_response_cache_error", agentId=agentConfig.id, error=str(e))
+                    cacheScope = None
+                    cachedResponse = None
+
+            if cachedResponse is not None:
+                logger.info("agent_response_cache_hit", agentId=agentConfig.id)
+                execution.agentResponse = cachedResponse
+                execution.status = AgentStatus.COMPLETED
+                execution.tokensUsed = 0
+                totalTokens = 0
+            else:
+                totalTokens = await self._runModelLoop(
+                    agentConfig,
+                    userMessage,
+                    sessionId,
+                    authToken,
+                    execution
                 )
 
-                totalTokens += response.get("usage", {}).get("total_tokens", 0)
-
-                if totalTokens > settings.agent.maxTokenLimit:
-                    raise TokenLimitExceeded(totalTokens, settings.agent.maxTokenLimit)
-
-                toolCalls = self.bedrock.extractToolCalls(response)
-
-                if toolCalls:
-                    logger.info(
-                        "tool_calls_detected",
-                        agentId=agentConfig.id,
-                        toolCallCount=len(toolCalls),
-                        toolNames=[tc.get('name') for tc in toolCalls]
-                    )
-                else:
-                    logger.info(
-                        "no_tool_calls_in_response",
-                        agentId=agentConfig.id,
-                        hasTools=bool(bedrockTools)
-                    )
-
-                if not toolCalls:
-                    textResponse = self.bedrock.extractTextResponse(response)
-                    execution.agentResponse = textResponse
-                    execution.status = AgentStatus.COMPLETED
-                    execution.tokensUsed = totalTokens
-                    break
-
-                messages.append({
-                    "role": "assistant",
-                    "content": response.get("content", [])
-                })
+                if cacheScope is not None and execution.status == AgentStatus.COMPLETED and not execution.toolCalls:
+                    self._responseCache.set(cacheScope, execution.id, messageEmbedding, execution.agentResponse)
 
-                for toolCall in toolCalls:
-                    tool = next((t for t in tools if t.name == toolCall["name"]), None)
-
-                    logger.info(
-                        "executing_tool",
-                        toolName=toolCall["name"],
-                        toolId=toolCall.get("id"),
-                        toolInput=str(toolCall["input"])[:200]
-                    )
-
-                    if not tool:
-                        toolResult = {"error": f"Tool {toolCall['name']} not found"}
-                        logger.error(
-                            "tool_not_found_in_loaded_tools",
-                            toolName=toolCall["name"],
-                            loadedTools=[t.name for t in tools]
-                        )
-                    else:
-                        try:
-                            toolResult = await self.toolExecutor.execute(
-                                tool,
-                                toolCall["input"],
-                                agentConfig.tenantContext,
-                                authToken
-                            )
-                            logger.info(
-                                "tool_execution_completed",
-                                toolName=toolCall["name"],
-                                success=isinstance(toolResult, dict) and toolResult.get("success", True),
-                                resultPreview=str(toolResult)[:200]
-                            )
-                        except Exception as e:
-                            toolResult = {"error": str(e)}
-                            logger.error(
-                                "tool_execution_error",
-                                toolName=toolCall["name"],
-                                error=str(e)
-                            )
-
-                    execution.toolCalls.append({
-                        "id": toolCall["id"],
-                        "name": toolCall["name"],
-                        "input": toolCall["input"],
-                        "result": toolResult
-                    })
-
-                    messages.append(
-                        self.bedrock.formatToolResult(toolCall["id"], toolResult)
-                    )
-
-            if iterations >= maxIterations:
-                execution.status = AgentStatus.FAILED
-                execution.errorMessage = "Max iterations exceeded"
-
-            endTime = datetime.utcnow()
-            execution.executionTimeMs = int((endTime - startTime).total_seconds() * 1000)
+            execution.executionTimeMs = (time.perf_counter_ns() - startNs) // 1_000_000
 
             await self.memory.appendToConversation(
                 agentConfig.tenantContext,
@@ -244,28 +151,280 @@ class AgentEngine:
             )
 
         finally:
-            if execution.id in self._activeExecutions:
-                del self._activeExecutions[execution.id]
+            self._untrackExecution(execution.id)
+
+    async def _runModelLoop(
+        self,
+        agentConfig: AgentConfig,
+        userMessage: str,
+        sessionId: str,
+        authToken: Optional[str],
+        execution: AgentExecution
+    ) -> int:
+        tools = []
+        if agentConfig.toolIds:
+            tools = await self.toolRegistry.getToolsForAgent(
+                agentConfig.toolIds,
+                agentConfig.tenantContext
+            )
+
+        toolsByName = {t.name: t for t in tools}
+        toolNames = list(toolsByName)
+
+        logger.info(
+            "tools_loaded_for_agent",
+            agentId=agentConfig.id,
+            toolCount=len(tools),
+            toolNames=toolNames
+        )
+
+        bedrockTools = [self.toolExecutor.formatForBedrock(t) for t in tools]
+
+        if bedrockTools:
+            logger.info(
+                "tools_formatted_for_bedrock",
+                toolCount=len(bedrockTools),
+                toolNames=toolNames
+            )
+
+        context = {}
+        if self._needsRetrieval(userMessage):
+            context = await self.memory.retrieveContext(
+                agentConfig.tenantContext,
+                sessionId,
+                userMessage,
+                maxTokens=settings.memory.maxContextTokens
+            )
+
+        conversationHistory = await self.memory.getConversationHistory(
+            agentConfig.tenantContext,
+            sessionId
+        )
+
+        systemPrompt = self.bedrock.buildSystemBlocks(
+            *self._buildSystemPrompt(agentConfig, context)
+        )
+
+        # getConversationHistory returns a freshly decoded list, so the turn is built on it
+        # in place rather than copying the history into a new list
+        messages = conversationHistory
+        messages.append({
+            "role": "user",
+            "content": userMessage
+        })
+
+        if not bedrockTools:
+            return await self._runWithoutTools(agentConfig, messages, systemPrompt, execution)
+
+        totalTokens = 0
+        tokenLimit = settings.agent.maxTokenLimit
+        maxIterations = 10
+        iterations = 0
+
+        while iterations < maxIterations:
+            iterations += 1
+
+            pendingTools: Dict[str, asyncio.Task] = {}
+
+            def startToolCall(block: Dict[str, Any]):
+                pendingTools[block["id"]] = asyncio.create_task(self._executeToolCall(
+                    {"id": block["id"], "name": block["name"], "input": block["input"]},
+                    toolsByName,
+                    agentConfig,
+                    authToken
+                ))
+
+            try:
+                # Tools start as soon as their tool_use block has streamed in, overlapping
+                # with the rest of the model's turn
+                response = await self.bedrock.invokeModelIncremental(
+                    messages=messages,
+                    systemPrompt=systemPrompt,
+                    temperature=agentConfig.temperature,
+                    maxTokens=agentConfig.maxTokens,
+                    tools=bedrockTools,
+                    cacheConversation=True,
+                    onToolUse=startToolCall if agentConfig.parallelToolExecution else None
+                )
+
+                totalTokens += self.bedrock.usageTokens(response)
+
+                if totalTokens > tokenLimit:
+                    raise TokenLimitExceeded(totalTokens, tokenLimit)
+            except BaseException:
+                for task in pendingTools.values():
+                    task.cancel()
+                raise
+
+            textResponse, toolCalls = self.bedrock.extractResponse(response)
+
+            if toolCalls:
+                logger.info(
+                    "tool_calls_detected",
+                    agentId=agentConfig.id,
+                    toolCallCount=len(toolCalls),
+                    toolNames=[tc.get('name') for tc in toolCalls]
+                )
+            else:
+                logger.info(
+                    "no_tool_calls_in_response",
+                    agentId=agentConfig.id,
+                    hasTools=bool(bedrockTools)
+                )
+
+            if not toolCalls:
+                execution.agentResponse = textResponse
+                execution.status = AgentStatus.COMPLETED
+                execution.tokensUsed = totalTokens
+                break
+
+            messages.append({
+                "role": "assistant",
+                "content": response.get("content", [])
+            })
+
+            if agentConfig.parallelToolExecution:
+                toolResults = await asyncio.gather(*(
+                    pendingTools.get(toolCall["id"])
+                    or self._executeToolCall(toolCall, toolsByName, agentConfig, authToken)
+                    for toolCall in toolCalls
+                ))
+            else:
+                toolResults = [
+                    await self._executeToolCall(toolCall, toolsByName, agentConfig, authToken)
+                    for toolCall in toolCalls
+                ]
+
+            # Results are appended in tool_use order so each tool_result pairs with its request
+            for toolCall, toolResult in zip(toolCalls, toolResults):
+                execution.toolCalls.append({
+                    "id": toolCall["id"],
+                    "name": toolCall["name"],
+                    "input": toolCall["input"],
+                    "result": toolResult
+                })
+
+                messages.append(
+                    self.bedrock.formatToolResult(toolCall["id"], toolResult)
+                )
+
+        if iterations >= maxIterations:
+            execution.status = AgentStatus.FAILED
+            execution.errorMessage = "Max iterations exceeded"
+
+        return totalTokens
+
+    async def _runWithoutTools(
+        self,
+        agentConfig: AgentConfig,
+        messages: List[Dict[str, Any]],
+        systemPrompt: List[Dict[str, Any]],
+        execution: AgentExecution
+    ) -> int:
+        """Single-call path for agents with no usable tools: no streaming or tool dispatch"""
+        response = await self.bedrock.invokeModelAsync(
+            messages=messages,
+            systemPrompt=systemPrompt,
+            temperature=agentConfig.temperature,
+            maxTokens=agentConfig.maxTokens,
+            cacheConversation=True
+        )
+
+        totalTokens = self.bedrock.usageTokens(response)
+
+        if totalTokens > settings.agent.maxTokenLimit:
+            raise TokenLimitExceeded(totalTokens, settings.agent.maxTokenLimit)
+
+        execution.agentResponse, _ = self.bedrock.extractResponse(response)
+        execution.status = AgentStatus.COMPLETED
+        execution.tokensUsed = totalTokens
+        return totalTokens
+
+    async def _executeToolCall(
+        self,
+        toolCall: Dict[str, Any],
+        toolsByName: Dict[str, Any],
+        agentConfig: AgentConfig,
+        authToken: Optional[str]
+    ) -> Any:
+        tool = toolsByName.get(toolCall["name"])
+
+        logger.info(
+            "executing_tool",
+            toolName=toolCall["name"],
+            toolId=toolCall.get("id"),
+            toolInput=str(toolCall["input"])[:200]
+        )
+
+        if not tool:
+            logger.error(
+                "tool_not_found_in_loaded_tools",
+                toolName=toolCall["name"],
+                loadedTools=list(toolsByName)
+            )
+            return {"error": f"Tool {toolCall['name']} not found"}
+
+        try:
+            toolResult = await self.toolExecutor.execute(
+                tool,
+                toolCall["input"],
+                agentConfig.tenantContext,
+                authToken
+            )
+            logger.info(
+                "tool_execution_completed",
+                toolName=toolCall["name"],
+                success=isinstance(toolResult, dict) and toolResult.get("success", True),
+                resultPreview=str(toolResult)[:200]
+            )
+            return toolResult
+        except Exception as e:
+            logger.error(
+                "tool_execution_error",
+                toolName=toolCall["name"],
+                error=str(e)
+            )
+            return {"error": str(e)}
+
+    def _needsRetrieval(self, userMessage: str) -> bool:
+        """Cheap check that skips the memory round-trips for greetings and acknowledgements"""
+        normalized = userMessage.strip().lower().rstrip("!.?")
+
+        if normalized in TRIVIAL_MESSAGES:
+            return False
+
+        # Short questions ("who am I?") can still depend on remembered facts
+        return len(normalized) >= RETRIEVAL_MIN_MESSAGE_CHARS or "?" in userMessage
+
+    def _responseCacheScope(self, agentConfig: AgentConfig) -> tuple:
+        """Cache partition: answers are only reused for the same user, agent, prompt and toolset"""
+        promptDigest = hashlib.sha256(
+            f"{agentConfig.systemPrompt}|{','.join(agentConfig.toolIds)}".encode()
+        ).hexdigest()
+        tenantContext = agentConfig.tenantContext
+        return (tenantContext.tenantId, tenantContext.userId, agentConfig.id, promptDigest)
 
     def _buildSystemPrompt(
         self,
         agentConfig: AgentConfig,
         context: Dict[str, Any]
-    ) -> str:
-        systemPrompt = agentConfig.systemPrompt
+    ) -> Tuple[str, str]:
+        """Split the system prompt into the agent's static base prompt and the
+        per-request memory context, so the static part stays a stable cache prefix"""
+        sections = []
 
         if context.get("semantic"):
             semanticFacts = "\n".join([
                 f"- {mem['content']}"
                 for mem in context["semantic"][:5]
             ])
-            systemPrompt += f"\n\nRelevant knowledge:\n{semanticFacts}"
+            sections.append(f"Relevant knowledge:\n{semanticFacts}")
 
         if context.get("procedural"):
             patterns = ", ".join(context["procedural"])
-            systemPrompt += f"\n\nAvailable patterns: {patterns}"
+            sections.append(f"Available patterns: {patterns}")
 
-        return systemPrompt
+        return agentConfig.systemPrompt, "\n\n".join(sections)
 
     async def executeStreaming(
         self,
@@ -273,7 +432,7 @@ class AgentEngine:
         userMessage: str,
         sessionId: str,
         authToken: Optional[str] = None
-    ):
+    ) -> AsyncIterator[Dict[str, Any]]:
         tools = await self.toolRegistry.getToolsForAgent(
             agentConfig.toolIds,
             agentConfig.tenantContext
@@ -281,24 +440,29 @@ class AgentEngine:
 
         bedrockTools = [self.toolExecutor.formatForBedrock(t) for t in tools]
 
-        context = await self.memory.retrieveContext(
-            agentConfig.tenantContext,
-            sessionId,
-            userMessage,
-            maxTokens=settings.memory.maxContextTokens
-        )
+        context = {}
+        if self._needsRetrieval(userMessage):
+            context = await self.memory.retrieveContext(
+                agentConfig.tenantContext,
+                sessionId,
+                userMessage,
+                maxTokens=settings.memory.maxContextTokens
+            )
 
         conversationHistory = await self.memory.getConversationHistory(
             agentConfig.tenantContext,
             sessionId
         )
 
-        systemPrompt = self._buildSystemPrompt(agentConfig, context)
+        systemPrompt = self.bedrock.buildSystemBlocks(
+            *self._buildSystemPrompt(agentConfig, context)
+        )
 
-        messages = conversationHistory + [{
+        messages = conversationHistory
+        messages.append({
             "role": "user",
             "content": userMessage
-        }]
+        })
 
         async for chunk in self.bedrock.invokeModelStream(
             messages=messages,
@@ -309,17 +473,36 @@ class AgentEngine:
         ):
             yield chunk
 
+    # Both indexes are only touched from synchronous code on the event loop thread,
+    # so updates cannot interleave and need no lock
+    def _trackExecution(self, execution: AgentExecution):
+        self._activeExecutions[execution.id] = execution
+        self._activeByTenant[execution.tenantContext.tenantId].add(execution.id)
+
+    def _untrackExecution(self, executionId: str) -> Optional[AgentExecution]:
+        execution = self._activeExecutions.pop(executionId, None)
+        if execution is None:
+            return None
+
+        tenantId = execution.tenantContext.tenantId
+        tenantExecutions = self._activeByTenant.get(tenantId)
+        if tenantExecutions is not None:
+            tenantExecutions.discard(executionId)
+            if not tenantExecutions:
+                del self._activeByTenant[tenantId]
+
+        return execution
+
     def getActiveExecutions(self, tenantId: str) -> List[AgentExecution]:
         return [
-            exec for exec in self._activeExecutions.values()
-            if exec.tenantContext.tenantId == tenantId
+            self._activeExecutions[executionId]
+            for executionId in self._activeByTenant.get(tenantId, ())
         ]
 
     async def cancelExecution(self, executionId: str) -> bool:
-        if executionId in self._activeExecutions:
-            execution = self._activeExecutions[executionId]
+        execution = self._untrackExecution(executionId)
+        if execution is not None:
             execution.status = AgentStatus.CANCELLED
-            del self._activeExecutions[executionId]
             logger.info("agent_execution_cancelled", executionId=executionId)
             return True
         return False
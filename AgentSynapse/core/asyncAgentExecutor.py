@@ -1,10 +1,14 @@
-import boto3
+import asyncio
 import json
+import time
 import httpx
-from typing import Dict, Any, Optional
+from contextlib import AsyncExitStack
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from uuid import uuid4
 from config.settings import settings
+from utils.awsClients import getAioSession, getClientConfig
+from utils.batching import MicroBatcher
 from utils.logger import getLogger
 from schemas import AgentStatus, TenantContext
 from core.agentEngine import agentEngine
@@ -13,39 +17,76 @@ from utils.exceptions import AgentNotFound
 
 logger = getLogger(__name__)
 
+SQS_BATCH_MAX_SIZE = 10
+SQS_BATCH_MAX_WAIT_SECONDS = 0.01
+SUBMIT_QUEUE_MAX_SIZE = 1000
+CALLBACK_TIMEOUT_SECONDS = 10.0
+CALLBACK_MAX_CONNECTIONS = 100
+CALLBACK_MAX_KEEPALIVE_CONNECTIONS = 50
+
 
 class AsyncAgentExecutor:
     def __init__(self):
         self._sqs = None
-        self._dynamodb = None
         self._table = None
+        self._asyncLoop = None
+        self._asyncExitStack = None
+        self._queueUrl = None
+        self._httpClient = None
+        self._submitBatcher = MicroBatcher(
+            self._sendBatch,
+            maxSize=SQS_BATCH_MAX_SIZE,
+            maxWaitSeconds=SQS_BATCH_MAX_WAIT_SECONDS,
+            maxQueueSize=SUBMIT_QUEUE_MAX_SIZE
+        )
         self.engine = agentEngine
         self.agentRegistry = agentRegistry
 
-    def _getSQS(self):
-        if not self._sqs:
-            self._sqs = boto3.client(
-                "sqs",
-                region_name=settings.aws.region,
-                aws_access_key_id=settings.aws.accessKeyId,
-                aws_secret_access_key=settings.aws.secretAccessKey
-            )
-        return self._sqs
+    async def _openAsyncResources(self):
+        """Open the aioboto3 SQS client and sessions table once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._sqs and self._asyncLoop is loop:
+            return
 
-    def _getTable(self):
-        if not self._table:
-            resourceArgs = {
-                "region_name": settings.aws.region,
-                "aws_access_key_id": settings.aws.accessKeyId,
-                "aws_secret_access_key": settings.aws.secretAccessKey
-            }
-            if settings.dynamodb.endpointUrl:
-                resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
+        session = getAioSession()
+        exitStack = AsyncExitStack()
+
+        sqs = await exitStack.enter_async_context(
+            session.client("sqs", config=getClientConfig())
+        )
+
+        resourceArgs = {"config": getClientConfig()}
+        if settings.dynamodb.endpointUrl:
+            resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
+        dynamodb = await exitStack.enter_async_context(session.resource("dynamodb", **resourceArgs))
+        table = await dynamodb.Table(settings.dynamodb.tableSessions)
+
+        if self._sqs and self._asyncLoop is loop:
+            # Another coroutine opened the resources while this one was connecting
+            await exitStack.aclose()
+            return
+
+        self._sqs = sqs
+        self._table = table
+        self._asyncLoop = loop
+        self._asyncExitStack = exitStack
 
-            dynamodb = boto3.resource("dynamodb", **resourceArgs)
-            self._table = dynamodb.Table(settings.dynamodb.tableSessions)
+    async def _getSQS(self):
+        await self._openAsyncResources()
+        return self._sqs
+
+    async def _getTable(self):
+        await self._openAsyncResources()
         return self._table
 
+    async def warmup(self):
+        """Open clients and resolve the queue URL before the first submission"""
+        await self._openAsyncResources()
+        try:
+            await self._getQueueUrl()
+        except Exception as e:
+            logger.warning("sqs_queue_url_resolution_failed", error=str(e))
+
     async def submitAsyncTask(
         self,
         agentId: str,
@@ -55,10 +96,10 @@ class AsyncAgentExecutor:
         authToken: Optional[str] = None,
         callbackUrl: Optional[str] = None
     ) -> str:
-        sqs = self._getSQS()
-        table = self._getTable()
+        table = await self._getTable()
 
         taskId = str(uuid4())
+        submittedAt = datetime.utcnow().isoformat()
 
         message = {
             "taskId": taskId,
@@ -74,16 +115,13 @@ class AsyncAgentExecutor:
             },
             "authToken": authToken,
             "callbackUrl": callbackUrl,
-            "submittedAt": datetime.utcnow().isoformat()
+            "submittedAt": submittedAt
         }
 
         try:
-            queueUrl = self._getQueueUrl()
-
-            sqs.send_message(
-                QueueUrl=queueUrl,
-                MessageBody=json.dumps(message),
-                MessageAttributes={
+            await self._enqueueMessage({
+                "MessageBody": json.dumps(message),
+                "MessageAttributes": {
                     "tenantId": {
                         "StringValue": tenantContext.tenantId,
                         "DataType": "String"
@@ -93,15 +131,15 @@ class AsyncAgentExecutor:
                         "DataType": "String"
                     }
                 }
-            )
+            })
 
-            table.put_item(Item={
+            await table.put_item(Item={
                 "pk": f"TENANT#{tenantContext.tenantId}#SESSION#{sessionId}",
                 "sk": f"TASK#{taskId}",
                 "taskId": taskId,
                 "agentId": agentId,
                 "status": AgentStatus.IDLE.value,
-                "submittedAt": datetime.utcnow().isoformat(),
+                "submittedAt": submittedAt,
                 "callbackUrl": callbackUrl
             })
 
@@ -112,6 +150,46 @@ class AsyncAgentExecutor:
             logger.error("async_task_submission_error", error=str(e))
             raise
 
+    async def _enqueueMessage(self, entry: Dict[str, Any]):
+        """Hand a message to the submit batcher and wait until SQS has accepted it"""
+        await self._submitBatcher.submit(entry)
+
+    async def _sendBatch(self, entries: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        sqs = await self._getSQS()
+        response = await sqs.send_message_batch(
+            QueueUrl=await self._getQueueUrl(),
+            Entries=[{"Id": str(index), **entry} for index, entry in enumerate(entries)]
+        )
+
+        failures = {failure["Id"]: failure for failure in response.get("Failed", [])}
+        logger.info("async_task_batch_sent", batchSize=len(entries), failed=len(failures))
+
+        results = []
+        for index in range(len(entries)):
+            failure = failures.get(str(index))
+            if failure:
+                results.append(
+                    RuntimeError(f"SQS rejected message: {failure.get('Message', failure.get('Code'))}")
+                )
+            else:
+                results.append(None)
+
+        return results
+
+    async def close(self):
+        await self._submitBatcher.close()
+
+        if self._httpClient:
+            await self._httpClient.aclose()
+            self._httpClient = None
+
+        if self._asyncExitStack:
+            await self._asyncExitStack.aclose()
+            self._sqs = None
+            self._table = None
+            self._asyncLoop = None
+            self._asyncExitStack = None
+
     async def processAsyncTask(self, messageBody: Dict[str, Any]) -> Dict[str, Any]:
         taskId = messageBody["taskId"]
         agentId = messageBody["agentId"]
@@ -129,22 +207,20 @@ class AsyncAgentExecutor:
             permissions=tenantContextData.get("permissions", [])
         )
 
-        table = self._getTable()
+        table = await self._getTable()
+        taskKey = {
+            "pk": f"TENANT#{tenantContext.tenantId}#SESSION#{sessionId}",
+            "sk": f"TASK#{taskId}"
+        }
 
-        try:
-            table.update_item(
-                Key={
-                    "pk": f"TENANT#{tenantContext.tenantId}#SESSION#{sessionId}",
-                    "sk": f"TASK#{taskId}"
-                },
-                UpdateExpression="SET #status = :running, startedAt = :now",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":running": AgentStatus.RUNNING.value,
-                    ":now": datetime.utcnow().isoformat()
-                }
-            )
+        # The RUNNING marker is written in the background while the agent runs;
+        # the terminal write waits for it so it can never overwrite the final status
+        startNs = time.perf_counter_ns()
+        runningMarker = None
+        if settings.asyncAgent.trackRunningState:
+            runningMarker = asyncio.create_task(self._markRunning(table, taskKey, taskId))
 
+        try:
             agent = await self.agentRegistry.get(agentId, tenantContext)
 
             execution = await self.engine.execute(
@@ -154,25 +230,24 @@ class AsyncAgentExecutor:
                 authToken
             )
 
-            table.update_item(
-                Key={
-                    "pk": f"TENANT#{tenantContext.tenantId}#SESSION#{sessionId}",
-                    "sk": f"TASK#{taskId}"
-                },
-                UpdateExpression="SET #status = :status, completedAt = :now, response = :response, tokensUsed = :tokens",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":status": execution.status.value,
-                    ":now": datetime.utcnow().isoformat(),
-                    ":response": execution.agentResponse or "",
-                    ":tokens": execution.tokensUsed
-                }
+            await self._writeTerminalStatus(
+                table,
+                taskKey,
+                execution.status,
+                runningMarker,
+                response=execution.agentResponse or "",
+                tokensUsed=execution.tokensUsed
             )
 
             if callbackUrl:
                 await self._sendCallback(callbackUrl, taskId, execution)
 
-            logger.info("async_task_completed", taskId=taskId, status=execution.status.value)
+            logger.info(
+                "async_task_completed",
+                taskId=taskId,
+                status=execution.status.value,
+                durationMs=(time.perf_counter_ns() - startNs) // 1_000_000
+            )
 
             return {
                 "taskId": taskId,
@@ -185,18 +260,12 @@ class AsyncAgentExecutor:
             errorMessage = str(e)
             logger.error("async_task_processing_error", error=errorMessage, taskId=taskId)
 
-            table.update_item(
-                Key={
-                    "pk": f"TENANT#{tenantContext.tenantId}#SESSION#{sessionId}",
-                    "sk": f"TASK#{taskId}"
-                },
-                UpdateExpression="SET #status = :failed, completedAt = :now, errorMessage = :error",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":failed": AgentStatus.FAILED.value,
-                    ":now": datetime.utcnow().isoformat(),
-                    ":error": errorMessage
-                }
+            await self._writeTerminalStatus(
+                table,
+                taskKey,
+                AgentStatus.FAILED,
+                runningMarker,
+                errorMessage=errorMessage
             )
 
             if callbackUrl:
@@ -211,18 +280,12 @@ class AsyncAgentExecutor:
         except Exception as e:
             logger.error("async_task_processing_error", error=str(e), taskId=taskId)
 
-            table.update_item(
-                Key={
-                    "pk": f"TENANT#{tenantContext.tenantId}#SESSION#{sessionId}",
-                    "sk": f"TASK#{taskId}"
-                },
-                UpdateExpression="SET #status = :failed, completedAt = :now, errorMessage = :error",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":failed": AgentStatus.FAILED.value,
-                    ":now": datetime.utcnow().isoformat(),
-                    ":error": str(e)
-                }
+            await self._writeTerminalStatus(
+                table,
+                taskKey,
+                AgentStatus.FAILED,
+                runningMarker,
+                errorMessage=str(e)
             )
 
             if callbackUrl:
@@ -234,16 +297,53 @@ class AsyncAgentExecutor:
                 "error": str(e)
             }
 
+    async def _markRunning(self, table, taskKey: Dict[str, str], taskId: str):
+        try:
+            await table.update_item(
+                Key=taskKey,
+                UpdateExpression="SET #status = :running, startedAt = :now",
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={
+                    ":running": AgentStatus.RUNNING.value,
+                    ":now": datetime.utcnow().isoformat()
+                },
+                ReturnValues="NONE"
+            )
+        except Exception as e:
+            logger.warning("async_task_running_marker_failed", error=str(e), taskId=taskId)
+
+    async def _writeTerminalStatus(
+        self,
+        table,
+        taskKey: Dict[str, str],
+        status: AgentStatus,
+        runningMarker: Optional[asyncio.Task] = None,
+        **attributes: Any
+    ):
+        if runningMarker is not None:
+            await runningMarker
+
+        attributes = {"status": status.value, "completedAt": datetime.utcnow().isoformat(), **attributes}
+
+        await table.update_item(
+            Key=taskKey,
+            UpdateExpression="SET " + ", ".join(f"#{name} = :{name}" for name in attributes),
+            ExpressionAttributeNames={f"#{name}": name for name in attributes},
+            ExpressionAttributeValues={f":{name}": value for name, value in attributes.items()},
+            ReturnValues="NONE",
+            ReturnConsumedCapacity="NONE"
+        )
+
     async def getTaskStatus(
         self,
         taskId: str,
         sessionId: str,
         tenantContext: TenantContext
     ) -> Optional[Dict[str, Any]]:
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
-            response = table.get_item(
+            response = await table.get_item(
                 Key={
                     "pk": f"TENANT#{tenantContext.tenantId}#SESSION#{sessionId}",
                     "sk": f"TASK#{taskId}"
@@ -259,6 +359,18 @@ class AsyncAgentExecutor:
             logger.error("get_task_status_error", error=str(e), taskId=taskId)
             return None
 
+    def _getHttpClient(self) -> httpx.AsyncClient:
+        if self._httpClient is None or self._httpClient.is_closed:
+            self._httpClient = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=CALLBACK_MAX_CONNECTIONS,
+                    max_keepalive_connections=CALLBACK_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=CALLBACK_TIMEOUT_SECONDS,
+                http2=True
+            )
+        return self._httpClient
+
     async def _sendCallback(
         self,
         callbackUrl: str,
@@ -281,17 +393,18 @@ class AsyncAgentExecutor:
             })
 
         try:
-            async with httpx.AsyncClient() as client:
-                await client.post(callbackUrl, json=payload, timeout=10.0)
-                logger.info("callback_sent", taskId=taskId, callbackUrl=callbackUrl)
+            await self._getHttpClient().post(callbackUrl, json=payload)
+            logger.info("callback_sent", taskId=taskId, callbackUrl=callbackUrl)
 
         except Exception as e:
             logger.error("callback_send_error", error=str(e), taskId=taskId)
 
-    def _getQueueUrl(self) -> str:
-        sqs = self._getSQS()
-        response = sqs.get_queue_url(QueueName=settings.asyncAgent.sqsQueue)
-        return response["QueueUrl"]
+    async def _getQueueUrl(self) -> str:
+        if not self._queueUrl:
+            sqs = await self._getSQS()
+            response = await sqs.get_queue_url(QueueName=settings.asyncAgent.sqsQueue)
+            self._queueUrl = response["QueueUrl"]
+        return self._queueUrl
 
 
 asyncAgentExecutor = AsyncAgentExecutor()
@@ -1,53 +1,169 @@
-import boto3
-import json
-from typing import Dict, Any, List, Optional, AsyncIterator
-from aioboto3 import Session
+import asyncio
+import hashlib
+import time
+import orjson
+import tiktoken
+from contextlib import AsyncExitStack
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable, Tuple, Union
+from utils.awsClients import getAioSession, getClient, getClientConfig
 from botocore.exceptions import ClientError
 from config.settings import settings
 from utils.logger import getLogger
 from utils.exceptions import AgentExecutionError
-from utils.serialization import DecimalEncoder
+from utils.serialization import orjsonDefault
+from utils.cache import LRUCache
 
 logger = getLogger(__name__)
 
+# Request bodies are always Anthropic-format InvokeModel, so only Claude models apply
+PROMPT_CACHE_MODEL_MARKERS = (
+    "claude-3-5-sonnet",
+    "claude-3-5-haiku",
+    "claude-3-7-sonnet",
+    "claude-sonnet-4",
+    "claude-opus-4",
+    "claude-haiku-4"
+)
+
+# Bedrock silently skips the cache write for shorter prefixes (Haiku models need 2048)
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+# Claude's tokenizer is not published; cl100k_base tracks it far more closely than a
+# fixed chars-per-token ratio, particularly for code and non-Latin text
+TOKENIZER_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=1)
+def getTokenizer() -> Optional[tiktoken.Encoding]:
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        logger.warning("tokenizer_load_failed", encoding=TOKENIZER_ENCODING, error=str(e))
+        return None
+
+
+# Keyed on a 16-byte digest so the cache does not pin every counted text in memory
+_tokenCountCache = LRUCache(maxSize=10_000)
+
+
+def countTextTokens(text: str) -> int:
+    """Token count for text, memoized since the same memories are re-counted every request"""
+    digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    count = _tokenCountCache.get(digest)
+    if count is not None:
+        return count
+
+    tokenizer = getTokenizer()
+    count = len(text) // 4 if tokenizer is None else len(tokenizer.encode_ordinary(text))
+    _tokenCountCache.set(digest, count)
+    return count
+
 
 class BedrockClient:
     def __init__(self):
         self.modelId = settings.aws.bedrockModelId
         self.region = settings.aws.region
-        self._client = None
         self._asyncSession = None
+        self._asyncClient = None
+        self._asyncClientLoop = None
+        self._asyncExitStack = None
+        self.promptCachingEnabled = settings.aws.enablePromptCaching and any(
+            marker in self.modelId for marker in PROMPT_CACHE_MODEL_MARKERS
+        )
 
     def _getClient(self):
-        if not self._client:
-            self._client = boto3.client(
+        return getClient("bedrock-runtime")
+
+    async def _getAsyncClient(self):
+        loop = asyncio.get_running_loop()
+        if self._asyncClient and self._asyncClientLoop is loop:
+            return self._asyncClient
+
+        if not self._asyncSession:
+            self._asyncSession = getAioSession()
+
+        exitStack = AsyncExitStack()
+        client = await exitStack.enter_async_context(
+            self._asyncSession.client(
                 "bedrock-runtime",
                 region_name=self.region,
                 aws_access_key_id=settings.aws.accessKeyId,
-                aws_secret_access_key=settings.aws.secretAccessKey
+                aws_secret_access_key=settings.aws.secretAccessKey,
+                config=getClientConfig()
             )
-        return self._client
-
-    async def _getAsyncClient(self):
-        if not self._asyncSession:
-            self._asyncSession = Session()
-        return self._asyncSession.client(
-            "bedrock-runtime",
-            region_name=self.region,
-            aws_access_key_id=settings.aws.accessKeyId,
-            aws_secret_access_key=settings.aws.secretAccessKey
         )
 
-    def invokeModel(
+        if self._asyncClient and self._asyncClientLoop is loop:
+            # Another coroutine opened a client while this one was connecting
+            await exitStack.aclose()
+            return self._asyncClient
+
+        self._asyncClient = client
+        self._asyncClientLoop = loop
+        self._asyncExitStack = exitStack
+        return client
+
+    async def warmup(self):
+        """Build clients and load the tokenizer up front so the first request skips setup"""
+        await asyncio.to_thread(self._getClient)
+        await asyncio.to_thread(self.countTokens, "warmup")
+        await self._getAsyncClient()
+
+    async def close(self):
+        if self._asyncExitStack:
+            await self._asyncExitStack.aclose()
+            self._asyncClient = None
+            self._asyncClientLoop = None
+            self._asyncExitStack = None
+
+    def _cacheControl(self) -> Dict[str, str]:
+        return {"type": "ephemeral"}
+
+    def buildSystemBlocks(self, staticPrompt: str, dynamicPrompt: str = "") -> List[Dict[str, Any]]:
+        """System blocks with a cache breakpoint after the static prefix only
+
+        Per-request context goes in a trailing uncached block so that it does not
+        invalidate the cached tools + static prompt prefix.
+        """
+        blocks = [{"type": "text", "text": staticPrompt, "cache_control": self._cacheControl()}]
+        if dynamicPrompt:
+            blocks.append({"type": "text", "text": dynamicPrompt})
+        return blocks
+
+    def _withCacheBreakpoint(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of message with a cache breakpoint on its last content block
+
+        Bedrock caches everything up to and including the marked block, so
+        marking the newest message lets the next turn of the tool loop reuse the
+        whole conversation prefix. The caller's message is left untouched since
+        it may be shared with stored conversation history.
+        """
+        content = message.get("content")
+
+        if isinstance(content, str):
+            blocks = [{"type": "text", "text": content}]
+        elif isinstance(content, list) and content:
+            blocks = list(content)
+        else:
+            return message
+
+        blocks[-1] = {**blocks[-1], "cache_control": self._cacheControl()}
+        return {**message, "content": blocks}
+
+    def _buildBody(
         self,
         messages: List[Dict[str, Any]],
-        systemPrompt: Optional[str] = None,
+        systemPrompt: Optional[Union[str, List[Dict[str, Any]]]] = None,
         temperature: float = 0.7,
         maxTokens: int = 4096,
         tools: Optional[List[Dict[str, Any]]] = None,
-        stopSequences: Optional[List[str]] = None
+        stopSequences: Optional[List[str]] = None,
+        cacheSystemPrompt: bool = False,
+        cacheConversation: bool = False
     ) -> Dict[str, Any]:
-        client = self._getClient()
+        if cacheConversation and self.promptCachingEnabled and messages:
+            messages = messages[:-1] + [self._withCacheBreakpoint(messages[-1])]
 
         body = {
             "anthropic_version": "bedrock-2023-05-31",
@@ -57,7 +173,20 @@ class BedrockClient:
         }
 
         if systemPrompt:
-            body["system"] = systemPrompt
+            if isinstance(systemPrompt, list):
+                # Pre-built system blocks carry their own cache_control markers
+                body["system"] = systemPrompt if self.promptCachingEnabled else [
+                    {key: value for key, value in block.items() if key != "cache_control"}
+                    for block in systemPrompt
+                ]
+            elif cacheSystemPrompt and self.promptCachingEnabled:
+                body["system"] = [{
+                    "type": "text",
+                    "text": systemPrompt,
+                    "cache_control": self._cacheControl()
+                }]
+            else:
+                body["system"] = systemPrompt
 
         if tools:
             body["tools"] = tools
@@ -65,13 +194,68 @@ class BedrockClient:
         if stopSequences:
             body["stop_sequences"] = stopSequences
 
+        return body
+
+    @staticmethod
+    def usageTokens(response: Dict[str, Any]) -> int:
+        """Tokens billed for one call; Anthropic on Bedrock reports no total_tokens field
+
+        Cache reads and writes are counted with the regular input tokens, since with
+        prompt caching input_tokens only covers the uncached part of the prompt.
+        """
+        usage = response.get("usage", {})
+        return (
+            usage.get("input_tokens", 0)
+            + usage.get("output_tokens", 0)
+            + usage.get("cache_read_input_tokens", 0)
+            + usage.get("cache_creation_input_tokens", 0)
+        )
+
+    def _logCacheUsage(self, responseBody: Dict[str, Any]):
+        usage = responseBody.get("usage", {})
+        cacheReadTokens = usage.get("cache_read_input_tokens", 0)
+        cacheWriteTokens = usage.get("cache_creation_input_tokens", 0)
+
+        if cacheReadTokens or cacheWriteTokens:
+            logger.info(
+                "bedrock_prompt_cache_usage",
+                cacheReadTokens=cacheReadTokens,
+                cacheWriteTokens=cacheWriteTokens,
+                inputTokens=usage.get("input_tokens", 0)
+            )
+
+    def invokeModel(
+        self,
+        messages: List[Dict[str, Any]],
+        systemPrompt: Optional[Union[str, List[Dict[str, Any]]]] = None,
+        temperature: float = 0.7,
+        maxTokens: int = 4096,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        stopSequences: Optional[List[str]] = None,
+        cacheSystemPrompt: bool = False,
+        cacheConversation: bool = False
+    ) -> Dict[str, Any]:
+        client = self._getClient()
+
+        body = self._buildBody(
+            messages,
+            systemPrompt,
+            temperature,
+            maxTokens,
+            tools,
+            stopSequences,
+            cacheSystemPrompt,
+            cacheConversation
+        )
+
         try:
             response = client.invoke_model(
                 modelId=self.modelId,
-                body=json.dumps(body, cls=DecimalEncoder)
+                body=orjson.dumps(body, default=orjsonDefault)
             )
 
-            responseBody = json.loads(response["body"].read())
+            responseBody = orjson.loads(response["body"].read())
+            self._logCacheUsage(responseBody)
             return responseBody
 
         except ClientError as e:
@@ -84,90 +268,182 @@ class BedrockClient:
     async def invokeModelAsync(
         self,
         messages: List[Dict[str, Any]],
-        systemPrompt: Optional[str] = None,
+        systemPrompt: Optional[Union[str, List[Dict[str, Any]]]] = None,
         temperature: float = 0.7,
         maxTokens: int = 4096,
         tools: Optional[List[Dict[str, Any]]] = None,
-        stopSequences: Optional[List[str]] = None
+        stopSequences: Optional[List[str]] = None,
+        cacheSystemPrompt: bool = False,
+        cacheConversation: bool = False
     ) -> Dict[str, Any]:
-        async with await self._getAsyncClient() as client:
-            body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "messages": messages,
-                "max_tokens": maxTokens,
-                "temperature": temperature,
-            }
-
-            if systemPrompt:
-                body["system"] = systemPrompt
-
-            if tools:
-                body["tools"] = tools
-
-            if stopSequences:
-                body["stop_sequences"] = stopSequences
+        client = await self._getAsyncClient()
+        body = self._buildBody(
+            messages,
+            systemPrompt,
+            temperature,
+            maxTokens,
+            tools,
+            stopSequences,
+            cacheSystemPrompt,
+            cacheConversation
+        )
 
-            try:
-                response = await client.invoke_model(
-                    modelId=self.modelId,
-                    body=json.dumps(body, cls=DecimalEncoder)
-                )
+        try:
+            response = await client.invoke_model(
+                modelId=self.modelId,
+                body=orjson.dumps(body, default=orjsonDefault)
+            )
 
-                responseBody = json.loads(await response["body"].read())
-                return responseBody
+            responseBody = orjson.loads(await response["body"].read())
+            self._logCacheUsage(responseBody)
+            return responseBody
 
-            except ClientError as e:
-                logger.error("bedrock_async_invoke_error", error=str(e))
-                raise AgentExecutionError(
-                    f"Bedrock async invocation failed: {str(e)}",
-                    details={"modelId": self.modelId}
-                )
+        except ClientError as e:
+            logger.error("bedrock_async_invoke_error", error=str(e))
+            raise AgentExecutionError(
+                f"Bedrock async invocation failed: {str(e)}",
+                details={"modelId": self.modelId}
+            )
 
     async def invokeModelStream(
         self,
         messages: List[Dict[str, Any]],
-        systemPrompt: Optional[str] = None,
+        systemPrompt: Optional[Union[str, List[Dict[str, Any]]]] = None,
         temperature: float = 0.7,
         maxTokens: int = 4096,
-        tools: Optional[List[Dict[str, Any]]] = None
+        tools: Optional[List[Dict[str, Any]]] = None,
+        cacheSystemPrompt: bool = False,
+        cacheConversation: bool = False
     ) -> AsyncIterator[Dict[str, Any]]:
-        async with await self._getAsyncClient() as client:
-            body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "messages": messages,
-                "max_tokens": maxTokens,
-                "temperature": temperature,
-            }
-
-            if systemPrompt:
-                body["system"] = systemPrompt
+        client = await self._getAsyncClient()
+        body = self._buildBody(
+            messages,
+            systemPrompt,
+            temperature,
+            maxTokens,
+            tools,
+            cacheSystemPrompt=cacheSystemPrompt,
+            cacheConversation=cacheConversation
+        )
+
+        try:
+            response = await client.invoke_model_with_response_stream(
+                modelId=self.modelId,
+                body=orjson.dumps(body, default=orjsonDefault)
+            )
+
+            stream = response.get("body")
+            if stream:
+                async for event in stream:
+                    chunk = event.get("chunk")
+                    if chunk:
+                        chunkData = orjson.loads(chunk.get("bytes"))
+                        yield chunkData
+
+        except ClientError as e:
+            logger.error("bedrock_stream_error", error=str(e))
+            raise AgentExecutionError(
+                f"Bedrock streaming failed: {str(e)}",
+                details={"modelId": self.modelId}
+            )
 
-            if tools:
-                body["tools"] = tools
-
-            try:
-                response = await client.invoke_model_with_response_stream(
-                    modelId=self.modelId,
-                    body=json.dumps(body, cls=DecimalEncoder)
-                )
-
-                stream = response.get("body")
-                if stream:
-                    async for event in stream:
-                        chunk = event.get("chunk")
-                        if chunk:
-                            chunkData = json.loads(chunk.get("bytes").decode())
-                            yield chunkData
-
-            except ClientError as e:
-                logger.error("bedrock_stream_error", error=str(e))
-                raise AgentExecutionError(
-                    f"Bedrock streaming failed: {str(e)}",
-                    details={"modelId": self.modelId}
-                )
+    async def invokeModelIncremental(
+        self,
+        messages: List[Dict[str, Any]],
+        systemPrompt: Optional[Union[str, List[Dict[str, Any]]]] = None,
+        temperature: float = 0.7,
+        maxTokens: int = 4096,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        cacheSystemPrompt: bool = False,
+        cacheConversation: bool = False,
+        onToolUse: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Stream a response and reassemble it into the invokeModelAsync shape
+
+        onToolUse is called with each tool_use block as soon as its input is
+        complete, so callers can start running tools while the model is still
+        generating the rest of the turn.
+        """
+        blocks: Dict[int, Dict[str, Any]] = {}
+        partialInputs: Dict[int, List[str]] = {}
+        usage: Dict[str, Any] = {}
+        stopReason = None
+        startNs = time.perf_counter_ns()
+        firstTokenNs = None
+
+        async for chunk in self.invokeModelStream(
+            messages,
+            systemPrompt,
+            temperature,
+            maxTokens,
+            tools,
+            cacheSystemPrompt=cacheSystemPrompt,
+            cacheConversation=cacheConversation
+        ):
+            eventType = chunk.get("type")
+
+            if eventType == "content_block_delta":
+                if firstTokenNs is None:
+                    firstTokenNs = time.perf_counter_ns()
+                index = chunk["index"]
+                delta = chunk.get("delta", {})
+                if delta.get("type") == "text_delta":
+                    blocks[index]["text"] += delta.get("text", "")
+                elif delta.get("type") == "input_json_delta":
+                    partialInputs[index].append(delta.get("partial_json", ""))
+
+            elif eventType == "content_block_start":
+                index = chunk["index"]
+                block = dict(chunk.get("content_block", {}))
+                if block.get("type") == "text":
+                    block.setdefault("text", "")
+                elif block.get("type") == "tool_use":
+                    partialInputs[index] = []
+                blocks[index] = block
+
+            elif eventType == "content_block_stop":
+                index = chunk["index"]
+                block = blocks[index]
+                if block.get("type") == "tool_use":
+                    rawInput = "".join(partialInputs.pop(index, ()))
+                    block["input"] = orjson.loads(rawInput) if rawInput else {}
+                    if onToolUse:
+                        onToolUse(block)
+
+            elif eventType == "message_start":
+                usage.update(chunk.get("message", {}).get("usage", {}))
+
+            elif eventType == "message_delta":
+                stopReason = chunk.get("delta", {}).get("stop_reason")
+                usage.update(chunk.get("usage", {}))
+
+        responseBody = {
+            "role": "assistant",
+            "content": [blocks[index] for index in sorted(blocks)],
+            "stop_reason": stopReason,
+            "usage": usage
+        }
+        self._logCacheUsage(responseBody)
+        self._logStreamTiming(startNs, firstTokenNs, usage.get("output_tokens", 0))
+        return responseBody
+
+    def _logStreamTiming(self, startNs: int, firstTokenNs: Optional[int], outputTokens: int):
+        if firstTokenNs is None:
+            return
+
+        endNs = time.perf_counter_ns()
+        generationSeconds = (endNs - firstTokenNs) / 1e9
+        logger.info(
+            "bedrock_stream_timing",
+            ttftMs=(firstTokenNs - startNs) // 1_000_000,
+            totalMs=(endNs - startNs) // 1_000_000,
+            outputTokens=outputTokens,
+            # Time per output token after the first, i.e. decode throughput
+            tokensPerSecond=round(outputTokens / generationSeconds, 1) if generationSeconds > 0 else None
+        )
 
     def countTokens(self, text: str) -> int:
-        return len(text) // 4
+        return countTextTokens(text)
 
     def formatMessages(
         self,
@@ -187,13 +463,20 @@ class BedrockClient:
         return messages
 
     def formatToolResult(self, toolUseId: str, toolResult: Any) -> Dict[str, Any]:
+        if not isinstance(toolResult, str):
+            toolResult = orjson.dumps(
+                toolResult,
+                default=orjsonDefault,
+                option=orjson.OPT_NON_STR_KEYS
+            ).decode()
+
         return {
             "role": "user",
             "content": [
                 {
                     "type": "tool_result",
                     "tool_use_id": toolUseId,
-                    "content": json.dumps(toolResult, cls=DecimalEncoder) if not isinstance(toolResult, str) else toolResult
+                    "content": toolResult
                 }
             ]
         }
@@ -212,6 +495,24 @@ class BedrockClient:
 
         return toolCalls
 
+    def extractResponse(self, response: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+        """First text block and all tool calls, collected in a single pass over content"""
+        text = None
+        toolCalls = []
+
+        for block in response.get("content", []):
+            blockType = block.get("type")
+            if blockType == "tool_use":
+                toolCalls.append({
+                    "id": block.get("id"),
+                    "name": block.get("name"),
+                    "input": block.get("input", {})
+                })
+            elif blockType == "text" and text is None:
+                text = block.get("text", "")
+
+        return text or "", toolCalls
+
     def extractTextResponse(self, response: Dict[str, Any]) -> str:
         content = response.get("content", [])
 
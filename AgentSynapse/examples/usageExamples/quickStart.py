@@ -48,6 +48,8 @@ async def runQuickStart():
     finally:
         # Prevent lingering HTTP clients
         await agentEngine.toolExecutor.close()
+        # Episodic memory is written behind; closing flushes the last interaction
+        await agentEngine.memory.close()
 
 
 if __name__ == "__main__":
@@ -110,6 +110,8 @@ async def main():
             print(call)
     finally:
         await agentEngine.toolExecutor.close()
+        # Episodic memory is written behind; closing flushes the last interaction
+        await agentEngine.memory.close()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,12 @@
-import boto3
+import asyncio
+from functools import lru_cache
+from contextlib import AsyncExitStack
 from boto3.dynamodb.conditions import Key, Attr
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime, timedelta
 from decimal import Decimal
 from config.settings import settings
+from utils.awsClients import getAioSession, getClientConfig
 from utils.logger import getLogger
 from utils.exceptions import MemoryError
 from schemas import EpisodicMemoryRecord, TenantContext, MemorySource, MemoryType
@@ -11,30 +14,95 @@ from memory.baseMemoryManager import BaseMemoryManager
 
 logger = getLogger(__name__)
 
+EPISODIC_ID_INDEX = "EpisodicIdIndex"
+EPISODIC_RECENT_INDEX = "EpisodicRecentIndex"
+
+# Enough to rebuild a record for prompt context; leaves out contextData, tags, toolsUsed and the key/ttl attributes
+EPISODIC_CONTEXT_ATTRIBUTES = (
+    "id", "tenantId", "userId", "sessionId", "agentId", "content",
+    "outcome", "source", "confidenceScore", "importance", "createdAt"
+)
+
+
+@lru_cache(maxsize=4096)
+def _toDecimal(value: float) -> Decimal:
+    """DynamoDB number for a float score
+
+    Scores take few distinct values (defaults, rounded model outputs), so the
+    str round-trip the resource layer needs is paid once per value, not per item.
+    """
+    return Decimal(str(value))
+
 
 class DynamoDBEpisodicMemory(BaseMemoryManager):
     def __init__(self):
-        self._dynamodb = None
         self._table = None
+        self._tableLoop = None
+        self._exitStack = None
+
+    async def _getTable(self):
+        """aioboto3 table for the running event loop, opened once and reused"""
+        loop = asyncio.get_running_loop()
+        if self._table and self._tableLoop is loop:
+            return self._table
+
+        resourceArgs = {"config": getClientConfig()}
+        if settings.dynamodb.endpointUrl:
+            resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
+
+        exitStack = AsyncExitStack()
+        dynamodb = await exitStack.enter_async_context(
+            getAioSession().resource("dynamodb", **resourceArgs)
+        )
+        table = await dynamodb.Table(settings.dynamodb.tableEpisodic)
+
+        if self._table and self._tableLoop is loop:
+            # Another coroutine opened the resource while this one was connecting
+            await exitStack.aclose()
+            return self._table
+
+        self._table = table
+        self._tableLoop = loop
+        self._exitStack = exitStack
+        return table
+
+    async def warmup(self):
+        """Open the table and issue one DescribeTable so credentials and the TLS connection are
+        resolved before the first interaction is stored"""
+        table = await self._getTable()
+        try:
+            await table.load()
+        except Exception as e:
+            logger.warning("episodic_table_warmup_failed", error=str(e))
 
-    def _getTable(self):
-        if not self._table:
-            resourceArgs = {
-                "region_name": settings.aws.region,
-                "aws_access_key_id": settings.aws.accessKeyId,
-                "aws_secret_access_key": settings.aws.secretAccessKey
-            }
-            if settings.dynamodb.endpointUrl:
-                resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
+    async def close(self):
+        if self._exitStack:
+            await self._exitStack.aclose()
+            self._table = None
+            self._tableLoop = None
+            self._exitStack = None
 
-            self._dynamodb = boto3.resource("dynamodb", **resourceArgs)
-            self._table = self._dynamodb.Table(settings.dynamodb.tableEpisodic)
-        return self._table
+    def _keyFor(
+        self,
+        record: EpisodicMemoryRecord,
+        recordId: Optional[str] = None,
+        createdAt: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Primary key of a record, derived from its tenant, user, session, creation time and id"""
+        createdAt = createdAt or record.createdAt.isoformat()
+        return {
+            "pk": f"TENANT#{record.tenantId}#USER#{record.userId}",
+            "sk": f"SESSION#{record.sessionId}#TIME#{createdAt}#ID#{recordId or record.id}"
+        }
 
-    def _toItem(self, record: EpisodicMemoryRecord) -> Dict[str, Any]:
+    def _expiryTtl(self) -> int:
+        return int((datetime.utcnow() + timedelta(days=settings.memory.episodicRetentionDays)).timestamp())
+
+    def _toItem(self, record: EpisodicMemoryRecord, ttl: Optional[int] = None) -> Dict[str, Any]:
+        """DynamoDB item for a record; batch writers pass one ttl computed for the whole batch"""
+        createdAt = record.createdAt.isoformat()
         item = {
-            "pk": f"TENANT#{record.tenantId}#USER#{record.userId}",
-            "sk": f"SESSION#{record.sessionId}#TIME#{record.createdAt.isoformat()}#ID#{record.id}",
+            **self._keyFor(record, createdAt=createdAt),
             "id": record.id,
             "tenantId": record.tenantId,
             "userId": record.userId,
@@ -43,14 +111,14 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
             "content": record.content,
             "outcome": record.outcome,
             "source": record.source.value,
-            "confidenceScore": Decimal(str(record.confidenceScore)),
-            "importance": Decimal(str(record.importance)),
+            "confidenceScore": _toDecimal(record.confidenceScore),
+            "importance": _toDecimal(record.importance),
             "toolsUsed": record.toolsUsed,
             "tags": record.tags,
             "contextData": record.contextData,
-            "createdAt": record.createdAt.isoformat(),
+            "createdAt": createdAt,
             "updatedAt": record.updatedAt.isoformat(),
-            "ttl": int((datetime.utcnow() + timedelta(days=settings.memory.episodicRetentionDays)).timestamp())
+            "ttl": ttl if ttl is not None else self._expiryTtl()
         }
 
         if record.sentiment:
@@ -62,7 +130,10 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
         return item
 
     def _fromItem(self, item: Dict[str, Any]) -> EpisodicMemoryRecord:
-        return EpisodicMemoryRecord(
+        """Record from an item; optional attributes may be absent from projected queries"""
+        createdAt = datetime.fromisoformat(item["createdAt"])
+        # Items were validated on the way in and are converted field by field here, so skip revalidation
+        return EpisodicMemoryRecord.model_construct(
             id=item["id"],
             tenantId=item["tenantId"],
             userId=item["userId"],
@@ -78,17 +149,17 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
             tags=item.get("tags", []),
             contextData=item.get("contextData", {}),
             sentiment=item.get("sentiment"),
-            createdAt=datetime.fromisoformat(item["createdAt"]),
-            updatedAt=datetime.fromisoformat(item["updatedAt"]),
+            createdAt=createdAt,
+            updatedAt=datetime.fromisoformat(item["updatedAt"]) if item.get("updatedAt") else createdAt,
             expiresAt=datetime.fromisoformat(item["expiresAt"]) if item.get("expiresAt") else None
         )
 
     async def store(self, record: EpisodicMemoryRecord) -> str:
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
             item = self._toItem(record)
-            table.put_item(Item=item)
+            await table.put_item(Item=item)
             logger.info("episodic_memory_stored", recordId=record.id, tenantId=record.tenantId)
             return record.id
 
@@ -96,14 +167,32 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
             logger.error("episodic_store_error", error=str(e), recordId=record.id)
             raise MemoryError(f"Failed to store episodic memory: {str(e)}", "episodic")
 
+    async def storeBatch(self, records: List[EpisodicMemoryRecord]) -> int:
+        """Write records with BatchWriteItem, 25 items per request"""
+        table = await self._getTable()
+
+        try:
+            ttl = self._expiryTtl()
+            async with table.batch_writer() as batch:
+                for record in records:
+                    await batch.put_item(Item=self._toItem(record, ttl))
+
+            logger.info("episodic_memory_batch_stored", count=len(records))
+            return len(records)
+
+        except Exception as e:
+            logger.error("episodic_batch_store_error", error=str(e), count=len(records))
+            raise MemoryError(f"Failed to store episodic memory batch: {str(e)}", "episodic")
+
     async def retrieve(
         self,
         tenantContext: TenantContext,
         query: str = None,
         limit: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        projection: Optional[Sequence[str]] = None
     ) -> List[EpisodicMemoryRecord]:
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
             pk = f"TENANT#{tenantContext.tenantId}#USER#{tenantContext.userId}"
@@ -119,6 +208,10 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
                 "ScanIndexForward": False
             }
 
+            if projection:
+                queryParams["ProjectionExpression"] = ", ".join(f"#{name}" for name in projection)
+                queryParams["ExpressionAttributeNames"] = {f"#{name}": name for name in projection}
+
             if filters:
                 filterExpression = None
 
@@ -132,13 +225,13 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
                     filterExpression = filterExpression & tagFilter if filterExpression else tagFilter
 
                 if filters.get("minImportance"):
-                    importanceFilter = Attr("importance").gte(Decimal(str(filters["minImportance"])))
+                    importanceFilter = Attr("importance").gte(_toDecimal(float(filters["minImportance"])))
                     filterExpression = filterExpression & importanceFilter if filterExpression else importanceFilter
 
                 if filterExpression:
                     queryParams["FilterExpression"] = filterExpression
 
-            response = table.query(**queryParams)
+            response = await table.query(**queryParams)
             items = response.get("Items", [])
 
             return [self._fromItem(item) for item in items]
@@ -151,12 +244,14 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
         self,
         tenantContext: TenantContext,
         sessionId: str,
-        limit: int = 50
+        limit: int = 50,
+        projection: Optional[Sequence[str]] = None
     ) -> List[EpisodicMemoryRecord]:
         return await self.retrieve(
             tenantContext,
             limit=limit,
-            filters={"sessionId": sessionId}
+            filters={"sessionId": sessionId},
+            projection=projection
         )
 
     async def retrieveRecent(
@@ -165,29 +260,45 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
         hours: int = 24,
         limit: int = 20
     ) -> List[EpisodicMemoryRecord]:
-        memories = await self.retrieve(tenantContext, limit=limit)
+        table = await self._getTable()
         cutoffTime = datetime.utcnow() - timedelta(hours=hours)
 
-        return [m for m in memories if m.createdAt >= cutoffTime]
+        try:
+            pk = f"TENANT#{tenantContext.tenantId}#USER#{tenantContext.userId}"
+
+            # (pk, createdAt) index: DynamoDB stops reading at the cutoff, so Limit counts only fresh items
+            response = await table.query(
+                IndexName=EPISODIC_RECENT_INDEX,
+                KeyConditionExpression=Key("pk").eq(pk) & Key("createdAt").gte(cutoffTime.isoformat()),
+                Limit=limit,
+                ScanIndexForward=False
+            )
+
+            return [self._fromItem(item) for item in response.get("Items", [])]
+
+        except Exception as e:
+            logger.error("episodic_retrieve_recent_error", error=str(e), tenantId=tenantContext.tenantId)
+            return []
 
     async def delete(self, recordId: str, tenantContext: TenantContext) -> bool:
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
             pk = f"TENANT#{tenantContext.tenantId}#USER#{tenantContext.userId}"
 
-            response = table.query(
-                KeyConditionExpression=Key("pk").eq(pk),
-                FilterExpression=Attr("id").eq(recordId),
+            # KEYS_ONLY index on id: a single-item read instead of filtering the user's partition
+            response = await table.query(
+                IndexName=EPISODIC_ID_INDEX,
+                KeyConditionExpression=Key("id").eq(recordId),
                 Limit=1
             )
 
             items = response.get("Items", [])
-            if not items:
+            if not items or items[0]["pk"] != pk:
                 return False
 
             item = items[0]
-            table.delete_item(Key={"pk": item["pk"], "sk": item["sk"]})
+            await table.delete_item(Key={"pk": item["pk"], "sk": item["sk"]})
             logger.info("episodic_memory_deleted", recordId=recordId)
             return True
 
@@ -195,22 +306,82 @@ class DynamoDBEpisodicMemory(BaseMemoryManager):
             logger.error("episodic_delete_error", error=str(e), recordId=recordId)
             return False
 
+    async def deleteRecord(self, record: EpisodicMemoryRecord) -> bool:
+        """Delete a record already in hand; its key is derivable, so no lookup is needed"""
+        table = await self._getTable()
+
+        try:
+            await table.delete_item(Key=self._keyFor(record))
+            logger.info("episodic_memory_deleted", recordId=record.id)
+            return True
+
+        except Exception as e:
+            logger.error("episodic_delete_error", error=str(e), recordId=record.id)
+            return False
+
     async def update(self, recordId: str, record: EpisodicMemoryRecord, tenantContext: TenantContext) -> bool:
-        await self.delete(recordId, tenantContext)
-        await self.store(record)
-        return True
+        """Update mutable fields in place with one UpdateItem
+
+        record must carry the original sessionId and createdAt, which form the sort key.
+        """
+        table = await self._getTable()
+
+        attributes = {
+            "content": record.content,
+            "outcome": record.outcome,
+            "confidenceScore": _toDecimal(record.confidenceScore),
+            "importance": _toDecimal(record.importance),
+            "toolsUsed": record.toolsUsed,
+            "tags": record.tags,
+            "contextData": record.contextData,
+            "updatedAt": datetime.utcnow().isoformat()
+        }
+        if record.sentiment:
+            attributes["sentiment"] = record.sentiment
+
+        try:
+            await table.update_item(
+                Key=self._keyFor(record, recordId),
+                UpdateExpression="SET " + ", ".join(f"#{name} = :{name}" for name in attributes),
+                ConditionExpression="attribute_exists(pk)",
+                ExpressionAttributeNames={f"#{name}": name for name in attributes},
+                ExpressionAttributeValues={f":{name}": value for name, value in attributes.items()}
+            )
+            logger.info("episodic_memory_updated", recordId=recordId)
+            return True
+
+        except Exception as e:
+            logger.error("episodic_update_error", error=str(e), recordId=recordId)
+            return False
 
     async def cleanup(self, tenantContext: TenantContext, olderThanDays: int) -> int:
+        """Prune low-importance records older than olderThanDays
+
+        Every item carries a ttl at episodicRetentionDays, so DynamoDB already expires
+        records past retention on its own; only shorter horizons need explicit deletes.
+        """
+        if olderThanDays >= settings.memory.episodicRetentionDays:
+            return 0
+
         cutoffTime = datetime.utcnow() - timedelta(days=olderThanDays)
         memories = await self.retrieve(tenantContext, limit=100)
+        toDelete = [m for m in memories if m.createdAt < cutoffTime and m.importance < 0.7]
 
-        deletedCount = 0
-        for memory in memories:
-            if memory.createdAt < cutoffTime and memory.importance < 0.7:
-                if await self.delete(memory.id, tenantContext):
-                    deletedCount += 1
+        if not toDelete:
+            return 0
 
-        return deletedCount
+        table = await self._getTable()
 
+        try:
+            async with table.batch_writer() as batch:
+                for memory in toDelete:
+                    await batch.delete_item(Key=self._keyFor(memory))
+
+            logger.info("episodic_memory_pruned", count=len(toDelete), tenantId=tenantContext.tenantId)
+            return len(toDelete)
+
+        except Exception as e:
+            logger.error("episodic_cleanup_error", error=str(e), tenantId=tenantContext.tenantId)
+            return 0
 
 dynamodbEpisodicMemory = DynamoDBEpisodicMemory()
@@ -1,4 +1,7 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import orjson
 from datetime import datetime
 from config.settings import settings
 from utils.logger import getLogger
@@ -9,23 +12,63 @@ from schemas import (
     EpisodicMemoryRecord,
     SemanticMemoryRecord
 )
-from memory.workingMemory.redisMemory import redisWorkingMemory
-from memory.episodicMemory.dynamodbMemory import dynamodbEpisodicMemory
-from memory.semanticMemory.vectorStore import vectorStore
-from memory.semanticMemory.knowledgeGraph import knowledgeGraph
-from memory.proceduralMemory.s3Storage import s3ProceduralMemory
+from memory.episodicMemory.dynamodbMemory import dynamodbEpisodicMemory, EPISODIC_CONTEXT_ATTRIBUTES
 from core.bedrockClient import bedrockClient
+from utils.batching import MicroBatcher
 
 logger = getLogger(__name__)
 
+EPISODIC_WRITE_BATCH_SIZE = 25
+EPISODIC_WRITE_MAX_WAIT_SECONDS = 0.05
+EPISODIC_WRITE_QUEUE_MAX_SIZE = 10_000
+EPISODIC_WRITE_RETRY_DELAY_SECONDS = 0.2
+
 
 class MemoryManager:
     def __init__(self):
-        self.workingMemory = redisWorkingMemory
+        # Episodic memory only needs boto3, which bedrockClient has already loaded. The
+        # other backends pull in redis, sentence-transformers/torch, asyncpg and
+        # opensearch, so they are imported on first use
         self.episodicMemory = dynamodbEpisodicMemory
-        self.semanticMemory = vectorStore
-        self.knowledgeGraph = knowledgeGraph
-        self.proceduralMemory = s3ProceduralMemory
+        self._workingMemory = None
+        self._semanticMemory = None
+        self._knowledgeGraph = None
+        self._proceduralMemory = None
+        self._episodicBatcher = MicroBatcher(
+            self._storeEpisodicBatch,
+            maxSize=EPISODIC_WRITE_BATCH_SIZE,
+            maxWaitSeconds=EPISODIC_WRITE_MAX_WAIT_SECONDS,
+            maxQueueSize=EPISODIC_WRITE_QUEUE_MAX_SIZE
+        )
+        self._episodicDropped = 0
+
+    @property
+    def workingMemory(self):
+        if self._workingMemory is None:
+            from memory.workingMemory.redisMemory import redisWorkingMemory
+            self._workingMemory = redisWorkingMemory
+        return self._workingMemory
+
+    @property
+    def semanticMemory(self):
+        if self._semanticMemory is None:
+            from memory.semanticMemory.vectorStore import vectorStore
+            self._semanticMemory = vectorStore
+        return self._semanticMemory
+
+    @property
+    def knowledgeGraph(self):
+        if self._knowledgeGraph is None:
+            from memory.semanticMemory.knowledgeGraph import knowledgeGraph
+            self._knowledgeGraph = knowledgeGraph
+        return self._knowledgeGraph
+
+    @property
+    def proceduralMemory(self):
+        if self._proceduralMemory is None:
+            from memory.proceduralMemory.s3Storage import s3ProceduralMemory
+            self._proceduralMemory = s3ProceduralMemory
+        return self._proceduralMemory
 
     async def storeInteraction(
         self,
@@ -52,7 +95,41 @@ class MemoryManager:
             confidenceScore=1.0
         )
 
-        return await self.episodicMemory.store(record)
+        await self._enqueueEpisodic(record)
+        return record.id
+
+    async def _enqueueEpisodic(self, record: EpisodicMemoryRecord):
+        """Hand a record to the write-behind batcher; it is persisted within one batch window
+
+        storeInteraction returns before the record is written, trading durability for
+        latency: records still queued when the process exits without close(), or that
+        fail their retry, are lost. Callers that need the write to land call flush().
+        """
+        await self._episodicBatcher.enqueue(record)
+
+    async def _storeEpisodicBatch(self, records: List[EpisodicMemoryRecord]) -> List[None]:
+        # Nobody awaits write-behind results, so failures are retried once and then
+        # logged here rather than returned to the batcher
+        try:
+            await self.episodicMemory.storeBatch(records)
+        except Exception:
+            await asyncio.sleep(EPISODIC_WRITE_RETRY_DELAY_SECONDS)
+            try:
+                await self.episodicMemory.storeBatch(records)
+            except Exception as e:
+                self._episodicDropped += len(records)
+                logger.error(
+                    "episodic_write_behind_dropped",
+                    error=str(e),
+                    count=len(records),
+                    totalDropped=self._episodicDropped
+                )
+
+        return [None] * len(records)
+
+    async def flush(self):
+        """Wait until every episodic record queued so far has been written"""
+        await self._episodicBatcher.drain()
 
     async def storeFact(
         self,
@@ -94,83 +171,139 @@ class MemoryManager:
             "totalTokens": 0
         }
 
-        workingCtx = await self.workingMemory.getAll(tenantContext, sessionId)
+        # The four stores are independent backends, so fetch them concurrently; working
+        # memory is awaited first because its size decides whether the others are still needed
+        episodicTask = asyncio.create_task(self.episodicMemory.retrieveBySession(
+            tenantContext,
+            sessionId,
+            limit=10,
+            projection=EPISODIC_CONTEXT_ATTRIBUTES
+        ))
+        semanticTask = asyncio.create_task(self.semanticMemory.search(
+            tenantContext,
+            query,
+            limit=settings.memory.topKSemanticRetrieval
+        ))
+        proceduralTask = asyncio.create_task(self.proceduralMemory.search(tenantContext, limit=5))
+
+        try:
+            workingCtx = await self.workingMemory.getAll(tenantContext, sessionId)
+        except BaseException:
+            for task in (episodicTask, semanticTask, proceduralTask):
+                task.cancel()
+            raise
+
         context["working"] = workingCtx
-        context["totalTokens"] += bedrockClient.countTokens(str(workingCtx))
+        context["totalTokens"] += self._countWorkingTokens(workingCtx)
 
-        if context["totalTokens"] < maxTokens:
-            recentEpisodic = await self.episodicMemory.retrieveBySession(
-                tenantContext,
-                sessionId,
-                limit=10
-            )
-            for memory in recentEpisodic:
-                tokens = bedrockClient.countTokens(memory.content)
-                if context["totalTokens"] + tokens < maxTokens:
-                    context["episodic"].append(memory.dict())
-                    context["totalTokens"] += tokens
-                else:
-                    break
-
-        if context["totalTokens"] < maxTokens * 0.7:
-            semanticMemories = await self.semanticMemory.search(
-                tenantContext,
-                query,
-                limit=settings.memory.topKSemanticRetrieval
+        # Working memory can use up the budget on its own; cancel lookups whose results could
+        # not be admitted, which saves the query embedding and vector search when still pending
+        if context["totalTokens"] >= maxTokens:
+            episodicTask.cancel()
+        if context["totalTokens"] >= maxTokens * 0.7:
+            semanticTask.cancel()
+
+        recentEpisodic, semanticMemories, proceduralPatterns = await asyncio.gather(
+            episodicTask, semanticTask, proceduralTask, return_exceptions=True
+        )
+
+        if isinstance(proceduralPatterns, BaseException):
+            raise proceduralPatterns
+
+        if not episodicTask.cancelled():
+            if isinstance(recentEpisodic, BaseException):
+                raise recentEpisodic
+            fitting, context["totalTokens"] = self._takeWithinBudget(
+                recentEpisodic, context["totalTokens"], maxTokens
             )
+            context["episodic"] = [memory.model_dump() for memory in fitting]
 
-            rankedMemories = self._rankMemories(semanticMemories, query)
+        if not semanticTask.cancelled() and context["totalTokens"] < maxTokens * 0.7:
+            if isinstance(semanticMemories, BaseException):
+                raise semanticMemories
+            if semanticMemories:
+                rankedMemories = self._rankMemories(semanticMemories, query)
 
-            for memory in rankedMemories:
-                tokens = bedrockClient.countTokens(memory.content)
-                if context["totalTokens"] + tokens < maxTokens:
-                    context["semantic"].append(memory.dict())
-                    context["totalTokens"] += tokens
-                else:
-                    break
+                fitting, context["totalTokens"] = self._takeWithinBudget(
+                    rankedMemories, context["totalTokens"], maxTokens
+                )
+                # Embeddings are only needed for search; copying them into the context would dwarf the text
+                context["semantic"] = [memory.model_dump(exclude={"embedding"}) for memory in fitting]
 
-        proceduralPatterns = await self.proceduralMemory.search(
-            tenantContext,
-            limit=5
-        )
         context["procedural"] = [p.name for p in proceduralPatterns[:3]]
 
         return context
 
+    def _countWorkingTokens(self, workingCtx: Dict[str, Any]) -> int:
+        """Token count of working memory, summed per entry
+
+        Counting entries separately lets the memoized counter reuse every entry
+        that did not change since the last turn instead of re-encoding the whole dict.
+        """
+        return sum(bedrockClient.countTokens(f"{key}={value}") for key, value in workingCtx.items())
+
+    def _takeWithinBudget(
+        self,
+        memories: List[Any],
+        usedTokens: int,
+        maxTokens: int
+    ) -> Tuple[List[Any], int]:
+        """Longest prefix of memories whose running token total stays below maxTokens"""
+        if not memories:
+            return [], usedTokens
+
+        counts = np.fromiter(
+            (bedrockClient.countTokens(memory.content) for memory in memories),
+            dtype=np.int64,
+            count=len(memories)
+        )
+        runningTotals = usedTokens + np.cumsum(counts)
+        cutoff = int(np.searchsorted(runningTotals, maxTokens, side="left"))
+
+        if cutoff == 0:
+            return [], usedTokens
+        return memories[:cutoff], int(runningTotals[cutoff - 1])
+
     def _rankMemories(
         self,
         memories: List[SemanticMemoryRecord],
         query: str
     ) -> List[SemanticMemoryRecord]:
-        now = datetime.utcnow()
+        if not memories:
+            return []
 
-        for memory in memories:
-            recencyScore = self._calculateRecencyScore(memory.createdAt, now)
-            importanceScore = memory.importance
-            confidenceScore = memory.confidenceScore
+        count = len(memories)
+        now = np.datetime64(datetime.utcnow(), "us")
+        createdAts = np.array([m.createdAt for m in memories], dtype="datetime64[us]")
+        importance = np.fromiter((m.importance for m in memories), dtype=np.float64, count=count)
+        confidence = np.fromiter((m.confidenceScore for m in memories), dtype=np.float64, count=count)
 
-            memory.contextData["relevanceScore"] = (
-                recencyScore * 0.3 +
-                importanceScore * 0.4 +
-                confidenceScore * 0.3
-            )
+        ageDays = (now - createdAts) / np.timedelta64(1, "D")
+        scores = self._recencyScores(ageDays) * 0.3 + importance * 0.4 + confidence * 0.3
+
+        for memory, score in zip(memories, scores.tolist()):
+            memory.contextData["relevanceScore"] = score
+
+        # Stable sort keeps the store's order among equal scores, as sorted() did
+        order = np.argsort(-scores, kind="stable")
+        return [memories[i] for i in order.tolist()]
+
+    def _recencyScores(self, ageDays: np.ndarray) -> np.ndarray:
+        decayThreshold = settings.memory.decayThresholdDays
 
-        return sorted(
-            memories,
-            key=lambda m: m.contextData.get("relevanceScore", 0),
-            reverse=True
+        return np.piecewise(
+            ageDays,
+            [ageDays < decayThreshold, (ageDays >= decayThreshold) & (ageDays < decayThreshold * 4)],
+            [
+                1.0,
+                lambda age: 1.0 - ((age - decayThreshold) / (decayThreshold * 3)) * 0.5,
+                lambda age: 0.5 - ((age - decayThreshold * 4) / (decayThreshold * 10)) * 0.4
+            ]
         )
 
     def _calculateRecencyScore(self, createdAt: datetime, now: datetime) -> float:
         age = (now - createdAt).total_seconds() / 86400
-        decayThreshold = settings.memory.decayThresholdDays
-
-        if age < decayThreshold:
-            return 1.0
-        elif age < decayThreshold * 4:
-            return 1.0 - ((age - decayThreshold) / (decayThreshold * 3)) * 0.5
-        else:
-            return 0.5 - ((age - decayThreshold * 4) / (decayThreshold * 10)) * 0.4
+        return float(self._recencyScores(np.array([age]))[0])
 
     async def consolidateMemories(
         self,
@@ -186,10 +319,13 @@ class MemoryManager:
         if len(episodicMemories) < 10:
             return {"consolidated": 0, "facts_extracted": 0}
 
+        maxChars = settings.memory.maxConsolidationContentChars
+        interactions = "\n---\n".join(m.content[:maxChars] for m in episodicMemories[:20])
+
         summaryPrompt = f"""
 Analyze these conversation interactions and extract key facts and insights:
 
-{[m.content for m in episodicMemories[:20]]}
+{interactions}
 
 Extract:
 1. User preferences
@@ -201,7 +337,7 @@ Format as JSON list of facts.
 """
 
         messages = bedrockClient.formatMessages(summaryPrompt)
-        response = bedrockClient.invokeModel(
+        response = await bedrockClient.invokeModelAsync(
             messages=messages,
             systemPrompt="You are a memory consolidation expert. Extract factual knowledge from conversations.",
             temperature=0.3,
@@ -210,29 +346,28 @@ Format as JSON list of facts.
 
         extractedText = bedrockClient.extractTextResponse(response)
 
-        import json
         try:
-            facts = json.loads(extractedText)
-            factsStored = 0
-
-            for fact in facts:
-                if isinstance(fact, dict):
-                    await self.storeFact(
-                        tenantContext,
-                        sessionId,
-                        fact.get("fact", str(fact)),
-                        source=MemorySource.AGENT_INFERRED,
-                        importance=fact.get("importance", 0.7),
-                        tags=fact.get("tags", [])
-                    )
-                    factsStored += 1
-
-            return {"consolidated": len(episodicMemories), "facts_extracted": factsStored}
-
-        except json.JSONDecodeError:
+            facts = orjson.loads(extractedText)
+        except orjson.JSONDecodeError:
             logger.error("memory_consolidation_parse_error", response=extractedText)
             return {"consolidated": 0, "facts_extracted": 0}
 
+        # Each fact is an independent embed + index write, so they are stored concurrently
+        factRecords = [fact for fact in facts if isinstance(fact, dict)]
+        await asyncio.gather(*[
+            self.storeFact(
+                tenantContext,
+                sessionId,
+                fact.get("fact", str(fact)),
+                source=MemorySource.AGENT_INFERRED,
+                importance=fact.get("importance", 0.7),
+                tags=fact.get("tags", [])
+            )
+            for fact in factRecords
+        ])
+
+        return {"consolidated": len(episodicMemories), "facts_extracted": len(factRecords)}
+
     async def performDecay(self, tenantContext: TenantContext) -> int:
         decayedCount = await self.episodicMemory.cleanup(
             tenantContext,
@@ -292,6 +427,15 @@ Format as JSON list of facts.
         )
         return messages
 
+    async def warmup(self):
+        await self.episodicMemory.warmup()
+
+    async def close(self):
+        await self._episodicBatcher.close()
+        # Backends that were never loaded have nothing open to close
+        backends = [self._workingMemory, self.episodicMemory, self._semanticMemory, self._proceduralMemory]
+        await asyncio.gather(*[backend.close() for backend in backends if backend is not None])
+
     async def clearSession(
         self,
         tenantContext: TenantContext,
@@ -1,112 +1,242 @@
-import boto3
-import json
-from typing import List, Optional
+import asyncio
+import zlib
+import orjson
+from contextlib import AsyncExitStack
+from typing import Any, List, Optional
 from datetime import datetime
 from decimal import Decimal
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.types import Binary
 from config.settings import settings
+from utils.awsClients import getAioSession, getClientConfig
 from utils.logger import getLogger
+from utils.batching import MicroBatcher
+from utils.cache import LRUCache
 from utils.exceptions import MemoryError
-from utils.serialization import DecimalEncoder
+from utils.serialization import orjsonDefault
 from schemas import ProceduralMemoryRecord, TenantContext
 
 logger = getLogger(__name__)
 
 
+PROCEDURAL_METADATA_TABLE = "aceProceduralMetadata"
+PROCEDURAL_TENANT_INDEX = "TenantUpdatedAtIndex"
+PROCEDURAL_WRITE_BATCH_SIZE = 25
+PROCEDURAL_WRITE_MAX_WAIT_SECONDS = 0.01
+PROCEDURAL_METADATA_CACHE_SIZE = 4096
+PROCEDURAL_METADATA_CACHE_TTL_SECONDS = 30
+# Compressed workflows up to this size live on the metadata item (400 KB cap, with headroom)
+PROCEDURAL_INLINE_MAX_BYTES = 350_000
+PROCEDURAL_INLINE_COMPRESSION_LEVEL = 6
+# Larger inline items are still served from DynamoDB, just not held in the metadata cache
+PROCEDURAL_METADATA_CACHE_MAX_BLOB_BYTES = 64 * 1024
+PROCEDURAL_SEARCH_ATTRIBUTES = (
+    "id", "tenantId", "name", "description", "s3Key", "successCount",
+    "failureCount", "avgExecutionTimeMs", "tags", "createdAt", "updatedAt"
+)
+
+
 class S3ProceduralMemory:
     def __init__(self):
         self._s3 = None
-        self._dynamodb = None
         self._metaTable = None
+        self._asyncLoop = None
+        self._exitStack = None
         self.bucket = settings.s3.bucketProcedural
-
-    def _getS3(self):
-        if not self._s3:
-            self._s3 = boto3.client(
-                "s3",
-                region_name=settings.aws.region,
-                aws_access_key_id=settings.aws.accessKeyId,
-                aws_secret_access_key=settings.aws.secretAccessKey
-            )
+        self._metadataCache = LRUCache(PROCEDURAL_METADATA_CACHE_SIZE, PROCEDURAL_METADATA_CACHE_TTL_SECONDS)
+        self._writeBatcher = MicroBatcher(
+            self._storeBatch,
+            maxSize=PROCEDURAL_WRITE_BATCH_SIZE,
+            maxWaitSeconds=PROCEDURAL_WRITE_MAX_WAIT_SECONDS
+        )
+
+    async def _openAsyncResources(self):
+        """Open the aioboto3 S3 client and metadata table once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._s3 and self._asyncLoop is loop:
+            return
+
+        session = getAioSession()
+        exitStack = AsyncExitStack()
+
+        s3 = await exitStack.enter_async_context(session.client("s3", config=getClientConfig()))
+
+        resourceArgs = {"config": getClientConfig()}
+        if settings.dynamodb.endpointUrl:
+            resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
+        dynamodb = await exitStack.enter_async_context(session.resource("dynamodb", **resourceArgs))
+        table = await dynamodb.Table(PROCEDURAL_METADATA_TABLE)
+
+        if self._s3 and self._asyncLoop is loop:
+            # Another coroutine opened the resources while this one was connecting
+            await exitStack.aclose()
+            return
+
+        self._s3 = s3
+        self._metaTable = table
+        self._asyncLoop = loop
+        self._exitStack = exitStack
+
+    async def _getS3(self):
+        await self._openAsyncResources()
         return self._s3
 
-    def _getDynamoDB(self):
-        if not self._dynamodb:
-            resourceArgs = {
-                "region_name": settings.aws.region,
-                "aws_access_key_id": settings.aws.accessKeyId,
-                "aws_secret_access_key": settings.aws.secretAccessKey
-            }
-            if settings.dynamodb.endpointUrl:
-                resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
-
-            self._dynamodb = boto3.resource("dynamodb", **resourceArgs)
-            self._metaTable = self._dynamodb.Table("aceProceduralMetadata")
+    async def _getDynamoDB(self):
+        await self._openAsyncResources()
         return self._metaTable
 
+    async def close(self):
+        await self._writeBatcher.close()
+        if self._exitStack:
+            await self._exitStack.aclose()
+            self._s3 = None
+            self._metaTable = None
+            self._asyncLoop = None
+            self._exitStack = None
+
+    async def _getMetadata(self, recordId: str) -> Optional[dict]:
+        """Metadata item for recordId, served from a short-lived in-process cache when hot"""
+        item = self._metadataCache.get(recordId)
+        if item is not None:
+            return item
+
+        table = await self._getDynamoDB()
+        response = await table.get_item(Key={"id": recordId})
+        item = response.get("Item")
+        if item is None:
+            return None
+
+        blob = item.get("workflowBlob")
+        if blob is None or len(blob.value) <= PROCEDURAL_METADATA_CACHE_MAX_BLOB_BYTES:
+            self._metadataCache.set(recordId, item)
+        return item
+
     def _buildS3Key(self, tenantId: str, recordId: str) -> str:
         return f"{tenantId}/procedural/{recordId}.json"
 
-    async def store(self, record: ProceduralMemoryRecord) -> str:
-        s3 = self._getS3()
-        table = self._getDynamoDB()
+    def _workflowBody(self, record: ProceduralMemoryRecord) -> bytes:
+        return orjson.dumps({
+            "id": record.id,
+            "name": record.name,
+            "description": record.description,
+            "workflow": record.workflow,
+            "createdAt": record.createdAt.isoformat(),
+            "updatedAt": record.updatedAt.isoformat()
+        }, default=orjsonDefault)
 
-        s3Key = self._buildS3Key(record.tenantId, record.id)
+    def _inlineBlob(self, body: bytes) -> Optional[bytes]:
+        """Compressed body if it fits on the metadata item, else None"""
+        # Workflow JSON rarely compresses past 4x, so larger bodies skip the attempt
+        if len(body) > PROCEDURAL_INLINE_MAX_BYTES * 4:
+            return None
+        blob = zlib.compress(body, PROCEDURAL_INLINE_COMPRESSION_LEVEL)
+        return blob if len(blob) <= PROCEDURAL_INLINE_MAX_BYTES else None
 
-        workflowData = {
+    def _metadataItem(
+        self,
+        record: ProceduralMemoryRecord,
+        s3Key: Optional[str],
+        blob: Optional[bytes] = None
+    ) -> dict:
+        item = {
             "id": record.id,
+            "tenantId": record.tenantId,
             "name": record.name,
             "description": record.description,
-            "workflow": record.workflow,
+            "successCount": record.successCount,
+            "failureCount": record.failureCount,
+            "avgExecutionTimeMs": Decimal(str(record.avgExecutionTimeMs)),
+            "tags": record.tags,
             "createdAt": record.createdAt.isoformat(),
             "updatedAt": record.updatedAt.isoformat()
         }
 
-        try:
-            s3.put_object(
-                Bucket=self.bucket,
-                Key=s3Key,
-                Body=json.dumps(workflowData, cls=DecimalEncoder),
-                ContentType="application/json"
-            )
+        if blob is not None:
+            item["workflowBlob"] = Binary(blob)
+        else:
+            item["s3Key"] = s3Key
 
-            table.put_item(Item={
-                "id": record.id,
-                "tenantId": record.tenantId,
-                "name": record.name,
-                "description": record.description,
-                "s3Key": s3Key,
-                "successCount": record.successCount,
-                "failureCount": record.failureCount,
-                "avgExecutionTimeMs": record.avgExecutionTimeMs,
-                "tags": record.tags,
-                "createdAt": record.createdAt.isoformat(),
-                "updatedAt": record.updatedAt.isoformat()
-            })
-
-            logger.info("procedural_memory_stored", recordId=record.id, s3Key=s3Key)
-            return record.id
+        return item
+
+    async def store(self, record: ProceduralMemoryRecord) -> str:
+        """Store a workflow; concurrent calls are coalesced into one batched write"""
+        return await self._writeBatcher.submit(record)
+
+    async def _storeBatch(self, records: List[ProceduralMemoryRecord]) -> List[Any]:
+        """Write a batch of workflows with one BatchWriteItem pass
+
+        Small workflows are stored compressed on the metadata item itself; larger ones
+        are uploaded to S3 concurrently first, and their metadata is only written once
+        the object exists.
+        """
+        s3 = await self._getS3()
+        table = await self._getDynamoDB()
+
+        placements = []
+        uploadsPending = []
+        for record in records:
+            body = self._workflowBody(record)
+            blob = self._inlineBlob(body)
+            if blob is not None:
+                placements.append((record, None, blob))
+            else:
+                s3Key = self._buildS3Key(record.tenantId, record.id)
+                placements.append((record, s3Key, None))
+                uploadsPending.append(s3.put_object(
+                    Bucket=self.bucket,
+                    Key=s3Key,
+                    Body=body,
+                    ContentType="application/json"
+                ))
+
+        uploads = iter(await asyncio.gather(*uploadsPending, return_exceptions=True))
+
+        results: List[Any] = []
+        writable = []
+        for record, s3Key, blob in placements:
+            upload = next(uploads) if s3Key else None
+            if isinstance(upload, Exception):
+                logger.error("procedural_store_error", error=str(upload), recordId=record.id)
+                results.append(MemoryError(f"Failed to store procedural memory: {str(upload)}", "procedural"))
+            else:
+                writable.append((record, s3Key, blob))
+                results.append(record.id)
+
+        if not writable:
+            return results
+
+        try:
+            async with table.batch_writer(overwrite_by_pkeys=["id"]) as batch:
+                for record, s3Key, blob in writable:
+                    await batch.put_item(Item=self._metadataItem(record, s3Key, blob))
 
         except Exception as e:
-            logger.error("procedural_store_error", error=str(e), recordId=record.id)
-            raise MemoryError(f"Failed to store procedural memory: {str(e)}", "procedural")
+            logger.error("procedural_batch_store_error", error=str(e), count=len(writable))
+            failure = MemoryError(f"Failed to store procedural memory: {str(e)}", "procedural")
+            return [failure if isinstance(result, str) else result for result in results]
 
-    async def retrieve(self, recordId: str, tenantContext: TenantContext) -> Optional[ProceduralMemoryRecord]:
-        s3 = self._getS3()
-        table = self._getDynamoDB()
+        for record, _, _ in writable:
+            self._metadataCache.pop(record.id)
 
+        logger.info("procedural_memory_stored", count=len(writable), uploaded=len(uploadsPending))
+        return results
+
+    async def retrieve(self, recordId: str, tenantContext: TenantContext) -> Optional[ProceduralMemoryRecord]:
         try:
-            response = table.get_item(Key={"id": recordId})
-            if "Item" not in response:
+            item = await self._getMetadata(recordId)
+            if item is None:
                 return None
 
-            item = response["Item"]
-
             if item["tenantId"] != tenantContext.tenantId:
                 raise MemoryError("Access denied to procedural memory", "procedural")
 
-            s3Response = s3.get_object(Bucket=self.bucket, Key=item["s3Key"])
-            workflowData = json.loads(s3Response["Body"].read())
+            if "workflowBlob" in item:
+                workflowData = orjson.loads(zlib.decompress(item["workflowBlob"].value))
+            else:
+                s3 = await self._getS3()
+                s3Response = await s3.get_object(Bucket=self.bucket, Key=item["s3Key"])
+                async with s3Response["Body"] as body:
+                    workflowData = orjson.loads(await body.read())
 
             record = ProceduralMemoryRecord(
                 id=item["id"],
@@ -114,7 +244,7 @@ class S3ProceduralMemory:
                 name=item["name"],
                 description=item["description"],
                 workflow=workflowData["workflow"],
-                s3Key=item["s3Key"],
+                s3Key=item.get("s3Key", ""),
                 successCount=item.get("successCount", 0),
                 failureCount=item.get("failureCount", 0),
                 avgExecutionTimeMs=item.get("avgExecutionTimeMs", 0.0),
@@ -137,7 +267,7 @@ class S3ProceduralMemory:
         minSuccessRate: Optional[float] = None,
         limit: int = 20
     ) -> List[ProceduralMemoryRecord]:
-        table = self._getDynamoDB()
+        table = await self._getDynamoDB()
 
         try:
             filterExpr = None
@@ -155,15 +285,22 @@ class S3ProceduralMemory:
                 successFilter = Attr("successCount").gte(Attr("failureCount") * minSuccessRate)
                 filterExpr = filterExpr & successFilter if filterExpr else successFilter
 
-            scanParams = {
-                "FilterExpression": Attr("tenantId").eq(tenantContext.tenantId),
+            # (tenantId, updatedAt) index: reads only this tenant's items, most recently updated first
+            queryParams = {
+                "IndexName": PROCEDURAL_TENANT_INDEX,
+                "KeyConditionExpression": Key("tenantId").eq(tenantContext.tenantId),
+                "ScanIndexForward": False,
                 "Limit": limit
             }
 
             if filterExpr:
-                scanParams["FilterExpression"] = scanParams["FilterExpression"] & filterExpr
+                queryParams["FilterExpression"] = filterExpr
 
-            response = table.scan(**scanParams)
+            # Search results carry no workflow, so leave inline workflow blobs on the server
+            queryParams["ProjectionExpression"] = ", ".join(f"#{name}" for name in PROCEDURAL_SEARCH_ATTRIBUTES)
+            queryParams["ExpressionAttributeNames"] = {f"#{name}": name for name in PROCEDURAL_SEARCH_ATTRIBUTES}
+
+            response = await table.query(**queryParams)
             items = response.get("Items", [])
 
             records = []
@@ -174,7 +311,7 @@ class S3ProceduralMemory:
                     name=item["name"],
                     description=item["description"],
                     workflow=[],
-                    s3Key=item["s3Key"],
+                    s3Key=item.get("s3Key", ""),
                     successCount=item.get("successCount", 0),
                     failureCount=item.get("failureCount", 0),
                     avgExecutionTimeMs=item.get("avgExecutionTimeMs", 0.0),
@@ -197,7 +334,7 @@ class S3ProceduralMemory:
         executionTimeMs: int,
         tenantContext: TenantContext
     ) -> bool:
-        table = self._getDynamoDB()
+        table = await self._getDynamoDB()
 
         try:
             if success:
@@ -209,7 +346,7 @@ class S3ProceduralMemory:
             else:
                 updateExpr = "SET failureCount = failureCount + :inc, updatedAt = :now"
 
-            table.update_item(
+            await table.update_item(
                 Key={"id": recordId},
                 UpdateExpression=updateExpr,
                 ExpressionAttributeValues={
@@ -220,6 +357,7 @@ class S3ProceduralMemory:
                 ConditionExpression=Attr("tenantId").eq(tenantContext.tenantId)
             )
 
+            self._metadataCache.pop(recordId)
             logger.info("procedural_stats_updated", recordId=recordId, success=success)
             return True
 
@@ -228,21 +366,21 @@ class S3ProceduralMemory:
             return False
 
     async def delete(self, recordId: str, tenantContext: TenantContext) -> bool:
-        s3 = self._getS3()
-        table = self._getDynamoDB()
+        s3 = await self._getS3()
+        table = await self._getDynamoDB()
 
         try:
-            response = table.get_item(Key={"id": recordId})
-            if "Item" not in response:
+            item = await self._getMetadata(recordId)
+            if item is None:
                 return False
 
-            item = response["Item"]
-
             if item["tenantId"] != tenantContext.tenantId:
                 return False
 
-            s3.delete_object(Bucket=self.bucket, Key=item["s3Key"])
-            table.delete_item(Key={"id": recordId})
+            if item.get("s3Key"):
+                await s3.delete_object(Bucket=self.bucket, Key=item["s3Key"])
+            await table.delete_item(Key={"id": recordId})
+            self._metadataCache.pop(recordId)
 
             logger.info("procedural_memory_deleted", recordId=recordId)
             return True
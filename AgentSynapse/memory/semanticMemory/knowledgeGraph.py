@@ -263,7 +263,10 @@ class KnowledgeGraph:
             sql += f" AND entity_name ILIKE ${paramCount}"
             params.append(f"%{namePattern}%")
 
-        sql += f" ORDER BY created_at DESC LIMIT {limit}"
+        # Bound rather than interpolated, so each filter combination is one cached prepared statement
+        paramCount += 1
+        sql += f" ORDER BY created_at DESC LIMIT ${paramCount}"
+        params.append(limit)
 
         async with pool.acquire() as conn:
             try:
@@ -1,38 +1,99 @@
+import asyncio
+import hashlib
+import time
 from typing import List, Dict, Any, Optional
-from opensearchpy import AsyncOpenSearch, RequestsHttpConnection
+import numpy as np
+from opensearchpy import AsyncOpenSearch, AsyncHttpConnection
 from sentence_transformers import SentenceTransformer
 from config.settings import settings
 from utils.logger import getLogger
+from utils.batching import MicroBatcher
+from utils.cache import LRUCache
 from utils.exceptions import MemoryError
 from schemas import SemanticMemoryRecord, TenantContext, MemorySource, MemoryType
+from memory.workingMemory.redisMemory import redisWorkingMemory
 from datetime import datetime
 
 logger = getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_CACHE_TTL_SECONDS = 86400
+EMBEDDING_BATCH_MAX_SIZE = 32
+EMBEDDING_BATCH_MAX_WAIT_SECONDS = 0.005
+EMBEDDING_LOCAL_CACHE_SIZE = 10_000
+EMBEDDING_BULK_BATCH_SIZE = 64
+EMBEDDING_QUANTIZATION_SCALE = 127
+OPENSEARCH_POOL_MAX_SIZE = 50
+FILTERED_KNN_ENGINES = frozenset({"lucene", "faiss"})
+# Recorded when the mapping cannot be read; searches use script_score until a retry succeeds
+KNN_ENGINE_UNKNOWN = "unknown"
+KNN_ENGINE_RETRY_SECONDS = 60
+
+
+def quantizeEmbedding(embedding: List[float]) -> List[int]:
+    """Symmetric per-vector int8 quantization for byte kNN vectors
+
+    Scaling each vector by 127 / max|v| preserves its direction, so cosine
+    similarity is unaffected apart from rounding.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    peak = float(np.max(np.abs(vector)))
+    if peak == 0:
+        return [0] * len(vector)
+    return np.rint(vector * (EMBEDDING_QUANTIZATION_SCALE / peak)).astype(np.int8).tolist()
+
 
 class VectorStore:
     def __init__(self):
         self._client = None
         self._encoder = None
+        self._embeddingBatcher = MicroBatcher(
+            self._encodeBatch,
+            maxSize=EMBEDDING_BATCH_MAX_SIZE,
+            maxWaitSeconds=EMBEDDING_BATCH_MAX_WAIT_SECONDS
+        )
+        # float32 arrays (1.5 KB each) in front of Redis, so repeated texts skip the round trip too
+        self._embeddingCache = LRUCache(EMBEDDING_LOCAL_CACHE_SIZE)
+        self._knnEngine = None
+        self._knnEngineRetryAt = 0.0
         self.indexName = settings.opensearch.indexSemantic
 
     def _getClient(self) -> AsyncOpenSearch:
         if not self._client:
             endpoint = settings.opensearch.endpoint
             use_ssl = endpoint.startswith("https")
+            # aiohttp-backed connections, so concurrent searches overlap on the event loop
+            # rather than serialising through a synchronous requests session
             self._client = AsyncOpenSearch(
                 hosts=[endpoint],
                 use_ssl=use_ssl,
                 verify_certs=use_ssl,
-                connection_class=RequestsHttpConnection
+                connection_class=AsyncHttpConnection,
+                maxsize=OPENSEARCH_POOL_MAX_SIZE
             )
         return self._client
 
     def _getEncoder(self) -> SentenceTransformer:
         if not self._encoder:
-            self._encoder = SentenceTransformer('all-MiniLM-L6-v2')
+            self._encoder = SentenceTransformer(EMBEDDING_MODEL_NAME)
         return self._encoder
 
+    def _warmEncoder(self):
+        # One encode forces weight paging and backend kernel setup, not just construction
+        self._getEncoder().encode("warmup")
+
+    async def warmup(self):
+        """Load the embedding model and build the OpenSearch client before the first request needs them"""
+        self._getClient()
+        await asyncio.to_thread(self._warmEncoder)
+        logger.info("embedding_model_loaded", model=EMBEDDING_MODEL_NAME)
+
+    async def close(self):
+        await self._embeddingBatcher.close()
+        if self._client:
+            await self._client.close()
+            self._client = None
+
     async def _ensureIndex(self):
         client = self._getClient()
 
@@ -53,10 +114,11 @@ class VectorStore:
                     "embedding": {
                         "type": "knn_vector",
                         "dimension": 384,
+                        "data_type": "byte",
                         "method": {
                             "name": "hnsw",
                             "space_type": "cosinesimil",
-                            "engine": "nmslib"
+                            "engine": "lucene"
                         }
                     },
                     "source": {"type": "keyword"},
@@ -75,20 +137,76 @@ class VectorStore:
             exists = await client.indices.exists(index=self.indexName)
             if not exists:
                 await client.indices.create(index=self.indexName, body=indexBody)
+                self._knnEngine = "lucene"
                 logger.info("opensearch_index_created", index=self.indexName)
+            elif self._knnEngine in (None, KNN_ENGINE_UNKNOWN):
+                self._knnEngine = await self._readKnnEngine(client)
         except Exception as e:
             logger.error("opensearch_index_creation_error", error=str(e))
+            if self._knnEngine in (None, KNN_ENGINE_UNKNOWN):
+                self._knnEngine = KNN_ENGINE_UNKNOWN
+                self._knnEngineRetryAt = time.monotonic() + KNN_ENGINE_RETRY_SECONDS
+
+    async def _readKnnEngine(self, client: AsyncOpenSearch) -> str:
+        """Engine of the existing embedding field; indexes created before lucene default to nmslib"""
+        response = await client.indices.get_mapping(index=self.indexName)
+        mapping = next(iter(response.values()))["mappings"]
+        engine = mapping.get("properties", {}).get("embedding", {}).get("method", {}).get("engine", "nmslib")
+
+        if engine not in FILTERED_KNN_ENGINES:
+            logger.error(
+                "opensearch_index_engine_unsupported",
+                index=self.indexName,
+                engine=engine,
+                fallback="script_score"
+            )
+        return engine
 
-    def _generateEmbedding(self, text: str) -> List[float]:
+    async def _embedMany(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts in one batched pass off the event loop, encoding each distinct text once"""
+        uniqueTexts = list(dict.fromkeys(texts))
+        encoder = self._getEncoder()
+        vectors = await asyncio.to_thread(
+            encoder.encode,
+            uniqueTexts,
+            batch_size=EMBEDDING_BULK_BATCH_SIZE,
+            show_progress_bar=False
+        )
+        byText = dict(zip(uniqueTexts, vectors.tolist()))
+        return [byText[text] for text in texts]
+
+    async def _encodeBatch(self, texts: List[str]) -> List[List[float]]:
+        """One forward pass for every text that missed the cache in the batching window"""
         encoder = self._getEncoder()
-        return encoder.encode(text).tolist()
+        vectors = await asyncio.to_thread(encoder.encode, texts, batch_size=len(texts))
+        return vectors.tolist()
+
+    async def embed(self, text: str) -> List[float]:
+        """Encode text off the event loop, reusing float32 vectors cached in process and in Redis"""
+        cacheKey = f"emb:{EMBEDDING_MODEL_NAME}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+        vector = self._embeddingCache.get(cacheKey)
+        if vector is not None:
+            return vector.tolist()
+
+        cached = await redisWorkingMemory.getBytes(cacheKey)
+        if cached:
+            vector = np.frombuffer(cached, dtype=np.float32)
+            self._embeddingCache.set(cacheKey, vector)
+            return vector.tolist()
+
+        embedding = await self._embeddingBatcher.submit(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._embeddingCache.set(cacheKey, vector)
+        await redisWorkingMemory.setBytes(cacheKey, vector.tobytes(), EMBEDDING_CACHE_TTL_SECONDS)
+        return embedding
 
     async def store(self, record: SemanticMemoryRecord) -> str:
         await self._ensureIndex()
         client = self._getClient()
 
         if not record.embedding:
-            record.embedding = self._generateEmbedding(record.content)
+            record.embedding = await self.embed(record.content)
 
         doc = {
             "id": record.id,
@@ -96,7 +214,7 @@ class VectorStore:
             "userId": record.userId,
             "sessionId": record.sessionId,
             "content": record.content,
-            "embedding": record.embedding,
+            "embedding": quantizeEmbedding(record.embedding),
             "source": record.source.value,
             "confidenceScore": record.confidenceScore,
             "importance": record.importance,
@@ -126,10 +244,17 @@ class VectorStore:
         tenantContext: TenantContext,
         query: str,
         limit: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        queryEmbedding: Optional[List[float]] = None
     ) -> List[SemanticMemoryRecord]:
+        if self._knnEngine is None or (
+            self._knnEngine == KNN_ENGINE_UNKNOWN and time.monotonic() >= self._knnEngineRetryAt
+        ):
+            await self._ensureIndex()
+
         client = self._getClient()
-        queryEmbedding = self._generateEmbedding(query)
+        if queryEmbedding is None:
+            queryEmbedding = await self.embed(query)
 
         must = [
             {"term": {"tenantId": tenantContext.tenantId}},
@@ -146,9 +271,29 @@ class VectorStore:
             if filters.get("sessionId"):
                 must.append({"term": {"sessionId": filters["sessionId"]}})
 
-        searchBody = {
-            "size": limit,
-            "query": {
+        queryVector = quantizeEmbedding(queryEmbedding)
+
+        if self._knnEngine in FILTERED_KNN_ENGINES:
+            # Filtered HNSW traversal on the lucene engine, instead of script-scoring every
+            # document that matches the tenant filter
+            knnQuery = {
+                "knn": {
+                    "embedding": {
+                        "vector": queryVector,
+                        "k": limit,
+                        "filter": {
+                            "bool": {
+                                "must": must
+                            }
+                        }
+                    }
+                }
+            }
+        else:
+            # nmslib applies knn filters after the top-k is chosen, which can drop every
+            # tenant match, so indexes not yet reindexed (or whose engine could not be
+            # read) keep the exact scoring query
+            knnQuery = {
                 "script_score": {
                     "query": {
                         "bool": {
@@ -160,12 +305,18 @@ class VectorStore:
                         "lang": "knn",
                         "params": {
                             "field": "embedding",
-                            "query_value": queryEmbedding,
+                            "query_value": queryVector,
                             "space_type": "cosinesimil"
                         }
                     }
                 }
             }
+
+        searchBody = {
+            "size": limit,
+            # Stored vectors are quantized and unused by callers; leave them on the server
+            "_source": {"excludes": ["embedding"]},
+            "query": knnQuery
         }
 
         try:
@@ -179,14 +330,14 @@ class VectorStore:
 
             for hit in hits:
                 source = hit["_source"]
-                record = SemanticMemoryRecord(
+                # Documents were validated when indexed; skip revalidation on the read path
+                record = SemanticMemoryRecord.model_construct(
                     id=source["id"],
                     tenantId=source["tenantId"],
                     userId=source["userId"],
                     sessionId=source["sessionId"],
                     memoryType=MemoryType.SEMANTIC,
                     content=source["content"],
-                    embedding=source["embedding"],
                     source=MemorySource(source["source"]),
                     confidenceScore=source["confidenceScore"],
                     importance=source["importance"],
@@ -221,11 +372,14 @@ class VectorStore:
         await self._ensureIndex()
         client = self._getClient()
 
+        missing = [record for record in records if not record.embedding]
+        if missing:
+            embeddings = await self._embedMany([record.content for record in missing])
+            for record, embedding in zip(missing, embeddings):
+                record.embedding = embedding
+
         actions = []
         for record in records:
-            if not record.embedding:
-                record.embedding = self._generateEmbedding(record.content)
-
             action = {
                 "index": {
                     "_index": self.indexName,
@@ -239,7 +393,7 @@ class VectorStore:
                 "userId": record.userId,
                 "sessionId": record.sessionId,
                 "content": record.content,
-                "embedding": record.embedding,
+                "embedding": quantizeEmbedding(record.embedding),
                 "source": record.source.value,
                 "confidenceScore": record.confidenceScore,
                 "importance": record.importance,
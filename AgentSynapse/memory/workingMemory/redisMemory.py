@@ -9,24 +9,46 @@ from schemas import TenantContext
 
 logger = getLogger(__name__)
 
+REDIS_MAX_CONNECTIONS = 100
+# At the connection cap commands wait this long for a free connection instead of failing
+REDIS_POOL_TIMEOUT_SECONDS = 5
+
 
 class RedisWorkingMemory:
     def __init__(self):
         self._pool = None
         self._redis = None
+        self._binaryPool = None
+        self._binaryRedis = None
 
     async def _getClient(self):
         if not self._redis:
-            self._pool = redis.ConnectionPool(
+            self._pool = redis.BlockingConnectionPool(
                 host=settings.redis.host,
                 port=settings.redis.port,
                 db=settings.redis.db,
                 password=settings.redis.password,
-                decode_responses=True
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_POOL_TIMEOUT_SECONDS
             )
             self._redis = redis.Redis(connection_pool=self._pool)
         return self._redis
 
+    async def _getBinaryClient(self):
+        # Separate client without decode_responses for raw byte payloads
+        if not self._binaryRedis:
+            self._binaryPool = redis.BlockingConnectionPool(
+                host=settings.redis.host,
+                port=settings.redis.port,
+                db=settings.redis.db,
+                password=settings.redis.password,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_POOL_TIMEOUT_SECONDS
+            )
+            self._binaryRedis = redis.Redis(connection_pool=self._binaryPool)
+        return self._binaryRedis
+
     def _buildKey(self, tenantId: str, userId: str, sessionId: str, key: str) -> str:
         return f"{tenantId}:{userId}:{sessionId}:{key}"
 
@@ -191,10 +213,57 @@ class RedisWorkingMemory:
             logger.error("redis_getlist_error", key=fullKey, error=str(e))
             return []
 
+    async def getCachedResult(self, cacheKey: str) -> Optional[Any]:
+        """Read a cross-session result cache entry; cache failures are treated as misses"""
+        client = await self._getClient()
+
+        try:
+            value = await client.get(cacheKey)
+            return json.loads(value) if value else None
+
+        except Exception as e:
+            logger.warning("redis_cached_result_get_error", key=cacheKey, error=str(e))
+            return None
+
+    async def setCachedResult(self, cacheKey: str, value: Any, ttl: int) -> bool:
+        client = await self._getClient()
+
+        try:
+            await client.setex(cacheKey, ttl, json.dumps(value, cls=DecimalEncoder))
+            return True
+
+        except Exception as e:
+            logger.warning("redis_cached_result_set_error", key=cacheKey, error=str(e))
+            return False
+
+    async def getBytes(self, cacheKey: str) -> Optional[bytes]:
+        client = await self._getBinaryClient()
+
+        try:
+            return await client.get(cacheKey)
+
+        except Exception as e:
+            logger.warning("redis_get_bytes_error", key=cacheKey, error=str(e))
+            return None
+
+    async def setBytes(self, cacheKey: str, value: bytes, ttl: int) -> bool:
+        client = await self._getBinaryClient()
+
+        try:
+            await client.setex(cacheKey, ttl, value)
+            return True
+
+        except Exception as e:
+            logger.warning("redis_set_bytes_error", key=cacheKey, error=str(e))
+            return False
+
     async def close(self):
         if self._redis:
             await self._redis.close()
             await self._pool.disconnect()
+        if self._binaryRedis:
+            await self._binaryRedis.close()
+            await self._binaryPool.disconnect()
 
 
 redisWorkingMemory = RedisWorkingMemory()
@@ -94,6 +94,7 @@ class AgentConfig(BaseSchema):
     toolIds: List[str] = Field(default_factory=list)
     tenantContext: TenantContext
     isAsync: bool = False
+    parallelToolExecution: bool = True
     timeoutSeconds: int = 300
     customSettings: Dict[str, Any] = Field(default_factory=dict)
 
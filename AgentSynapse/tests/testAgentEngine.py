@@ -1,5 +1,5 @@
 import pytest
-from schemas import AgentConfig, AgentType, TenantContext
+from schemas import AgentConfig, AgentExecution, AgentType, TenantContext
 from core.agentEngine import agentEngine
 
 
@@ -61,8 +61,45 @@ def testSystemPromptBuilding(agentConfig):
         "procedural": ["data-analysis-workflow", "dashboard-creation"]
     }
 
-    prompt = agentEngine._buildSystemPrompt(agentConfig, context)
+    staticPrompt, dynamicPrompt = agentEngine._buildSystemPrompt(agentConfig, context)
 
-    assert "helpful test assistant" in prompt
-    assert "dark mode" in prompt
-    assert "data-analysis-workflow" in prompt
+    assert staticPrompt == agentConfig.systemPrompt
+    assert "dark mode" in dynamicPrompt
+    assert "data-analysis-workflow" in dynamicPrompt
+
+
+def testSystemPromptWithoutContext(agentConfig):
+    staticPrompt, dynamicPrompt = agentEngine._buildSystemPrompt(agentConfig, {})
+
+    assert staticPrompt == agentConfig.systemPrompt
+    assert dynamicPrompt == ""
+
+
+def testActiveExecutionsIndexedByTenant(tenantContext):
+    otherTenant = TenantContext(tenantId="other-tenant", userId="other-user")
+    ownExecution = AgentExecution(
+        agentId="agent-1", sessionId="s1", tenantContext=tenantContext, userMessage="hi"
+    )
+    otherExecution = AgentExecution(
+        agentId="agent-2", sessionId="s2", tenantContext=otherTenant, userMessage="hi"
+    )
+
+    agentEngine._trackExecution(ownExecution)
+    agentEngine._trackExecution(otherExecution)
+
+    try:
+        assert agentEngine.getActiveExecutions("test-tenant") == [ownExecution]
+    finally:
+        agentEngine._untrackExecution(ownExecution.id)
+        agentEngine._untrackExecution(otherExecution.id)
+
+    assert agentEngine.getActiveExecutions("test-tenant") == []
+    assert agentEngine.getActiveExecutions("other-tenant") == []
+
+
+def testRetrievalSkippedForTrivialMessages():
+    assert not agentEngine._needsRetrieval("hi")
+    assert not agentEngine._needsRetrieval("Thanks!")
+    assert not agentEngine._needsRetrieval("ok cool")
+    assert agentEngine._needsRetrieval("who am I?")
+    assert agentEngine._needsRetrieval("Show last week's failed ETL jobs")
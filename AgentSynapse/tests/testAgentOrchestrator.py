@@ -0,0 +1,84 @@
+import pytest
+from schemas import AgentType, TaskDecomposition
+from agents.orchestrator.agentOrchestrator import agentOrchestrator, DecompositionEnvelope, DECOMPOSITION_SYSTEM_PROMPT
+from core.bedrockClient import countTextTokens, PROMPT_CACHE_MIN_TOKENS
+
+
+def makeTask(taskId, dependencies=None):
+    return TaskDecomposition(
+        taskId=taskId,
+        description=f"Task {taskId}",
+        assignedAgentType=AgentType.SQL_AGENT,
+        dependencies=dependencies or []
+    )
+
+
+def testExecutionPlanWaves():
+    tasks = [
+        makeTask("report", ["query", "dashboard"]),
+        makeTask("query"),
+        makeTask("dashboard"),
+    ]
+
+    plan = agentOrchestrator._buildExecutionPlan(tasks)
+
+    assert [t.taskId for t in plan["parallel"]] == ["query", "dashboard"]
+    assert [t.taskId for t in plan["sequential"]] == ["report"]
+
+
+def testExecutionPlanDropsCycles():
+    tasks = [
+        makeTask("a", ["b"]),
+        makeTask("b", ["a"]),
+        makeTask("c"),
+    ]
+
+    plan = agentOrchestrator._buildExecutionPlan(tasks)
+
+    assert [t.taskId for t in plan["sequential"]] == ["c"]
+    assert plan["parallel"] == []
+
+
+def testSimpleRequestSkipsDecomposition():
+    assert agentOrchestrator._isSimpleRequest("How many orders were placed yesterday?")
+    assert not agentOrchestrator._isSimpleRequest(
+        "Query last month's sales and then build a dashboard from the results"
+    )
+    assert not agentOrchestrator._isSimpleRequest("Run a SQL query for revenue by region and chart it")
+    assert not agentOrchestrator._isSimpleRequest("x" * 250)
+
+
+def testDecompositionEnvelopeDefaults():
+    envelope = DecompositionEnvelope.model_validate_json(
+        '{"tasks": [{"description": "Count orders", "agentType": "sql_agent"}]}'
+    )
+
+    assert len(envelope.tasks) == 1
+    assert envelope.tasks[0].dependencies == []
+    assert envelope.tasks[0].priority == 1
+    assert envelope.tasks[0].estimatedTokens == 1000
+
+
+def testSummarizeToolCallsDropsPayloads():
+    summaries = agentOrchestrator._summarizeToolCalls([
+        {"id": "1", "name": "runQuery", "input": {"sql": "SELECT 1"}, "result": {"rows": [[1]]}},
+        {"id": "2", "name": "buildChart", "input": {}, "result": {"error": "timeout"}},
+    ])
+
+    assert summaries == [
+        {"name": "runQuery", "status": "success"},
+        {"name": "buildChart", "status": "error"},
+    ]
+
+
+def testDecompositionPromptIsLongEnoughToCache():
+    assert countTextTokens(DECOMPOSITION_SYSTEM_PROMPT) >= PROMPT_CACHE_MIN_TOKENS
+
+
+@pytest.mark.asyncio
+async def testFailedEngineResultIsNotTreatedAsSuccess():
+    results = {"query": {"response": None, "toolCalls": [], "status": "failed"}}
+
+    response = await agentOrchestrator._synthesizeResults(None, "request", results, "session")
+
+    assert response == "All tasks failed: task failed"
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+from decimal import Decimal
+from enum import IntEnum
+from agents.registry.agentRegistry import agentRegistry
+
+
+def testConvertToDecimalNested():
+    converted = agentRegistry._convertToDecimal({
+        "threshold": 0.25,
+        "retries": 3,
+        "enabled": True,
+        "label": "nightly",
+        "steps": [1, {"weight": 1.5}, ["a", 2]]
+    })
+
+    assert converted == {
+        "threshold": Decimal("0.25"),
+        "retries": Decimal(3),
+        "enabled": True,
+        "label": "nightly",
+        "steps": [Decimal(1), {"weight": Decimal("1.5")}, ["a", Decimal(2)]]
+    }
+
+
+def testConvertToDecimalScalars():
+    assert agentRegistry._convertToDecimal(0.1) == Decimal("0.1")
+    assert agentRegistry._convertToDecimal("text") == "text"
+    assert agentRegistry._convertToDecimal(None) is None
+
+
+def testConvertToDecimalSubclasses():
+    class Level(IntEnum):
+        HIGH = 2
+
+    converted = agentRegistry._convertToDecimal(OrderedDict(level=Level.HIGH, weights=(0.5, True)))
+
+    assert converted == {"level": Decimal(2), "weights": [Decimal("0.5"), True]}
+    assert type(converted) is dict
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from utils.batching import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def testConcurrentSubmissionsShareBatches():
+    batchSizes = []
+
+    async def double(items):
+        batchSizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, maxSize=4, maxWaitSeconds=0.05)
+
+    results = await asyncio.gather(*(batcher.submit(index) for index in range(10)))
+    await batcher.close()
+
+    assert results == [index * 2 for index in range(10)]
+    assert batchSizes == [4, 4, 2]
+
+
+@pytest.mark.asyncio
+async def testFailuresAreRaisedPerItem():
+    async def rejectOdd(items):
+        return [ValueError(item) if item % 2 else item for item in items]
+
+    batcher = MicroBatcher(rejectOdd, maxWaitSeconds=0.01)
+
+    results = await asyncio.gather(batcher.submit(2), batcher.submit(3), return_exceptions=True)
+    await batcher.close()
+
+    assert results[0] == 2
+    assert isinstance(results[1], ValueError)
+
+
+@pytest.mark.asyncio
+async def testShortResultListFailsRemainingItems():
+    async def dropLast(items):
+        return items[:-1]
+
+    batcher = MicroBatcher(dropLast, maxWaitSeconds=0.05)
+
+    results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+    await batcher.close()
+
+    assert results[0] == 1
+    assert isinstance(results[1], RuntimeError)
+
+
+@pytest.mark.asyncio
+async def testCloseDrainsQueuedItems():
+    async def echo(items):
+        await asyncio.sleep(0.01)
+        return items
+
+    batcher = MicroBatcher(echo, maxSize=2, maxWaitSeconds=0.05)
+
+    pending = [asyncio.create_task(batcher.submit(index)) for index in range(5)]
+    await asyncio.sleep(0)
+    await batcher.close()
+
+    assert await asyncio.gather(*pending) == list(range(5))
+
+
+@pytest.mark.asyncio
+async def testDrainWaitsWithoutStopping():
+    stored = []
+
+    async def store(items):
+        stored.extend(items)
+        return [None] * len(items)
+
+    batcher = MicroBatcher(store, maxSize=2, maxWaitSeconds=0.05)
+
+    for index in range(3):
+        await batcher.enqueue(index)
+    await batcher.drain()
+    assert stored == [0, 1, 2]
+
+    await batcher.enqueue(3)
+    await batcher.drain()
+    assert stored == [0, 1, 2, 3]
+    await batcher.close()
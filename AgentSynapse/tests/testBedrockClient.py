@@ -0,0 +1,44 @@
+from core.bedrockClient import bedrockClient
+
+
+def testExtractResponseSinglePass():
+    text, toolCalls = bedrockClient.extractResponse({
+        "content": [
+            {"type": "text", "text": "Let me check."},
+            {"type": "tool_use", "id": "t1", "name": "runQuery", "input": {"sql": "SELECT 1"}},
+            {"type": "text", "text": "ignored"},
+        ]
+    })
+
+    assert text == "Let me check."
+    assert toolCalls == [{"id": "t1", "name": "runQuery", "input": {"sql": "SELECT 1"}}]
+
+
+def testExtractResponseTextOnly():
+    assert bedrockClient.extractResponse({"content": [{"type": "text", "text": "Hi"}]}) == ("Hi", [])
+    assert bedrockClient.extractResponse({}) == ("", [])
+
+
+def testCacheBreakpointDoesNotMutateMessage():
+    message = {"role": "user", "content": "hello"}
+
+    marked = bedrockClient._withCacheBreakpoint(message)
+
+    assert message == {"role": "user", "content": "hello"}
+    assert marked["content"] == [
+        {"type": "text", "text": "hello", "cache_control": {"type": "ephemeral"}}
+    ]
+
+
+def testUsageTokensIncludesCachedInput():
+    response = {
+        "usage": {
+            "input_tokens": 20,
+            "output_tokens": 30,
+            "cache_read_input_tokens": 1000,
+            "cache_creation_input_tokens": 5
+        }
+    }
+
+    assert bedrockClient.usageTokens(response) == 1055
+    assert bedrockClient.usageTokens({}) == 0
@@ -0,0 +1,71 @@
+import time
+import numpy as np
+from utils.cache import LRUCache, SemanticCache
+
+
+def testLRUCacheEvictsLeastRecentlyUsed():
+    cache = LRUCache(maxSize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def testLRUCacheExpiresEntries():
+    cache = LRUCache(maxSize=10, ttlSeconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.items() == []
+
+
+def testSemanticCacheMatchesWithinScopeOnly():
+    cache = SemanticCache(threshold=0.9)
+    cache.set("tenant-a", "q1", [1.0, 0.0, 0.0], {"response": "cached"})
+
+    assert cache.get("tenant-a", [0.98, 0.05, 0.0]) == {"response": "cached"}
+    assert cache.get("tenant-a", [0.0, 1.0, 0.0]) is None
+    assert cache.get("tenant-b", [1.0, 0.0, 0.0]) is None
+
+
+def testSemanticCacheInvalidatesScopePrefix():
+    cache = SemanticCache(threshold=0.9)
+    cache.set(("tenant-a", "user-1", "s1", 10), "q1", [1.0, 0.0, 0.0], "a1")
+    cache.set(("tenant-a", "user-1", None, 5), "q1", [1.0, 0.0, 0.0], "a2")
+    cache.set(("tenant-a", "user-2", "s1", 10), "q1", [1.0, 0.0, 0.0], "b1")
+
+    cache.invalidateScope(("tenant-a", "user-1"))
+
+    assert cache.get(("tenant-a", "user-1", "s1", 10), [1.0, 0.0, 0.0]) is None
+    assert cache.get(("tenant-a", "user-1", None, 5), [1.0, 0.0, 0.0]) is None
+    assert cache.get(("tenant-a", "user-2", "s1", 10), [1.0, 0.0, 0.0]) == "b1"
+
+
+def testSemanticCacheEvictsAndExpires():
+    cache = SemanticCache(threshold=0.9, maxEntriesPerScope=1, ttlSeconds=0.01)
+    cache.set("tenant", "q1", [1.0, 0.0], "first")
+    cache.set("tenant", "q2", [0.0, 1.0], "second")
+
+    assert cache.get("tenant", [1.0, 0.0]) is None
+    assert cache.get("tenant", [0.0, 1.0]) == "second"
+
+    time.sleep(0.02)
+    assert cache.get("tenant", [0.0, 1.0]) is None
+
+
+def testSemanticCacheStoresHalfPrecision():
+    cache = SemanticCache(threshold=0.99)
+    cache.set("tenant", "q1", [0.6, 0.8, 0.0], "answer")
+
+    assert cache.get("tenant", [0.6, 0.8, 0.0]) == "answer"
+    assert cache._scopes.get("tenant").matrix.dtype == np.float16
+
+    cache.set("tenant", "q2", [0.0, 0.0, 1.0], "other")
+    assert cache.get("tenant", [0.0, 0.0, 1.0]) == "other"
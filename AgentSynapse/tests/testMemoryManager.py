@@ -91,3 +91,47 @@ async def testWorkingMemoryOperations(tenantContext):
     assert value is not None
     assert value["theme"] == "dark"
     assert value["language"] == "en"
+
+
+def testTakeWithinBudgetStopsAtFirstOverflow():
+    from types import SimpleNamespace
+    from core.bedrockClient import bedrockClient
+
+    memories = [SimpleNamespace(content=text) for text in ["alpha beta", "gamma", "delta epsilon zeta"]]
+    counts = [bedrockClient.countTokens(memory.content) for memory in memories]
+
+    taken, used = memoryManager._takeWithinBudget(memories, 10, 10 + counts[0] + counts[1] + 1)
+    assert taken == memories[:2]
+    assert used == 10 + counts[0] + counts[1]
+
+    taken, used = memoryManager._takeWithinBudget(memories, 10, 10)
+    assert taken == []
+    assert used == 10
+
+
+def testRankMemoriesOrdersByWeightedScore():
+    from datetime import datetime, timedelta
+    from schemas import SemanticMemoryRecord, MemoryType
+
+    def makeRecord(content, importance, ageDays):
+        return SemanticMemoryRecord(
+            tenantId="test-tenant",
+            userId="test-user",
+            sessionId="session-1",
+            memoryType=MemoryType.SEMANTIC,
+            content=content,
+            source=MemorySource.USER_STATED,
+            importance=importance,
+            createdAt=datetime.utcnow() - timedelta(days=ageDays)
+        )
+
+    memories = [
+        makeRecord("old", 0.5, 365),
+        makeRecord("important", 0.9, 1),
+        makeRecord("recent", 0.5, 1),
+    ]
+
+    ranked = memoryManager._rankMemories(memories, "query")
+
+    assert [m.content for m in ranked] == ["important", "recent", "old"]
+    assert ranked[0].contextData["relevanceScore"] > ranked[1].contextData["relevanceScore"]
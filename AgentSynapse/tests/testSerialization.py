@@ -0,0 +1,43 @@
+from datetime import datetime
+from decimal import Decimal
+import orjson
+import pytest
+from utils.serialization import orjsonDefault
+
+
+def testOrjsonDefaultConvertsDecimal():
+    payload = {"temperature": Decimal("0.7"), "createdAt": datetime(2024, 1, 2, 3, 4, 5)}
+
+    assert orjson.loads(orjson.dumps(payload, default=orjsonDefault)) == {
+        "temperature": 0.7,
+        "createdAt": "2024-01-02T03:04:05"
+    }
+
+
+def testOrjsonDefaultRejectsUnknownTypes():
+    with pytest.raises(TypeError):
+        orjsonDefault(object())
+
+
+@pytest.mark.asyncio
+async def testStreamJsonArrayMatchesBufferedEncoding():
+    from api.models.responses import streamJsonArray
+
+    async def items():
+        for index in range(3):
+            yield {"id": str(index), "weight": Decimal("1.5")}
+
+    body = b"".join([chunk async for chunk in streamJsonArray("agents", items())])
+
+    assert orjson.loads(body) == {
+        "agents": [{"id": str(index), "weight": 1.5} for index in range(3)]
+    }
+
+
+def testBuildProjectorKeepsFieldOrder():
+    from types import SimpleNamespace
+    from api.models.responses import buildProjector
+
+    project = buildProjector(("id", "name"))
+
+    assert project(SimpleNamespace(id="a1", name="Agent", extra=True)) == {"id": "a1", "name": "Agent"}
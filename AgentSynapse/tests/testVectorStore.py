@@ -0,0 +1,17 @@
+import numpy as np
+from memory.semanticMemory.vectorStore import quantizeEmbedding
+
+
+def testQuantizeEmbeddingPreservesDirection():
+    rng = np.random.default_rng(7)
+    vector = rng.normal(size=384).astype(np.float32)
+
+    quantized = np.asarray(quantizeEmbedding(vector.tolist()), dtype=np.float32)
+
+    assert np.max(np.abs(quantized)) == 127
+    cosine = float(vector @ quantized / (np.linalg.norm(vector) * np.linalg.norm(quantized)))
+    assert cosine > 0.999
+
+
+def testQuantizeZeroVector():
+    assert quantizeEmbedding([0.0, 0.0, 0.0]) == [0, 0, 0]
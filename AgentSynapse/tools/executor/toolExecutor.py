@@ -1,4 +1,3 @@
-import boto3
 import json
 import importlib.util
 import sys
@@ -8,25 +7,25 @@ import tempfile
 import httpx
 from config.settings import settings
 from utils.logger import getLogger
+from utils.awsClients import getClient
+from utils.cache import LRUCache
 from utils.exceptions import ToolExecutionError, UnauthorizedAccess
 from schemas import ToolDefinition, TenantContext
 
 logger = getLogger(__name__)
 
+BEDROCK_SCHEMA_CACHE_SIZE = 1024
+
 
 class ToolExecutor:
     def __init__(self):
         self._s3 = None
         self._httpClient = httpx.AsyncClient(timeout=30.0)
+        self._bedrockSchemas = LRUCache(BEDROCK_SCHEMA_CACHE_SIZE)
 
     def _getS3(self):
         if not self._s3:
-            self._s3 = boto3.client(
-                "s3",
-                region_name=settings.aws.region,
-                aws_access_key_id=settings.aws.accessKeyId,
-                aws_secret_access_key=settings.aws.secretAccessKey
-            )
+            self._s3 = getClient("s3")
         return self._s3
 
     async def execute(
@@ -120,12 +119,7 @@ class ToolExecutor:
         toolInput: Dict[str, Any],
         tenantContext: TenantContext
     ) -> Any:
-        lambdaClient = boto3.client(
-            "lambda",
-            region_name=settings.aws.region,
-            aws_access_key_id=settings.aws.accessKeyId,
-            aws_secret_access_key=settings.aws.secretAccessKey
-        )
+        lambdaClient = getClient("lambda")
 
         functionName = config.get("functionName")
 
@@ -201,11 +195,22 @@ class ToolExecutor:
                 del sys.modules["tool_module"]
 
     def formatForBedrock(self, tool: ToolDefinition) -> Dict[str, Any]:
-        return {
-            "name": tool.name,
-            "description": tool.description,
-            "input_schema": tool.inputSchema
-        }
+        """Bedrock tool spec for tool, built once per tool revision
+
+        The returned dict is shared between requests and must not be mutated.
+        """
+        cacheKey = (tool.id, tool.version, tool.updatedAt)
+        spec = self._bedrockSchemas.get(cacheKey)
+
+        if spec is None:
+            spec = {
+                "name": tool.name,
+                "description": tool.description,
+                "input_schema": tool.inputSchema
+            }
+            self._bedrockSchemas.set(cacheKey, spec)
+
+        return spec
 
     async def close(self):
         await self._httpClient.aclose()
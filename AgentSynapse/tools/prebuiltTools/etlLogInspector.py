@@ -16,10 +16,9 @@ AWS permissions:
 import asyncio
 from datetime import datetime, timedelta, timezone
 
-import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 
-from config.settings import settings
+from utils.awsClients import getClient
 
 
 async def execute(toolInput: dict, context: dict) -> dict:
@@ -40,12 +39,7 @@ async def execute(toolInput: dict, context: dict) -> dict:
     loop = asyncio.get_running_loop()
 
     def _fetchEvents():
-        client = boto3.client(
-            "logs",
-            region_name=settings.aws.region,
-            aws_access_key_id=settings.aws.accessKeyId,
-            aws_secret_access_key=settings.aws.secretAccessKey
-        )
+        client = getClient("logs")
 
         try:
             response = client.filter_log_events(
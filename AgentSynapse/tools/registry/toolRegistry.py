@@ -1,8 +1,9 @@
-import boto3
+import asyncio
 from boto3.dynamodb.conditions import Key, Attr
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 from datetime import datetime
 from config.settings import settings
+from utils.awsClients import getAsyncTable
 from utils.logger import getLogger
 from utils.exceptions import InvalidToolDefinition, ToolNotFound
 from schemas import ToolDefinition, TenantContext, ToolPermission
@@ -13,28 +14,15 @@ logger = getLogger(__name__)
 
 class ToolRegistry:
     def __init__(self):
-        self._dynamodb = None
-        self._table = None
         self._localCache = {}
 
-    def _getTable(self):
-        if not self._table:
-            resourceArgs = {
-                "region_name": settings.aws.region,
-                "aws_access_key_id": settings.aws.accessKeyId,
-                "aws_secret_access_key": settings.aws.secretAccessKey
-            }
-            if settings.dynamodb.endpointUrl:
-                resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
-
-            self._dynamodb = boto3.resource("dynamodb", **resourceArgs)
-            self._table = self._dynamodb.Table(settings.dynamodb.tableToolRegistry)
-        return self._table
+    async def _getTable(self):
+        return await getAsyncTable(settings.dynamodb.tableToolRegistry)
 
     async def register(self, tool: ToolDefinition) -> str:
-        toolVersioning.ensureVersionAvailable(tool.name, tool.tenantId, tool.version)
+        await toolVersioning.ensureVersionAvailable(tool.name, tool.tenantId, tool.version)
 
-        table = self._getTable()
+        table = await self._getTable()
 
         item = {
             "pk": f"TENANT#{tool.tenantId}",
@@ -62,7 +50,7 @@ class ToolRegistry:
             item["yamlConfig"] = tool.yamlConfig
 
         try:
-            table.put_item(Item=item)
+            await table.put_item(Item=item)
             self._localCache[f"{tool.tenantId}:{tool.name}:{tool.version}"] = tool
             logger.info("tool_registered", toolName=tool.name, version=tool.version)
             toolVersioning.recordVersionRegistration(tool.tenantId, tool.name)
@@ -78,15 +66,27 @@ class ToolRegistry:
         tenantContext: TenantContext,
         version: str = "1.0.0"
     ) -> ToolDefinition:
+        tool = await self.tryGet(toolName, tenantContext, version)
+        if tool is None:
+            raise ToolNotFound(f"{toolName}:{version}")
+        return tool
+
+    async def tryGet(
+        self,
+        toolName: str,
+        tenantContext: TenantContext,
+        version: str = "1.0.0"
+    ) -> Optional[ToolDefinition]:
+        """Like get, but returns None for a missing tool instead of raising"""
         if version == "latest":
-            latestVersion = toolVersioning.getLatestVersion(
+            latestVersion = await toolVersioning.getLatestVersion(
                 toolName,
                 tenantContext.tenantId,
                 includePublic=True
             )
             if not latestVersion:
                 logger.warning("tool_latest_version_not_found", toolName=toolName, tenantId=tenantContext.tenantId)
-                raise ToolNotFound(toolName)
+                return None
             version = latestVersion
 
         cacheKey = f"{tenantContext.tenantId}:{toolName}:{version}"
@@ -94,44 +94,41 @@ class ToolRegistry:
         if cacheKey in self._localCache:
             return self._localCache[cacheKey]
 
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
-            response = table.query(
+            response = await table.query(
                 KeyConditionExpression=Key("pk").eq(f"TENANT#{tenantContext.tenantId}") &
                                       Key("sk").eq(f"TOOL#{toolName}#VERSION#{version}")
             )
 
-            items = response.get("Items", [])
-
-            if not items:
-                publicTools = await self._getPublicTools(toolName, version)
-                if publicTools:
-                    return publicTools[0]
-                logger.warning(
-                    "tool_not_found",
-                    toolName=toolName,
-                    version=version,
-                    tenantId=tenantContext.tenantId
-                )
-                raise ToolNotFound(f"{toolName}:{version}")
-
-            item = items[0]
-            tool = self._itemToToolDefinition(item)
-            self._localCache[cacheKey] = tool
-            return tool
-
         except Exception as e:
             logger.error("tool_get_error", error=str(e), toolName=toolName)
-            if isinstance(e, ToolNotFound):
-                raise
-            raise ToolNotFound(toolName)
+            return None
+
+        items = response.get("Items", [])
+
+        if not items:
+            publicTools = await self._getPublicTools(toolName, version)
+            if publicTools:
+                return publicTools[0]
+            logger.warning(
+                "tool_not_found",
+                toolName=toolName,
+                version=version,
+                tenantId=tenantContext.tenantId
+            )
+            return None
+
+        tool = self._itemToToolDefinition(items[0])
+        self._localCache[cacheKey] = tool
+        return tool
 
     async def _getPublicTools(self, toolName: str, version: str) -> List[ToolDefinition]:
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
-            response = table.query(
+            response = await table.query(
                 IndexName="ToolNameIndex",
                 KeyConditionExpression=Key("name").eq(toolName),
                 FilterExpression=Attr("permission").eq(ToolPermission.PUBLIC.value) &
@@ -170,7 +167,7 @@ class ToolRegistry:
         permission: Optional[ToolPermission] = None,
         isActive: bool = True
     ) -> List[ToolDefinition]:
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
             keyCondition = Key("pk").eq(f"TENANT#{tenantContext.tenantId}")
@@ -179,7 +176,7 @@ class ToolRegistry:
             if permission:
                 filterExpression = filterExpression & Attr("permission").eq(permission.value)
 
-            response = table.query(
+            response = await table.query(
                 KeyConditionExpression=keyCondition,
                 FilterExpression=filterExpression
             )
@@ -191,6 +188,39 @@ class ToolRegistry:
             logger.error("tool_list_error", error=str(e), tenantId=tenantContext.tenantId)
             return []
 
+    async def listStream(
+        self,
+        tenantContext: TenantContext,
+        permission: Optional[ToolPermission] = None,
+        isActive: bool = True
+    ) -> AsyncIterator[ToolDefinition]:
+        """Yield tools page by page, following LastEvaluatedKey"""
+        table = await self._getTable()
+
+        filterExpression = Attr("isActive").eq(isActive)
+        if permission:
+            filterExpression = filterExpression & Attr("permission").eq(permission.value)
+
+        queryParams = {
+            "KeyConditionExpression": Key("pk").eq(f"TENANT#{tenantContext.tenantId}"),
+            "FilterExpression": filterExpression
+        }
+
+        try:
+            while True:
+                response = await table.query(**queryParams)
+
+                for item in response.get("Items", []):
+                    yield self._itemToToolDefinition(item)
+
+                lastKey = response.get("LastEvaluatedKey")
+                if not lastKey:
+                    return
+                queryParams["ExclusiveStartKey"] = lastKey
+
+        except Exception as e:
+            logger.error("tool_list_error", error=str(e), tenantId=tenantContext.tenantId)
+
     async def deactivate(
         self,
         toolName: str,
@@ -198,7 +228,7 @@ class ToolRegistry:
         version: str = "1.0.0"
     ) -> bool:
         if version == "latest":
-            latestVersion = toolVersioning.getLatestVersion(
+            latestVersion = await toolVersioning.getLatestVersion(
                 toolName,
                 tenantContext.tenantId,
                 includePublic=False
@@ -207,10 +237,10 @@ class ToolRegistry:
                 return False
             version = latestVersion
 
-        table = self._getTable()
+        table = await self._getTable()
 
         try:
-            table.update_item(
+            await table.update_item(
                 Key={
                     "pk": f"TENANT#{tenantContext.tenantId}",
                     "sk": f"TOOL#{toolName}#VERSION#{version}"
@@ -239,32 +269,32 @@ class ToolRegistry:
         toolIds: List[str],
         tenantContext: TenantContext
     ) -> List[ToolDefinition]:
-        tools = []
+        requested = []
 
         for toolId in toolIds:
             parts = toolId.split(":")
             toolName = parts[0]
             version = parts[1] if len(parts) > 1 else "1.0.0"
+            requested.append((toolName, version))
 
-            if version == "latest":
-                resolvedVersion = toolVersioning.getLatestVersion(
-                    toolName,
-                    tenantContext.tenantId,
-                    includePublic=True
-                )
-                if resolvedVersion:
-                    version = resolvedVersion
+        # Lookups, including "latest" version resolution inside tryGet, are independent
+        # round trips, so an agent's tools resolve in one wave
+        resolved = await asyncio.gather(*[
+            self.tryGet(toolName, tenantContext, version)
+            for toolName, version in requested
+        ])
 
-            try:
-                tool = await self.get(toolName, tenantContext, version)
-                tools.append(tool)
-            except ToolNotFound:
+        tools = []
+        for (toolName, version), tool in zip(requested, resolved):
+            if tool is None:
                 logger.warning(
                     "agent_tool_missing",
                     toolName=toolName,
                     version=version,
                     tenantId=tenantContext.tenantId
                 )
+                continue
+            tools.append(tool)
 
         return tools
 
@@ -280,7 +310,7 @@ class ToolRegistry:
         includePublic: bool = True,
         includeInactive: bool = True
     ) -> Dict[str, Any]:
-        history = toolVersioning.getVersionHistory(
+        history = await toolVersioning.getVersionHistory(
             toolName,
             tenantContext.tenantId,
             includePublic=includePublic,
@@ -308,7 +338,7 @@ class ToolRegistry:
                 toolName=toolName
             )
 
-        version = toolVersioning.getNextVersion(
+        version = await toolVersioning.getNextVersion(
             toolName,
             tenantContext.tenantId,
             releaseEnum,
@@ -2,10 +2,10 @@ import re
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple
 
-import boto3
 from boto3.dynamodb.conditions import Attr, Key
 
 from config.settings import settings
+from utils.awsClients import getAsyncTable
 from utils.exceptions import InvalidToolDefinition
 from utils.logger import getLogger
 from schemas import ToolPermission
@@ -21,25 +21,12 @@ class ToolReleaseType(str, Enum):
 
 class ToolVersioning:
     def __init__(self):
-        self._dynamodb = None
-        self._table = None
         self._versionPattern = re.compile(r"^\d+\.\d+\.\d+$")
         self._tenantCache: Dict[str, List[Dict[str, Any]]] = {}
         self._publicCache: Dict[str, List[Dict[str, Any]]] = {}
 
-    def _getTable(self):
-        if not self._table:
-            resourceArgs = {
-                "region_name": settings.aws.region,
-                "aws_access_key_id": settings.aws.accessKeyId,
-                "aws_secret_access_key": settings.aws.secretAccessKey
-            }
-            if settings.dynamodb.endpointUrl:
-                resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
-
-            self._dynamodb = boto3.resource("dynamodb", **resourceArgs)
-            self._table = self._dynamodb.Table(settings.dynamodb.tableToolRegistry)
-        return self._table
+    async def _getTable(self):
+        return await getAsyncTable(settings.dynamodb.tableToolRegistry)
 
     def _cacheKey(self, tenantId: str, toolName: str) -> str:
         return f"{tenantId}:{toolName}"
@@ -80,7 +67,7 @@ class ToolVersioning:
         major, minor, patch = version.split(".")
         return int(major), int(minor), int(patch)
 
-    def _fetchTenantVersions(
+    async def _fetchTenantVersions(
         self,
         toolName: str,
         tenantId: str,
@@ -90,7 +77,7 @@ class ToolVersioning:
         if cacheKey in self._tenantCache:
             return self._tenantCache[cacheKey]
 
-        table = self._getTable()
+        table = await self._getTable()
         items: List[Dict[str, Any]] = []
         lastEvaluatedKey = None
 
@@ -103,7 +90,7 @@ class ToolVersioning:
             if lastEvaluatedKey:
                 queryArgs["ExclusiveStartKey"] = lastEvaluatedKey
 
-            response = table.query(**queryArgs)
+            response = await table.query(**queryArgs)
             items.extend(response.get("Items", []))
             lastEvaluatedKey = response.get("LastEvaluatedKey")
 
@@ -116,7 +103,7 @@ class ToolVersioning:
         self._tenantCache[cacheKey] = items
         return items
 
-    def _fetchPublicVersions(
+    async def _fetchPublicVersions(
         self,
         toolName: str,
         includeInactive: bool = True
@@ -124,7 +111,7 @@ class ToolVersioning:
         if toolName in self._publicCache:
             return self._publicCache[toolName]
 
-        table = self._getTable()
+        table = await self._getTable()
         items: List[Dict[str, Any]] = []
         lastEvaluatedKey = None
 
@@ -141,7 +128,7 @@ class ToolVersioning:
             if lastEvaluatedKey:
                 queryArgs["ExclusiveStartKey"] = lastEvaluatedKey
 
-            response = table.query(**queryArgs)
+            response = await table.query(**queryArgs)
             items.extend(response.get("Items", []))
             lastEvaluatedKey = response.get("LastEvaluatedKey")
 
@@ -169,7 +156,7 @@ class ToolVersioning:
             reverse=True
         )
 
-    def getVersionHistory(
+    async def getVersionHistory(
         self,
         toolName: str,
         tenantId: str,
@@ -178,11 +165,11 @@ class ToolVersioning:
     ) -> List[Dict[str, Any]]:
         versions: List[Dict[str, Any]] = []
 
-        tenantItems = self._fetchTenantVersions(toolName, tenantId, includeInactive)
+        tenantItems = await self._fetchTenantVersions(toolName, tenantId, includeInactive)
         versions.extend(self._toVersionRecord(item, "tenant") for item in tenantItems)
 
         if includePublic:
-            publicItems = self._fetchPublicVersions(toolName, includeInactive)
+            publicItems = await self._fetchPublicVersions(toolName, includeInactive)
             versions.extend(self._toVersionRecord(item, "public") for item in publicItems)
 
         unique: Dict[str, Dict[str, Any]] = {}
@@ -198,13 +185,13 @@ class ToolVersioning:
         sortedVersions = self._sortVersions(list(unique.values()))
         return sortedVersions
 
-    def getLatestVersion(
+    async def getLatestVersion(
         self,
         toolName: str,
         tenantId: str,
         includePublic: bool = True
     ) -> Optional[str]:
-        history = self.getVersionHistory(
+        history = await self.getVersionHistory(
             toolName,
             tenantId,
             includePublic=includePublic,
@@ -214,7 +201,7 @@ class ToolVersioning:
             return None
         return history[0]["version"]
 
-    def versionExists(
+    async def versionExists(
         self,
         toolName: str,
         tenantId: str,
@@ -222,7 +209,7 @@ class ToolVersioning:
         includeInactive: bool = True
     ) -> bool:
         self.ensureValidVersion(version)
-        history = self.getVersionHistory(
+        history = await self.getVersionHistory(
             toolName,
             tenantId,
             includePublic=False,
@@ -230,14 +217,14 @@ class ToolVersioning:
         )
         return any(record["version"] == version for record in history)
 
-    def ensureVersionAvailable(
+    async def ensureVersionAvailable(
         self,
         toolName: str,
         tenantId: str,
         version: str
     ):
         self.ensureValidVersion(version)
-        if self.versionExists(toolName, tenantId, version, includeInactive=True):
+        if await self.versionExists(toolName, tenantId, version, includeInactive=True):
             raise InvalidToolDefinition(
                 f"Tool {toolName} version {version} already exists",
                 toolName=toolName
@@ -263,14 +250,14 @@ class ToolVersioning:
 
         return f"{major}.{minor}.{patch}"
 
-    def getNextVersion(
+    async def getNextVersion(
         self,
         toolName: str,
         tenantId: str,
         releaseType: ToolReleaseType = ToolReleaseType.PATCH,
         includePublic: bool = True
     ) -> str:
-        latest = self.getLatestVersion(toolName, tenantId, includePublic=includePublic)
+        latest = await self.getLatestVersion(toolName, tenantId, includePublic=includePublic)
         if not latest:
             return "1.0.0"
         return self.calculateNextVersion(latest, releaseType)
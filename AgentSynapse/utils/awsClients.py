@@ -0,0 +1,106 @@
+"""
+Process-wide AWS session and client factories
+
+boto3 clients are thread-safe and expensive to build (credential resolution,
+endpoint and TLS setup), so each service client is created once and reused.
+boto3 resources are not thread-safe, so DynamoDB tables used from async code
+come from one aioboto3 resource per event loop instead of a shared boto3 Table.
+"""
+
+import asyncio
+from contextlib import AsyncExitStack
+from functools import lru_cache
+import aioboto3
+import boto3
+from botocore.config import Config
+from config.settings import settings
+
+
+@lru_cache(maxsize=1)
+def getClientConfig() -> Config:
+    return Config(
+        max_pool_connections=max(10, settings.agent.maxParallelAgents),
+        tcp_keepalive=True
+    )
+
+
+@lru_cache(maxsize=1)
+def getBoto3Session() -> boto3.Session:
+    return boto3.Session(
+        region_name=settings.aws.region,
+        aws_access_key_id=settings.aws.accessKeyId,
+        aws_secret_access_key=settings.aws.secretAccessKey
+    )
+
+
+@lru_cache(maxsize=1)
+def getAioSession() -> aioboto3.Session:
+    return aioboto3.Session(
+        region_name=settings.aws.region,
+        aws_access_key_id=settings.aws.accessKeyId,
+        aws_secret_access_key=settings.aws.secretAccessKey
+    )
+
+
+@lru_cache(maxsize=None)
+def getClient(serviceName: str):
+    """Shared sync client for serviceName with a pooled connection config"""
+    return getBoto3Session().client(serviceName, config=getClientConfig())
+
+
+class AsyncDynamoTables:
+    """aioboto3 DynamoDB tables for the running event loop, opened once and reused"""
+
+    def __init__(self):
+        self._resource = None
+        self._resourceLoop = None
+        self._exitStack = None
+        self._tables = {}
+
+    async def _getResource(self):
+        loop = asyncio.get_running_loop()
+        if self._resource and self._resourceLoop is loop:
+            return self._resource
+
+        resourceArgs = {"config": getClientConfig()}
+        if settings.dynamodb.endpointUrl:
+            resourceArgs["endpoint_url"] = settings.dynamodb.endpointUrl
+
+        exitStack = AsyncExitStack()
+        resource = await exitStack.enter_async_context(
+            getAioSession().resource("dynamodb", **resourceArgs)
+        )
+
+        if self._resource and self._resourceLoop is loop:
+            # Another coroutine opened the resource while this one was connecting
+            await exitStack.aclose()
+            return self._resource
+
+        self._resource = resource
+        self._resourceLoop = loop
+        self._exitStack = exitStack
+        self._tables = {}
+        return resource
+
+    async def get(self, tableName: str):
+        resource = await self._getResource()
+        table = self._tables.get(tableName)
+        if table is None:
+            table = await resource.Table(tableName)
+            self._tables[tableName] = table
+        return table
+
+    async def close(self):
+        if self._exitStack:
+            await self._exitStack.aclose()
+            self._resource = None
+            self._resourceLoop = None
+            self._exitStack = None
+            self._tables = {}
+
+
+asyncDynamoTables = AsyncDynamoTables()
+
+
+async def getAsyncTable(tableName: str):
+    return await asyncDynamoTables.get(tableName)
@@ -0,0 +1,128 @@
+"""
+Micro-batching for per-item async calls that are cheaper in bulk
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+from utils.exceptions import BatcherClosed
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_CLOSE = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesce concurrent submit() calls into batched processBatch() calls
+
+    A background task collects items until maxSize is reached or maxWaitSeconds
+    has passed since the first item of the batch, then hands them to processBatch
+    in one call. processBatch must return one result per item, in order; a result
+    that is an Exception instance is raised to that item's caller only. drain()
+    waits for everything already queued; close() does the same and then stops the
+    background task.
+    """
+
+    def __init__(
+        self,
+        processBatch: Callable[[List[T]], Awaitable[List[R]]],
+        maxSize: int = 32,
+        maxWaitSeconds: float = 0.01,
+        maxQueueSize: int = 1000
+    ):
+        self.processBatch = processBatch
+        self.maxSize = maxSize
+        self.maxWaitSeconds = maxWaitSeconds
+        self.maxQueueSize = maxQueueSize
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def submit(self, item: T) -> R:
+        return await (await self.enqueue(item))
+
+    async def enqueue(self, item: T) -> "asyncio.Future[R]":
+        """Queue an item without waiting for its batch; only blocks while the queue is full"""
+        if self._flusher is None or self._flusher.done():
+            self._queue = asyncio.Queue(maxsize=self.maxQueueSize)
+            self._flusher = asyncio.create_task(self._flush())
+
+        result = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, result))
+        return result
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            first = await self._queue.get()
+            if first is _CLOSE:
+                self._queue.task_done()
+                return
+
+            batch = [first]
+            closing = False
+            deadline = loop.time() + self.maxWaitSeconds
+
+            while len(batch) < self.maxSize:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _CLOSE:
+                    closing = True
+                    break
+                batch.append(entry)
+
+            await self._process(batch)
+            for _ in range(len(batch) + closing):
+                self._queue.task_done()
+            if closing:
+                return
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.processBatch([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        if len(results) != len(batch):
+            mismatch = RuntimeError(f"processBatch returned {len(results)} results for {len(batch)} items")
+            results = list(results[:len(batch)])
+            results += [mismatch] * (len(batch) - len(results))
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def drain(self):
+        """Wait until every item queued so far has been processed, leaving the batcher running"""
+        if self._flusher is not None and not self._flusher.done():
+            await self._queue.join()
+
+    async def close(self):
+        if self._flusher is None:
+            return
+
+        flusher, self._flusher = self._flusher, None
+        queue = self._queue
+
+        if not flusher.done():
+            await queue.put(_CLOSE)
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                flusher.cancel()
+                raise
+
+        while not queue.empty():
+            entry = queue.get_nowait()
+            if entry is not _CLOSE and not entry[1].done():
+                entry[1].set_exception(BatcherClosed())
+            queue.task_done()
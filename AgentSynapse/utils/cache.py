@@ -0,0 +1,173 @@
+"""
+In-process caching utilities
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+class LRUCache:
+    """Size-bounded LRU cache with optional per-entry expiry
+
+    Entries are evicted least-recently-used first once maxSize is reached,
+    and lazily dropped on access once they are older than ttlSeconds.
+    """
+
+    def __init__(self, maxSize: int, ttlSeconds: Optional[float] = None):
+        self.maxSize = maxSize
+        self.ttlSeconds = ttlSeconds
+        self._data = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        value, expiresAt = entry
+        if expiresAt is not None and time.monotonic() >= expiresAt:
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        expiresAt = time.monotonic() + self.ttlSeconds if self.ttlSeconds else None
+        self._data[key] = (value, expiresAt)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxSize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return entry[0] if entry else default
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        now = time.monotonic()
+        return [
+            (key, value) for key, (value, expiresAt) in self._data.items()
+            if expiresAt is None or now < expiresAt
+        ]
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        return entry[1] is None or time.monotonic() < entry[1]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _SemanticScope:
+    """Entries of one SemanticCache scope plus their stacked embedding matrix
+
+    The matrix is rebuilt lazily after the entries change, so repeated lookups
+    against an unchanged scope reuse it instead of restacking every vector.
+    """
+
+    __slots__ = ("entries", "matrix", "values")
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.matrix = None
+        self.values = None
+
+    def invalidate(self):
+        self.matrix = None
+        self.values = None
+
+
+class SemanticCache:
+    """Nearest-neighbour response cache over L2-normalized embeddings
+
+    Entries are partitioned by scope (e.g. tenant/agent) so lookups never cross
+    tenants. Within a scope a lookup is a single matrix-vector product; a hit
+    requires cosine similarity of at least threshold. Embeddings are stored as
+    float16, halving memory per entry; the float16 rounding error (~1e-3) is far
+    below any useful threshold spacing.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        maxEntriesPerScope: int = 512,
+        ttlSeconds: Optional[float] = 300,
+        maxScopes: int = 10_000,
+        storageDtype: type = np.float16
+    ):
+        self.threshold = threshold
+        self.maxEntriesPerScope = maxEntriesPerScope
+        self.ttlSeconds = ttlSeconds
+        self.storageDtype = storageDtype
+        self._scopes = LRUCache(maxScopes)
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, scope: Hashable, embedding: Sequence[float]) -> Optional[Any]:
+        scopeIndex = self._scopes.get(scope)
+        if scopeIndex is None or not scopeIndex.entries:
+            return None
+
+        entries = scopeIndex.entries
+        if self.ttlSeconds:
+            now = time.monotonic()
+            while entries and next(iter(entries.values()))[2] <= now:
+                entries.popitem(last=False)
+                scopeIndex.invalidate()
+            if not entries:
+                return None
+
+        if scopeIndex.matrix is None:
+            stored = list(entries.values())
+            scopeIndex.matrix = np.stack([vector for vector, _, _ in stored])
+            scopeIndex.values = [value for _, value, _ in stored]
+
+        # Scores are computed in float32; only storage is reduced precision
+        scores = scopeIndex.matrix.astype(np.float32) @ self._normalize(embedding)
+        best = int(np.argmax(scores))
+
+        if scores[best] < self.threshold:
+            return None
+        return scopeIndex.values[best]
+
+    def set(self, scope: Hashable, key: Hashable, embedding: Sequence[float], value: Any):
+        scopeIndex = self._scopes.get(scope)
+        if scopeIndex is None:
+            scopeIndex = _SemanticScope()
+            self._scopes.set(scope, scopeIndex)
+
+        entries = scopeIndex.entries
+        expiresAt = time.monotonic() + self.ttlSeconds if self.ttlSeconds else float("inf")
+        entries.pop(key, None)
+        entries[key] = (self._normalize(embedding).astype(self.storageDtype), value, expiresAt)
+
+        while len(entries) > self.maxEntriesPerScope:
+            entries.popitem(last=False)
+
+        scopeIndex.invalidate()
+
+    def invalidateScope(self, scope: Hashable):
+        """Drop a scope's entries; a tuple scope also drops every longer tuple scope it prefixes"""
+        prefixLength = len(scope) if isinstance(scope, tuple) else None
+        staleScopes = [
+            key for key, _ in self._scopes.items()
+            if key == scope or (
+                prefixLength is not None and isinstance(key, tuple) and key[:prefixLength] == scope
+            )
+        ]
+        for key in staleScopes:
+            self._scopes.pop(key)
+
+    def clear(self):
+        self._scopes.clear()
@@ -76,3 +76,8 @@ class UnauthorizedAccess(ACEException):
     def __init__(self, message: str, resource: str = None):
         super().__init__(message, "UNAUTHORIZED_ACCESS")
         self.resource = resource
+
+
+class BatcherClosed(ACEException):
+    def __init__(self, message: str = "Batcher closed before the item was processed"):
+        super().__init__(message, "BATCHER_CLOSED")
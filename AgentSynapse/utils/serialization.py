@@ -32,3 +32,10 @@ def dumps_with_decimal(obj: Any, **kwargs) -> str:
         JSON string representation
     """
     return json.dumps(obj, cls=DecimalEncoder, **kwargs)
+
+
+def orjsonDefault(obj: Any) -> Any:
+    """orjson fallback for types it cannot serialize natively, such as DynamoDB Decimals"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")